@@ -0,0 +1,45 @@
+-- Atomic attendees_count updates
+-- Called from the API via supabase.rpc('adjust_attendees_count', ...) so a
+-- join/leave is a single UPDATE instead of a read followed by a write.
+CREATE OR REPLACE FUNCTION public.adjust_attendees_count(p_event_id UUID, p_delta INTEGER)
+RETURNS INTEGER
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE public.events
+    SET attendees_count = GREATEST(0, COALESCE(attendees_count, 0) + p_delta)
+    WHERE id = p_event_id
+    RETURNING attendees_count;
+$$;
+
+-- Recompute attendees_count from event_participants for events that drifted
+-- Returns the events that were corrected with their new count
+CREATE OR REPLACE FUNCTION public.reconcile_attendees_counts()
+RETURNS TABLE (event_id UUID, attendees_count INTEGER)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH actual AS (
+        SELECT e.id, COUNT(p.event_id)::INTEGER AS participants
+        FROM public.events e
+        LEFT JOIN public.event_participants p ON p.event_id = e.id
+        GROUP BY e.id
+    )
+    UPDATE public.events e
+    SET attendees_count = actual.participants
+    FROM actual
+    WHERE e.id = actual.id
+      AND e.attendees_count IS DISTINCT FROM actual.participants
+    RETURNING e.id, e.attendees_count;
+$$;
+
+-- Only the backend (service role, SUPABASE_KEY) may call these
+REVOKE EXECUTE ON FUNCTION public.adjust_attendees_count(UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.reconcile_attendees_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.adjust_attendees_count(UUID, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.reconcile_attendees_counts() TO service_role;
+
+-- Index used by the reconciliation join and participant lookups
+CREATE INDEX IF NOT EXISTS idx_event_participants_event ON public.event_participants(event_id);
@@ -14,6 +14,8 @@ CREATE TABLE IF NOT EXISTS public.notifications (
 CREATE INDEX idx_notifications_user ON public.notifications(user_id);
 CREATE INDEX idx_notifications_user_read ON public.notifications(user_id, is_read);
 CREATE INDEX idx_notifications_created_at ON public.notifications(created_at DESC);
+-- Per-user newest-first pages (keyset on created_at, id)
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON public.notifications(user_id, created_at DESC, id DESC);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE public.notifications ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,98 @@
+-- Unread notification counters
+-- One row per user, kept exact by a trigger on notifications so every write
+-- path (API inserts, bulk fan-out, cascades from deleted events) is counted.
+-- The API reads it with a primary-key lookup instead of COUNT(*).
+CREATE TABLE IF NOT EXISTS public.notification_counters (
+    user_id UUID PRIMARY KEY REFERENCES public.users(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE public.notification_counters ENABLE ROW LEVEL SECURITY;
+
+-- Users can read their own counter; only the trigger writes
+CREATE POLICY "Users can view own notification counter" ON public.notification_counters
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION public.adjust_unread_count(p_user_id UUID, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO public.notification_counters (user_id, unread_count)
+    VALUES (p_user_id, GREATEST(0, p_delta))
+    ON CONFLICT (user_id) DO UPDATE
+    SET unread_count = GREATEST(0, public.notification_counters.unread_count + p_delta),
+        updated_at = NOW();
+$$;
+
+CREATE OR REPLACE FUNCTION public.notifications_unread_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NOT COALESCE(NEW.is_read, FALSE) THEN
+            PERFORM public.adjust_unread_count(NEW.user_id, 1);
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- UPDATE only: when the user is deleted, their row and counter may already
+        -- be gone and an upsert from the notifications cascade would violate the foreign key
+        IF NOT COALESCE(OLD.is_read, FALSE) THEN
+            UPDATE public.notification_counters
+            SET unread_count = GREATEST(0, unread_count - 1),
+                updated_at = NOW()
+            WHERE user_id = OLD.user_id;
+        END IF;
+    ELSIF COALESCE(OLD.is_read, FALSE) IS DISTINCT FROM COALESCE(NEW.is_read, FALSE) THEN
+        PERFORM public.adjust_unread_count(NEW.user_id, CASE WHEN NEW.is_read THEN -1 ELSE 1 END);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS notifications_unread_count ON public.notifications;
+CREATE TRIGGER notifications_unread_count
+    AFTER INSERT OR DELETE OR UPDATE OF is_read ON public.notifications
+    FOR EACH ROW EXECUTE FUNCTION public.notifications_unread_trigger();
+
+-- Recompute counters from notifications for users whose counter drifted
+-- Returns the users that were corrected with their new count
+CREATE OR REPLACE FUNCTION public.reconcile_unread_counts()
+RETURNS TABLE (user_id UUID, unread_count INTEGER)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH actual AS (
+        SELECT u.id, COUNT(n.id) FILTER (WHERE NOT COALESCE(n.is_read, FALSE))::INTEGER AS unread
+        FROM public.users u
+        LEFT JOIN public.notifications n ON n.user_id = u.id
+        GROUP BY u.id
+    )
+    INSERT INTO public.notification_counters AS c (user_id, unread_count)
+    SELECT actual.id, actual.unread
+    FROM actual
+    LEFT JOIN public.notification_counters existing ON existing.user_id = actual.id
+    WHERE existing.unread_count IS DISTINCT FROM actual.unread
+      AND NOT (existing.user_id IS NULL AND actual.unread = 0)
+    ON CONFLICT (user_id) DO UPDATE
+    SET unread_count = EXCLUDED.unread_count,
+        updated_at = NOW()
+    RETURNING c.user_id, c.unread_count;
+$$;
+
+-- Only the backend (service role, SUPABASE_KEY) may call these
+REVOKE EXECUTE ON FUNCTION public.adjust_unread_count(UUID, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.reconcile_unread_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.adjust_unread_count(UUID, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.reconcile_unread_counts() TO service_role;
+
+-- Backfill counters for existing notifications
+SELECT public.reconcile_unread_counts();
+
+-- Periodic reconciliation: `flask --app run reconcile-unread` from cron, or with pg_cron:
+-- SELECT cron.schedule('reconcile-unread-counts', '17 * * * *', 'SELECT public.reconcile_unread_counts()');
@@ -0,0 +1,49 @@
+-- Events of one user as a single server-side query
+-- Called from the API via supabase.rpc('user_events', ...).select(...); the
+-- time filter, ordering and keyset pagination are applied by PostgREST on
+-- the function result, so nothing is shipped to the API as an id list.
+--
+-- Joined and created events are two UNION ALL branches (created events the
+-- user also joined are left out of the second one) rather than one
+-- EXISTS(...) OR created_by = ... filter, which no index can serve. The
+-- function is plain SQL without SECURITY DEFINER or SET options so Postgres
+-- inlines it into the PostgREST query: the time and keyset filters are pushed
+-- into each branch, each branch is read in (event_date_time, id) or
+-- (created_at, id) order from its index, and the page LIMIT is applied on top
+-- of the merged branches.
+DROP FUNCTION IF EXISTS public.user_events(UUID, BOOLEAN);
+CREATE FUNCTION public.user_events(p_user_id UUID, p_include_created BOOLEAN DEFAULT FALSE)
+RETURNS SETOF public.events
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT e.*
+    FROM public.event_participants p
+    JOIN public.events e ON e.id = p.event_id
+    WHERE p.user_id = p_user_id
+    UNION ALL
+    SELECT e.*
+    FROM public.events e
+    WHERE p_include_created
+      AND e.created_by = p_user_id
+      AND NOT EXISTS (
+            SELECT 1
+            FROM public.event_participants p
+            WHERE p.event_id = e.id
+              AND p.user_id = p_user_id
+        );
+$$;
+
+-- The function runs with the caller's rights (row level security of events
+-- and event_participants applies). Like the other API functions it is only
+-- executable by the backend (service role, SUPABASE_KEY): clients cannot
+-- call it through PostgREST with another user's id.
+REVOKE EXECUTE ON FUNCTION public.user_events(UUID, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.user_events(UUID, BOOLEAN) TO service_role;
+
+-- Indexes used by the participant join, the created_by branch and the time-ordered pages
+CREATE INDEX IF NOT EXISTS idx_event_participants_user_event ON public.event_participants(user_id, event_id);
+CREATE INDEX IF NOT EXISTS idx_events_created_by_date ON public.events(created_by, event_date_time, id);
+CREATE INDEX IF NOT EXISTS idx_events_created_by_created_at ON public.events(created_by, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_events_event_date_time ON public.events(event_date_time, id);
+DROP INDEX IF EXISTS public.idx_events_created_by;
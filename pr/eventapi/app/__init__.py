@@ -1,7 +1,22 @@
-from flask import Flask
+import hmac
+from flask import Flask, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import config
 from app.utils.supabase_client import supabase_client
+from app.utils.user_cache import user_profile_cache
+from app.utils.background import background_jobs
+from app.utils.email_utils import mail_transport
+from app.utils.response_cache import response_cache
+from app.utils.concurrency import query_pool
+from app.utils.http_pool import http_pool
+from app.utils.code_store import verification_code_store
+from app.utils.rate_limit import rate_limiter
+from app.utils.images import image_processor
+from app.utils.search import search_index
+from app.utils.recommendations import recommender
+from app.utils.unread_counts import unread_counter
+from app.utils.notification_broker import notification_broker
 
 def create_app(config_name='development'):
     """
@@ -14,6 +29,12 @@ def create_app(config_name='development'):
     # Load configuration from config.py
     app.config.from_object(config[config_name])
     
+    # Behind a reverse proxy the client address is in X-Forwarded-For
+    # (rate limits are per client IP); only trust the configured number of hops
+    proxy_hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if proxy_hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
+    
     # Enable CORS (Cross-Origin Resource Sharing)
     # This allows Flutter app to connect from different domain
     CORS(app, resources={
@@ -27,6 +48,18 @@ def create_app(config_name='development'):
     
     # Initialize Supabase client with app config
     supabase_client.init_app(app)
+    user_profile_cache.init_app(app)
+    background_jobs.init_app(app)
+    mail_transport.init_app(app)
+    response_cache.init_app(app)
+    query_pool.init_app(app)
+    verification_code_store.init_app(app)
+    rate_limiter.init_app(app)
+    image_processor.init_app(app)
+    search_index.init_app(app)
+    recommender.init_app(app)
+    unread_counter.init_app(app)
+    notification_broker.init_app(app)
     
     # Import and register blueprints (routes)
     from app.routes.auth import auth_bp
@@ -34,12 +67,18 @@ def create_app(config_name='development'):
     from app.routes.users import users_bp
     from app.routes.notifications import notifications_bp
     from app.routes.organizations import organizations_bp
+    from app.routes.feed import feed_bp
     
     app.register_blueprint(auth_bp)          # /api/auth/*
     app.register_blueprint(events_bp)        # /api/events/*
     app.register_blueprint(users_bp)         # /api/users/*
     app.register_blueprint(notifications_bp) # /api/notifications/*
     app.register_blueprint(organizations_bp) # /api/organizations/*
+    app.register_blueprint(feed_bp)          # /api/feed/*
+    
+    # Maintenance CLI commands (flask --app run reconcile-attendees)
+    from app.commands import register_commands
+    register_commands(app)
     
     # Health check route
     @app.route('/health')
@@ -47,6 +86,28 @@ def create_app(config_name='development'):
         """Check if API is running"""
         return {'status': 'healthy', 'message': 'Events API is running'}, 200
     
+    # Cache statistics (internal: only with METRICS_TOKEN, see config.py)
+    @app.route('/metrics')
+    def metrics():
+        """Hit/miss statistics of the in-process caches and Supabase pool usage"""
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            return {'error': 'Not found'}, 404
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+            return {'error': 'Unauthorized'}, 401
+        
+        return {
+            'response_cache': response_cache.stats(),
+            'user_cache': user_profile_cache.stats(),
+            'supabase_http': http_pool.stats(),
+            'rate_limiter': rate_limiter.stats(),
+            'search_index': search_index.stats(),
+            'recommender': recommender.stats(),
+            'unread_counts': unread_counter.stats(),
+            'notification_streams': notification_broker.stats(),
+        }, 200
+    
     # Root route
     @app.route('/')
     def index():
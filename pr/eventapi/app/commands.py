@@ -0,0 +1,28 @@
+import click
+from app.utils.supabase_client import supabase_client
+
+
+def register_commands(app):
+    """Register maintenance commands (run with `flask --app run <command>`)"""
+
+    @app.cli.command('reconcile-attendees')
+    def reconcile_attendees():
+        """Recompute events.attendees_count from event_participants"""
+        supabase = supabase_client.client
+        result = supabase.rpc('reconcile_attendees_counts', {}).execute()
+        fixed = result.data or []
+
+        for row in fixed:
+            click.echo(f"{row['event_id']}: attendees_count -> {row['attendees_count']}")
+        click.echo(f'{len(fixed)} event(s) corrected')
+
+    @app.cli.command('reconcile-unread')
+    def reconcile_unread():
+        """Recompute notification_counters from notifications"""
+        supabase = supabase_client.client
+        result = supabase.rpc('reconcile_unread_counts', {}).execute()
+        fixed = result.data or []
+
+        for row in fixed:
+            click.echo(f"{row['user_id']}: unread_count -> {row['unread_count']}")
+        click.echo(f'{len(fixed)} counter(s) corrected')
@@ -3,11 +3,11 @@ from app.utils.supabase_client import supabase_client
 from app.utils.decorators import token_required
 import re
 import random
-from datetime import datetime, timedelta
 
 from app.utils.email_utils import send_email
+from app.utils.code_store import verification_code_store, CODE_OK, CODE_ERRORS
+from app.utils.rate_limit import rate_limiter, by_ip, by_json_field
 
-verification_codes = {} 
 # Blueprint
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -25,6 +25,7 @@ def validate_username(username):
 
 # ---------- SIGNUP ----------
 @auth_bp.route('/signup', methods=['POST'])
+@rate_limiter.limit('signup_ip', key=by_ip)
 def signup():
     try:
         data = request.get_json()
@@ -103,6 +104,8 @@ def signup():
 
 
 @auth_bp.route('/send-verification', methods=['POST'])
+@rate_limiter.limit('verification_ip', key=by_ip)
+@rate_limiter.limit('verification_email', key=by_json_field('email'))
 def send_verification():
     try:
         data = request.get_json()
@@ -112,10 +115,9 @@ def send_verification():
 
         # Generate 6-digit code
         code = str(random.randint(100000, 999999))
-        expiry = datetime.utcnow() + timedelta(minutes=10)
 
-        # Store code and expiry
-        verification_codes[email] = {"code": code, "expiry": expiry}
+        # Store code (expires after VERIFICATION_CODE_TTL)
+        verification_code_store.put(email, code)
 
         # For demo: print code (replace with email sending logic)
         send_email(email, "Your Verification Code", f"Your verification code is: {code}")
@@ -128,6 +130,8 @@ def send_verification():
 
 # ---------- LOGIN ----------
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login_ip', key=by_ip)
+@rate_limiter.limit('login_account', key=by_json_field('username_or_email'))
 def login():
     try:
         data = request.get_json()
@@ -272,6 +276,8 @@ def get_current_user(current_user):
 
 # ---------- RESET PASSWORD ----------
 @auth_bp.route('/reset-password', methods=['POST'])
+@rate_limiter.limit('reset_password_ip', key=by_ip)
+@rate_limiter.limit('reset_password_email', key=by_json_field('email'))
 def reset_password():
     try:
         data = request.get_json()
@@ -310,19 +316,11 @@ def verify_email():
         verification_code = data.get('verification_code', '').strip()
         role = data.get('role', 'participant')
         # --------- SERVER-SIDE VERIFICATION CODE CHECK ---------
-        stored = verification_codes.get(email)
-        if not stored:
-         return jsonify({'error': 'Invalid or expired verification code'}), 400
-
-        if datetime.utcnow() > stored['expiry']:
-         del verification_codes[email]
-         return jsonify({'error': 'Verification code expired'}), 400
-
-        if verification_code != stored['code']:
-          return jsonify({'error': 'Invalid verification code'}), 400
-
-# Remove code after successful verification
-        del verification_codes[email]
+        # The code is removed once it has been used successfully
+        status, _ = verification_code_store.consume(email, verification_code)
+        if status != CODE_OK:
+            message, status_code = CODE_ERRORS[status]
+            return jsonify({'error': message}), status_code
 # --------------------------------------------------------
 
         # Validate required fields
@@ -446,6 +444,8 @@ def check_username():
 
 # ---------- RESEND VERIFICATION EMAIL ----------
 @auth_bp.route('/resend-verification', methods=['POST'])
+@rate_limiter.limit('verification_ip', key=by_ip)
+@rate_limiter.limit('verification_email', key=by_json_field('email'))
 def resend_verification():
     """Resend verification email"""
     try:
@@ -1,49 +1,241 @@
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.utils.supabase_client import supabase_client
-from app.utils.decorators import token_required, organizer_required
-from app.utils.email_utils import send_email
-from datetime import datetime
+from app.utils.decorators import token_required, token_optional, organizer_required
+from app.utils.email_utils import send_many, send_email_async
+from app.utils.pagination import paginate, wants_all, page_limit, encode_cursor, decode_cursor, in_chunks, InvalidQueryParam
+from app.utils.projection import event_columns, EVENT_FIELDS
+from app.utils.background import background_jobs
+from app.utils.response_cache import response_cache, event_tag
+from app.utils.etag import conditional
+from app.utils.concurrency import query_pool, QueryTimeout
+from app.utils.images import store_image, create_upload_url, submit_upload, InvalidImage, UploadNotFound
+from app.utils.search import search_index, parse_datetime
+from app.utils.recommendations import recommender
+from datetime import datetime, timedelta
+import logging
 import uuid
-from werkzeug.utils import secure_filename
+
+logger = logging.getLogger(__name__)
 
 # Create blueprint for event routes
 events_bp = Blueprint('events', __name__, url_prefix='/api/events')
 
+# Followers handled per batched INSERT during event fan-out (lookups use in_chunks)
+FANOUT_CHUNK_SIZE = 500
+
+# Response cache tag of the lists showing attendees counts (every event list),
+# invalidated on join/leave
+COUNTS_TAG = 'events:counts'
+
+def is_uuid(value):
+    """True for a well-formed UUID string (e.g. before using ids in an in_() filter)"""
+    try:
+        uuid.UUID(value)
+        return True
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+def query_popular_events(supabase, limit, columns):
+    """Events with the most attendees"""
+    return supabase.table('events').select(columns).order('attendees_count', desc=True).limit(limit).execute().data
+
+def query_upcoming_events(supabase, limit, columns, categories=None):
+    """Next events by date, optionally restricted to categories"""
+    now = datetime.now().isoformat()
+    query = supabase.table('events').select(columns).gte('event_date_time', now)
+    
+    if categories:
+        query = query.in_('category', categories)
+    
+    return query.order('event_date_time').limit(limit).execute().data
+
+def query_recommended_events(supabase, limit, columns):
+    """Upcoming events sorted by attendees count"""
+    now = datetime.now().isoformat()
+    return supabase.table('events').select(columns).gte('event_date_time', now).order('attendees_count', desc=True).limit(limit).execute().data
+
+def query_user_events(supabase, user_id, columns, include_created=False):
+    """
+    Events the user joined (and created, with include_created) as one
+    server-side query (user_events function, see database_user_events.sql).
+    Returns a query builder: filters, ordering and paginate() apply to it.
+    """
+    params = {'p_user_id': user_id, 'p_include_created': include_created}
+    return supabase.rpc('user_events', params).select(columns)
+
+def load_events_by_id(event_ids):
+    """
+    Full event rows by id ({id: row}, unknown ids left out), cached per
+    event and invalidated with the event's tag.
+    """
+    def load(ids):
+        supabase = supabase_client.client
+        result = supabase.table('events').select(','.join(EVENT_FIELDS)).in_('id', ids).execute()
+        return {event['id']: event for event in result.data or []}
+    
+    return response_cache.read_through({event_id: [event_tag(event_id)] for event_id in event_ids}, load)
+
+def query_personal_recommendations(supabase, user_id, limit, columns):
+    """
+    Events ranked by the recommender for `user_id` (the global ranking when
+    user_id is None), or by attendees count when recommendations are disabled.
+    """
+    if not recommender.enabled:
+        return query_recommended_events(supabase, limit, columns)
+    
+    if user_id:
+        event_ids = recommender.recommend(user_id, limit, supabase)
+    else:
+        event_ids = recommender.global_ranking(supabase)[:limit]
+    
+    rows = load_events_by_id(event_ids)
+    columns = columns.split(',')
+    return [{column: rows[event_id].get(column) for column in columns} for event_id in event_ids if event_id in rows]
+
 # ========== GET ALL EVENTS ==========
 @events_bp.route('/', methods=['GET'])
+@response_cache.cached('events', COUNTS_TAG)
 def get_all_events():
     """
-    Get all events (public, no auth required).
+    Get all events (public, no auth required), newest first.
+    Query params: ?limit=20&cursor=<next_cursor> (or ?all=true for everything)
+                  ?fields=title,image_url,... (default: summary columns)
     
     Response:
     {
-        "events": [...]
+        "events": [...],
+        "next_cursor": "..."   // null on the last page
     }
     """
     try:
         supabase = supabase_client.client
-        result = supabase.table('events').select('*').order('created_at', desc=True).execute()
-        return jsonify({'events': result.data}), 200
+        columns = event_columns(required=('created_at',))
+        events, next_cursor = paginate(supabase.table('events').select(columns), ('created_at', 'id'))
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET SINGLE EVENT ==========
 @events_bp.route('/<event_id>', methods=['GET'])
+@response_cache.cached(event_tag)
 def get_event(event_id):
     """
-    Get single event by ID.
+    Get single event by ID (all columns unless ?fields= is given).
     
     URL: /api/events/123-456-789
     """
     try:
         supabase = supabase_client.client
-        result = supabase.table('events').select('*').eq('id', event_id).execute()
+        result = supabase.table('events').select(event_columns(default=EVENT_FIELDS)).eq('id', event_id).execute()
         
         if not result.data:
             return jsonify({'error': 'Event not found'}), 404
         
         return jsonify({'event': result.data[0]}), 200
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ========== GET EVENTS BY IDS ==========
+@events_bp.route('/batch', methods=['GET'])
+def get_events_batch():
+    """
+    Get several events in one request (all columns unless ?fields= is given).
+    
+    URL: /api/events/batch?ids=id1,id2,id3  (at most EVENT_BATCH_MAX ids)
+    Events are returned in request order; unknown ids are listed in 'missing'.
+    """
+    try:
+        raw_ids = [i.strip() for value in request.args.getlist('ids') for i in value.split(',') if i.strip()]
+        event_ids = list(dict.fromkeys(raw_ids))
+        
+        if not event_ids:
+            return jsonify({'error': 'ids is required'}), 400
+        
+        max_ids = current_app.config.get('EVENT_BATCH_MAX', 100)
+        if len(event_ids) > max_ids:
+            return jsonify({'error': f'At most {max_ids} ids per request'}), 400
+        
+        columns = event_columns(default=EVENT_FIELDS).split(',')
+        
+        # Malformed ids are reported as missing
+        rows = load_events_by_id([event_id for event_id in event_ids if is_uuid(event_id)])
+        
+        events = [{column: rows[event_id].get(column) for column in columns} for event_id in event_ids if event_id in rows]
+        missing = [event_id for event_id in event_ids if event_id not in rows]
+        
+        return jsonify({'events': events, 'missing': missing}), 200
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ========== SEARCH EVENTS ==========
+def search_date_param(name, end_of_day=False):
+    """?from= / ?to= as datetime; a plain date covers the whole day for ?to="""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise InvalidQueryParam(f'Invalid {name} date: {value}')
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+@events_bp.route('/search', methods=['GET'])
+def search_events():
+    """
+    Full-text search over title, description, location and organizer name
+    (public, no auth required). Words match as prefixes; best matches first.
+    Query params: ?q=jazz%20fest&category=Music&from=2025-06-01&to=2025-06-30
+                  ?limit=20&cursor=<next_cursor>&fields=...
+    
+    Response:
+    {
+        "events": [{..., "score": 4.21}, ...],
+        "total": 57,
+        "next_cursor": "..."   // null on the last page
+    }
+    """
+    try:
+        if not search_index.ready:
+            return jsonify({'error': 'Search is not available yet, please try again shortly'}), 503
+        
+        columns = event_columns().split(',')
+        
+        # Results are ranked, not ordered by a column: the cursor holds the offset
+        cursor = request.args.get('cursor')
+        offset = decode_cursor(cursor, ('offset',))[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidQueryParam('Invalid cursor')
+        
+        limit = page_limit()
+        total, page = search_index.search(
+            request.args.get('q', ''),
+            category=request.args.get('category'),
+            date_from=search_date_param('from'),
+            date_to=search_date_param('to', end_of_day=True),
+            limit=limit,
+            offset=offset,
+        )
+        
+        rows = load_events_by_id([event_id for event_id, _ in page])
+        
+        events = [
+            dict({column: rows[event_id].get(column) for column in columns}, score=round(score, 4))
+            for event_id, score in page if event_id in rows
+        ]
+        next_cursor = encode_cursor({'offset': offset + limit}, ('offset',)) if offset + limit < total else None
+        
+        return jsonify({'events': events, 'total': total, 'next_cursor': next_cursor}), 200
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -51,7 +243,12 @@ def get_event(event_id):
 @events_bp.route('/upload-image', methods=['POST'])
 @token_required
 def upload_image(current_user):
-    """Upload an image to Supabase storage events bucket"""
+    """
+    Upload an event image to Supabase storage events bucket.
+    The image is validated from its content, stripped of metadata and stored
+    as thumb/card/full variants under its content hash (re-uploading the
+    same image reuses the stored objects); 'url' is the full variant.
+    """
     try:
         if 'image' not in request.files:
             return jsonify({'error': 'No image file provided'}), 400
@@ -60,44 +257,21 @@ def upload_image(current_user):
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        filename = secure_filename(file.filename)
-        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        
-        if file_ext not in allowed_extensions:
-            return jsonify({'error': f'Invalid file type. Allowed: {", ".join(allowed_extensions)}'}), 400
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = f"{current_user.user.id}/{unique_filename}"
-        
         supabase = supabase_client.client
         
-        # Read file content
-        file_content = file.read()
-        
-        # Determine content type
-        content_type = f'image/{file_ext}' if file_ext != 'jpg' else 'image/jpeg'
-        
-        # Upload to Supabase storage
+        # Validate, resize and upload (skipped when this image is already stored)
         try:
-            # Upload to events bucket
-            response = supabase.storage.from_('events').upload(
-                file_path,
-                file_content,
-                file_options={'content-type': content_type, 'upsert': 'false'}
-            )
-            
-            # Get public URL
-            public_url = supabase.storage.from_('events').get_public_url(file_path)
+            urls, paths = store_image(supabase, 'events', current_user.user.id, file.read())
             
             return jsonify({
                 'message': 'Image uploaded successfully',
-                'url': public_url,
-                'path': file_path
+                'url': urls['full'],
+                'path': paths['full'],
+                'urls': urls
             }), 200
             
+        except InvalidImage as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as storage_error:
             # If bucket doesn't exist or upload fails, return error
             print(f'Storage upload error: {storage_error}')
@@ -108,10 +282,149 @@ def upload_image(current_user):
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# ========== DIRECT IMAGE UPLOAD ==========
+@events_bp.route('/upload-image/url', methods=['POST'])
+@token_required
+def create_image_upload_url(current_user):
+    """
+    Signed URL to upload an event image straight to storage.
+    The client uploads the file to upload_url (or with upload_to_signed_url(path, token)),
+    then calls /upload-image/finalize with the path.
+    """
+    try:
+        supabase = supabase_client.client
+        upload = create_upload_url(supabase, 'events', current_user.user.id)
+        return jsonify(upload), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/upload-image/finalize', methods=['POST'])
+@token_required
+def finalize_image_upload(current_user):
+    """
+    Process an image uploaded through a signed URL, on a background job.
+    Request Body: {"path": "..."}
+    Answers 202 with job_id; GET /jobs/<job_id> holds the url, path and urls
+    of /upload-image in job.result once job.status is "done".
+    """
+    try:
+        data = request.get_json() or {}
+        path = data.get('path', '')
+        
+        supabase = supabase_client.client
+        job = submit_upload(supabase, 'events', current_user.user.id, path, owner_id=current_user.user.id)
+        
+        return jsonify({
+            'message': 'Image is being processed',
+            'job_id': job.id
+        }), 202
+        
+    except InvalidImage as e:
+        return jsonify({'error': str(e)}), 400
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def adjust_attendees_count(supabase, event_id, delta):
+    """
+    Atomically add delta to events.attendees_count (never below 0).
+    Runs as one UPDATE in Postgres, see database_attendees_count.sql.
+    """
+    result = supabase.rpc('adjust_attendees_count', {'p_event_id': event_id, 'p_delta': delta}).execute()
+    
+    # Every list embedding counts and the event's own entries (which the
+    # search results are read from)
+    response_cache.invalidate(COUNTS_TAG, event_tag(event_id))
+    return result.data
+
+def notify_followers_of_new_event(job, event_id, event_title, organizer_id, organizer_name):
+    """
+    Background fan-out for a new event, one page of FANOUT_CHUNK_SIZE
+    followers at a time: one batched INSERT into notifications, then an
+    email to each follower. Progress and failures are recorded on the job.
+    """
+    supabase = supabase_client.client
+    chunk_size = FANOUT_CHUNK_SIZE
+    
+    # Followers are read page by page: PostgREST caps a single response (max-rows)
+    last_follower_id = None
+    while True:
+        query = supabase.table('organization_follows').select('follower_id').eq('organization_id', organizer_id).order('follower_id').limit(chunk_size)
+        if last_follower_id is not None:
+            query = query.gt('follower_id', last_follower_id)
+        follower_ids = [f['follower_id'] for f in query.execute().data or []]
+        if not follower_ids:
+            return
+        
+        job.increment('followers', len(follower_ids))
+        notify_follower_chunk(job, supabase, follower_ids, event_id, event_title, organizer_name)
+        
+        if len(follower_ids) < chunk_size:
+            return
+        last_follower_id = follower_ids[-1]
+
+def notify_follower_chunk(job, supabase, follower_ids, event_id, event_title, organizer_name):
+    """Notifications (one batched INSERT) and emails (one SMTP session) for one page of followers"""
+    from app.routes.notifications import build_notification, create_notifications
+    
+    notifications = [
+        build_notification(
+            follower_id,
+            'new_event',
+            f'New event from {organizer_name}',
+            f'{organizer_name} has created a new event: "{event_title}"',
+            event_id
+        )
+        for follower_id in follower_ids
+    ]
+    
+    for inserted, error in create_notifications(supabase, notifications, len(notifications)):
+        job.increment('notifications_created', len(inserted))
+        if error:
+            job.add_error(error)
+    
+    try:
+        users = []
+        for ids in in_chunks(follower_ids):
+            users.extend(supabase.table('users').select('id, email, username').in_('id', ids).execute().data or [])
+    except Exception as e:
+        job.add_error(f'Could not load {len(follower_ids)} follower emails: {e}')
+        return
+    
+    recipients = [u for u in users if u.get('email')]
+    emails = []
+    for u in recipients:
+        email_body = f"""
+Hello {u.get('username', 'there')},
+
+{organizer_name} has just created a new event: "{event_title}".
+
+Open the app to view details and register.
+
+Best regards,
+Event Team
+"""
+        emails.append((u['email'], f'New event: {event_title}', email_body))
+    
+    try:
+        results = send_many(emails)
+    except Exception as mail_err:
+        job.increment('emails_failed', len(emails))
+        job.add_error(f'Error sending {len(emails)} follower emails: {mail_err}')
+        return
+    
+    for u, mail_err in zip(recipients, results):
+        if mail_err is None:
+            job.increment('emails_sent')
+        else:
+            job.increment('emails_failed')
+            job.add_error(f"Error sending email to follower {u.get('id')}: {mail_err}")
+
 # ========== CREATE EVENT ==========
 @events_bp.route('/', methods=['POST'])
 @token_required
-def create_event(current_user):
+def create_event(current_user, current_profile):
     """
     Create a new event.
     Requires authentication.
@@ -141,12 +454,11 @@ def create_event(current_user):
         
         supabase = supabase_client.client
         
-        # Get organization profile and user info
+        # Get organization profile (user info comes from the cached profile)
         org_profile = supabase.table('organization_profiles').select('*').eq('user_id', current_user.user.id).execute()
-        user_info = supabase.table('users').select('username, profile_photo_url').eq('id', current_user.user.id).execute()
         
-        organizer_name = user_info.data[0]['username'] if user_info.data else 'Unknown'
-        organizer_image_url = user_info.data[0].get('profile_photo_url') if user_info.data else None
+        organizer_name = current_profile['username'] if current_profile else 'Unknown'
+        organizer_image_url = current_profile.get('profile_photo_url') if current_profile else None
         
         # If organization profile exists, use profile name
         if org_profile.data:
@@ -171,63 +483,47 @@ def create_event(current_user):
         # Insert into database
         result = supabase.table('events').insert(event_data).execute()
         
-        # Notify followers about new event
-        try:
-            followers = supabase.table('organization_follows').select('follower_id').eq('organization_id', current_user.user.id).execute()
-            
-            if followers.data:
-                from app.routes.notifications import create_notification
-                event_title = data['title']
-                
-                for follower in followers.data:
-                    create_notification(
-                        supabase,
-                        follower['follower_id'],
-                        'new_event',
-                        f'New event from {organizer_name}',
-                        f'{organizer_name} has created a new event: "{event_title}"',
-                        result.data[0]['id'] if result.data else None
-                    )
-                # Send email notifications to followers if possible
-                try:
-                    follower_ids = [f['follower_id'] for f in followers.data]
-                    users_resp = supabase.table('users').select('id, email, username').in_('id', follower_ids).execute()
-                    if users_resp.data:
-                        for u in users_resp.data:
-                            try:
-                                if u.get('email'):
-                                    email_body = f"""
-Hello {u.get('username', 'there')},
-
-{organizer_name} has just created a new event: "{event_title}".
-
-Open the app to view details and register.
-
-Best regards,
-Event Team
-"""
-                                    send_email(u['email'], f'New event: {event_title}', email_body)
-                            except Exception as mail_err:
-                                print(f"Error sending email to follower {u.get('id')}: {mail_err}")
-                except Exception as mail_outer_err:
-                    print(f'Error preparing follower emails: {mail_outer_err}')
-        except Exception as notif_error:
-            print(f'Error sending notifications: {notif_error}')
-            # Don't fail event creation if notifications fail
+        event = result.data[0]
+        response_cache.invalidate('events')
+        search_index.add(event)
+        
+        # Notify followers in the background so the request returns right away
+        job = background_jobs.submit(
+            'new_event_fanout',
+            notify_followers_of_new_event,
+            event['id'],
+            data['title'],
+            current_user.user.id,
+            organizer_name,
+            owner_id=current_user.user.id,
+        )
         
         return jsonify({
             'message': 'Event created successfully',
-            'event': result.data[0]
+            'event': event,
+            'fanout_job_id': job.id
         }), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# ========== GET FAN-OUT JOB STATUS ==========
+@events_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job_status(current_user, job_id):
+    """Progress of a background job started by the current user (e.g. fanout_job_id, image uploads)"""
+    job = background_jobs.get(job_id)
+    if not job or job.owner_id != current_user.user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
+
+
 # ========== UPDATE EVENT ==========
 @events_bp.route('/<event_id>', methods=['PUT'])
 @token_required
-def update_event(current_user, event_id):
+def update_event(current_user, event_id, current_profile):
     """
     Update an event.
     Only event creator can update.
@@ -235,8 +531,12 @@ def update_event(current_user, event_id):
     try:
         supabase = supabase_client.client
         
-        # Check if event exists and user owns it
-        event = supabase.table('events').select('*').eq('id', event_id).execute()
+        # Ownership check and organizer lookup are independent: run them concurrently
+        results = query_pool.gather({
+            'event': lambda: supabase.table('events').select('created_by').eq('id', event_id).execute(),
+            'org_profile': lambda: supabase.table('organization_profiles').select('name').eq('user_id', current_user.user.id).execute(),
+        })
+        event = results['event']
         
         if not event.data:
             return jsonify({'error': 'Event not found'}), 404
@@ -256,11 +556,10 @@ def update_event(current_user, event_id):
                 update_data[field] = data[field]
         
         # Always update organizer info from organization profile
-        org_profile = supabase.table('organization_profiles').select('*').eq('user_id', current_user.user.id).execute()
-        user_info = supabase.table('users').select('username, profile_photo_url').eq('id', current_user.user.id).execute()
+        org_profile = results['org_profile']
         
-        organizer_name = user_info.data[0]['username'] if user_info.data else 'Unknown'
-        organizer_image_url = user_info.data[0].get('profile_photo_url') if user_info.data else None
+        organizer_name = current_profile['username'] if current_profile else 'Unknown'
+        organizer_image_url = current_profile.get('profile_photo_url') if current_profile else None
         
         # If organization profile exists, use profile name
         if org_profile.data:
@@ -274,12 +573,16 @@ def update_event(current_user, event_id):
         
         # Update in database
         result = supabase.table('events').update(update_data).eq('id', event_id).execute()
+        response_cache.invalidate('events', event_tag(event_id))
+        search_index.add(result.data[0])
         
         return jsonify({
             'message': 'Event updated successfully',
             'event': result.data[0]
         }), 200
         
+    except QueryTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -295,7 +598,7 @@ def delete_event(current_user, event_id):
         supabase = supabase_client.client
         
         # Check ownership
-        event = supabase.table('events').select('*').eq('id', event_id).execute()
+        event = supabase.table('events').select('created_by').eq('id', event_id).execute()
         
         if not event.data:
             return jsonify({'error': 'Event not found'}), 404
@@ -303,8 +606,22 @@ def delete_event(current_user, event_id):
         if event.data[0]['created_by'] != current_user.user.id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Delete (cascade will handle participants, registrations, favorites)
+        from app.routes.notifications import unread_notifications_by_user, publish_removed_unread
+        
+        # The cascade also deletes the notifications about the event: note whose
+        # unread counts it lowers (the counter trigger updates the table)
+        removed_unread = unread_notifications_by_user(supabase, event_id)
+        
+        # Delete (cascade will handle participants, registrations, favorites, notifications)
         supabase.table('events').delete().eq('id', event_id).execute()
+        response_cache.invalidate('events', event_tag(event_id))
+        search_index.remove(event_id)
+        
+        if removed_unread:
+            try:
+                publish_removed_unread(supabase, removed_unread)
+            except Exception as e:
+                logger.error(f'Error publishing unread counts after deleting event {event_id}: {e}')
         
         return jsonify({'message': 'Event deleted successfully'}), 200
         
@@ -334,9 +651,7 @@ def join_event(current_user, event_id):
         }).execute()
         
         # Increment attendees count
-        event = supabase.table('events').select('attendees_count').eq('id', event_id).execute()
-        new_count = event.data[0]['attendees_count'] + 1
-        supabase.table('events').update({'attendees_count': new_count}).eq('id', event_id).execute()
+        adjust_attendees_count(supabase, event_id, 1)
         
         return jsonify({'message': 'Joined event successfully'}), 200
         
@@ -356,9 +671,7 @@ def leave_event(current_user, event_id):
         
         if result.data:
             # Decrement count
-            event = supabase.table('events').select('attendees_count').eq('id', event_id).execute()
-            new_count = max(0, event.data[0]['attendees_count'] - 1)
-            supabase.table('events').update({'attendees_count': new_count}).eq('id', event_id).execute()
+            adjust_attendees_count(supabase, event_id, -len(result.data))
         
         return jsonify({'message': 'Left event successfully'}), 200
         
@@ -502,7 +815,10 @@ def get_registration_status(current_user, event_id):
 @events_bp.route('/<event_id>/registrations', methods=['GET'])
 @token_required
 def get_registrations(current_user, event_id):
-    """Get all registrations for an event (organizer only)"""
+    """
+    Get registrations for an event (organizer only).
+    Query params: ?limit=&cursor= ; ?all=true returns the old plain list.
+    """
     try:
         supabase = supabase_client.client
         
@@ -514,19 +830,63 @@ def get_registrations(current_user, event_id):
         if event.data[0]['created_by'] != current_user.user.id:
             return jsonify({'error': 'Unauthorized - You are not the event organizer'}), 403
         
-        # Get all registrations - order by id instead of created_at (created_at column may not exist)
-        registrations_result = supabase.table('event_registrations').select('*').eq('event_id', event_id).order('id', desc=True).execute()
+        # Order by id instead of created_at (created_at column may not exist)
+        query = supabase.table('event_registrations').select('*').eq('event_id', event_id)
+        registrations_list, next_cursor = paginate(query, ('id',))
         
-        # Handle case where registrations.data might be None
-        registrations_list = registrations_result.data if registrations_result.data else []
+        if wants_all():
+            return jsonify(registrations_list), 200
         
-        return jsonify(registrations_list), 200
+        return jsonify({'registrations': registrations_list, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def registration_decision_messages(decision, event_title, user_name=None):
+    """Notification and email texts sent to a participant when a registration is approved or rejected"""
+    user_name = user_name or 'Participant'
+    if decision == 'approve':
+        return {
+            'notification_type': 'approval',
+            'notification_title': f'Your registration for "{event_title}" has been approved!',
+            'notification_message': f'Congratulations! The organizer has approved your registration request.',
+            'email_subject': f'Registration Approved: {event_title}',
+            'email_body': f"""
+Dear {user_name},
+
+Great news! Your registration request for the event "{event_title}" has been approved by the organizer.
+
+You are now registered to attend this event. We look forward to seeing you there!
+
+Event Details:
+- Event: {event_title}
+- Date: Check event page for details
+
+Best regards,
+Event Team
+""",
+        }
+    return {
+        'notification_type': 'rejection',
+        'notification_title': f'Registration update for "{event_title}"',
+        'notification_message': f'Unfortunately, your registration request for "{event_title}" was not approved at this time.',
+        'email_subject': f'Registration Update: {event_title}',
+        'email_body': f"""
+Dear {user_name},
+
+We regret to inform you that your registration request for the event "{event_title}" has not been approved at this time.
+
+We appreciate your interest and encourage you to register for other events.
+
+Best regards,
+Event Team
+""",
+    }
+
 # ========== APPROVE REGISTRATION ==========
 @events_bp.route('/<event_id>/registrations/<registration_id>/approve', methods=['PUT'])
 @token_required
@@ -563,9 +923,7 @@ def approve_registration(current_user, event_id, registration_id):
             }).execute()
             
             # Increment attendees count
-            event_data = supabase.table('events').select('attendees_count').eq('id', event_id).execute()
-            new_count = event_data.data[0]['attendees_count'] + 1
-            supabase.table('events').update({'attendees_count': new_count}).eq('id', event_id).execute()
+            adjust_attendees_count(supabase, event_id, 1)
         
         # Create notification for participant (import at function level to avoid circular imports)
         from app.routes.notifications import create_notification
@@ -575,35 +933,22 @@ def approve_registration(current_user, event_id, registration_id):
         participant_email = participant.data[0]['email'] if participant.data else None
         
         event_title = event.data[0]['title']
+        messages = registration_decision_messages('approve', event_title, reg.get('user_name'))
         
         # Create in-app notification
         create_notification(
             supabase,
             participant_user_id,
-            'approval',
-            f'Your registration for "{event_title}" has been approved!',
-            f'Congratulations! The organizer has approved your registration request.',
+            messages['notification_type'],
+            messages['notification_title'],
+            messages['notification_message'],
             event_id
         )
         
         # Send email notification
         if participant_email:
             try:
-                email_body = f"""
-Dear {reg.get('user_name', 'Participant')},
-
-Great news! Your registration request for the event "{event_title}" has been approved by the organizer.
-
-You are now registered to attend this event. We look forward to seeing you there!
-
-Event Details:
-- Event: {event_title}
-- Date: Check event page for details
-
-Best regards,
-Event Team
-"""
-                send_email(participant_email, f'Registration Approved: {event_title}', email_body)
+                send_email_async(participant_email, messages['email_subject'], messages['email_body'])
             except Exception as email_error:
                 print(f'Error sending email: {email_error}')
         
@@ -642,14 +987,10 @@ def reject_registration(current_user, event_id, registration_id):
         supabase.table('event_registrations').update({'status': 'rejected'}).eq('id', registration_id).execute()
         
         # Remove from event_participants if there
-        existing = supabase.table('event_participants').select('*').eq('event_id', event_id).eq('user_id', participant_user_id).execute()
-        if existing.data:
-            supabase.table('event_participants').delete().eq('event_id', event_id).eq('user_id', participant_user_id).execute()
-            
+        removed = supabase.table('event_participants').delete().eq('event_id', event_id).eq('user_id', participant_user_id).execute()
+        if removed.data:
             # Decrement attendees count
-            event_data = supabase.table('events').select('attendees_count').eq('id', event_id).execute()
-            new_count = max(0, event_data.data[0]['attendees_count'] - 1)
-            supabase.table('events').update({'attendees_count': new_count}).eq('id', event_id).execute()
+            adjust_attendees_count(supabase, event_id, -len(removed.data))
         
         # Create notification for participant (import at function level to avoid circular imports)
         from app.routes.notifications import create_notification
@@ -659,31 +1000,22 @@ def reject_registration(current_user, event_id, registration_id):
         participant_email = participant.data[0]['email'] if participant.data else None
         
         event_title = event.data[0]['title']
+        messages = registration_decision_messages('reject', event_title, reg.get('user_name'))
         
         # Create in-app notification
         create_notification(
             supabase,
             participant_user_id,
-            'rejection',
-            f'Registration update for "{event_title}"',
-            f'Unfortunately, your registration request for "{event_title}" was not approved at this time.',
+            messages['notification_type'],
+            messages['notification_title'],
+            messages['notification_message'],
             event_id
         )
         
         # Send email notification
         if participant_email:
             try:
-                email_body = f"""
-Dear {reg.get('user_name', 'Participant')},
-
-We regret to inform you that your registration request for the event "{event_title}" has not been approved at this time.
-
-We appreciate your interest and encourage you to register for other events.
-
-Best regards,
-Event Team
-"""
-                send_email(participant_email, f'Registration Update: {event_title}', email_body)
+                send_email_async(participant_email, messages['email_subject'], messages['email_body'])
             except Exception as email_error:
                 print(f'Error sending email: {email_error}')
         
@@ -694,6 +1026,139 @@ Event Team
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def send_registration_emails(job, emails):
+    """Background delivery of (to_email, subject, body) decision emails over one SMTP session"""
+    for (to_email, _, _), error in zip(emails, send_many(emails)):
+        if error is None:
+            job.increment('emails_sent')
+        else:
+            job.add_error(f'Email to {to_email} failed: {error}')
+
+# ========== BULK APPROVE/REJECT REGISTRATIONS ==========
+@events_bp.route('/<event_id>/registrations/bulk', methods=['PUT'])
+@token_required
+def bulk_decide_registrations(current_user, event_id):
+    """
+    Approve or reject many registrations at once (organizer only).
+    
+    Request Body:
+    {
+        "registration_ids": ["...", "..."],   // at most REGISTRATION_BULK_MAX
+        "decision": "approve" | "reject"
+    }
+    
+    Response: per-id status ('approved', 'rejected', 'not_found' or
+    'invalid'), the malformed ids in 'invalid' and the id of the background
+    job sending the emails.
+    """
+    try:
+        from app.routes.notifications import build_notification, create_notifications
+        
+        data = request.get_json() or {}
+        decision = data.get('decision')
+        raw_ids = data.get('registration_ids')
+        
+        if decision not in ('approve', 'reject'):
+            return jsonify({'error': "decision must be 'approve' or 'reject'"}), 400
+        if not raw_ids:
+            return jsonify({'error': 'registration_ids is required'}), 400
+        if not isinstance(raw_ids, list) or not all(isinstance(i, str) for i in raw_ids):
+            return jsonify({'error': 'registration_ids must be a list of strings'}), 400
+        
+        registration_ids = list(dict.fromkeys(raw_ids))
+        max_ids = current_app.config.get('REGISTRATION_BULK_MAX', 500)
+        if len(registration_ids) > max_ids:
+            return jsonify({'error': f'At most {max_ids} registrations per request'}), 400
+        
+        supabase = supabase_client.client
+        
+        # Verify user is the event organizer
+        event = supabase.table('events').select('created_by, title').eq('id', event_id).execute()
+        if not event.data:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        if event.data[0]['created_by'] != current_user.user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        event_title = event.data[0]['title']
+        status = 'approved' if decision == 'approve' else 'rejected'
+        
+        # Malformed ids are reported instead of failing the whole in_ query
+        valid_ids = [registration_id for registration_id in registration_ids if is_uuid(registration_id)]
+        invalid_ids = [registration_id for registration_id in registration_ids if registration_id not in valid_ids]
+        results = {registration_id: 'not_found' if registration_id in valid_ids else 'invalid' for registration_id in registration_ids}
+        
+        # in_() lists go into the URL: every lookup/write below runs per chunk of ids
+        registrations = []
+        for ids in in_chunks(valid_ids):
+            registrations.extend(supabase.table('event_registrations').select('id, user_id, user_name').eq('event_id', event_id).in_('id', ids).execute().data or [])
+        if not registrations:
+            return jsonify({'results': results, 'invalid': invalid_ids, 'email_job_id': None}), 200
+        
+        found_ids = [r['id'] for r in registrations]
+        user_ids = list(dict.fromkeys(r['user_id'] for r in registrations))
+        
+        for ids in in_chunks(found_ids):
+            supabase.table('event_registrations').update({'status': status}).in_('id', ids).execute()
+        
+        # Participants: one INSERT of the missing rows or the DELETEs, then a single count adjustment
+        if decision == 'approve':
+            existing_ids = set()
+            for ids in in_chunks(user_ids):
+                existing = supabase.table('event_participants').select('user_id').eq('event_id', event_id).in_('user_id', ids).execute()
+                existing_ids.update(p['user_id'] for p in existing.data or [])
+            new_rows = [{'event_id': event_id, 'user_id': user_id} for user_id in user_ids if user_id not in existing_ids]
+            if new_rows:
+                supabase.table('event_participants').insert(new_rows).execute()
+                adjust_attendees_count(supabase, event_id, len(new_rows))
+        else:
+            removed = 0
+            for ids in in_chunks(user_ids):
+                removed += len(supabase.table('event_participants').delete().eq('event_id', event_id).in_('user_id', ids).execute().data or [])
+            if removed:
+                adjust_attendees_count(supabase, event_id, -removed)
+        
+        for registration_id in found_ids:
+            results[registration_id] = status
+        
+        # One batched notification insert
+        names = {r['user_id']: r.get('user_name') for r in registrations}
+        messages = {user_id: registration_decision_messages(decision, event_title, names[user_id]) for user_id in user_ids}
+        notifications = [
+            build_notification(
+                user_id,
+                messages[user_id]['notification_type'],
+                messages[user_id]['notification_title'],
+                messages[user_id]['notification_message'],
+                event_id
+            )
+            for user_id in user_ids
+        ]
+        for _, error in create_notifications(supabase, notifications):
+            if error:
+                logger.error(f'Error creating registration notifications: {error}')
+        
+        # Emails are queued on one background job
+        job = None
+        try:
+            users = []
+            for ids in in_chunks(user_ids):
+                users.extend(supabase.table('users').select('id, email').in_('id', ids).execute().data or [])
+            emails = [
+                (u['email'], messages[u['id']]['email_subject'], messages[u['id']]['email_body'])
+                for u in users if u.get('email')
+            ]
+            if emails:
+                job = background_jobs.submit('registration_emails', send_registration_emails, emails, owner_id=current_user.user.id)
+        except Exception as email_error:
+            logger.error(f'Error queueing registration emails: {email_error}')
+        
+        return jsonify({'results': results, 'invalid': invalid_ids, 'email_job_id': job.id if job else None}), 200
+        
+    except Exception as e:
+        logger.exception(f'Bulk registration decision for event {event_id} failed')
+        return jsonify({'error': str(e)}), 500
+
 # ========== GET APPROVED COUNT ==========
 @events_bp.route('/<event_id>/approved-count', methods=['GET'])
 def get_approved_count(event_id):
@@ -712,6 +1177,7 @@ def get_approved_count(event_id):
 
 # ========== GET POPULAR EVENTS ==========
 @events_bp.route('/popular', methods=['GET'])
+@response_cache.cached('events', COUNTS_TAG)
 def get_popular_events():
     """
     Get popular events (sorted by attendees).
@@ -721,15 +1187,18 @@ def get_popular_events():
         limit = request.args.get('limit', 4, type=int)
         supabase = supabase_client.client
         
-        result = supabase.table('events').select('*').order('attendees_count', desc=True).limit(limit).execute()
+        events = query_popular_events(supabase, limit, event_columns())
         
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET UPCOMING EVENTS ==========
 @events_bp.route('/upcoming', methods=['GET'])
+@response_cache.cached('events', COUNTS_TAG)
 def get_upcoming_events():
     """
     Get upcoming events.
@@ -740,186 +1209,154 @@ def get_upcoming_events():
         categories = request.args.getlist('categories')
         
         supabase = supabase_client.client
-        now = datetime.now().isoformat()
-        
-        query = supabase.table('events').select('*').gte('event_date_time', now)
         
-        if categories:
-            query = query.in_('category', categories)
+        events = query_upcoming_events(supabase, limit, event_columns(), categories)
         
-        result = query.order('event_date_time').limit(limit).execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET MY EVENTS ==========
 @events_bp.route('/my-events', methods=['GET'])
 @token_required
+@conditional
 def get_my_events(current_user):
-    """Get events created by current user"""
+    """Get events created by current user (paginated: ?limit=&cursor=)"""
     try:
         supabase = supabase_client.client
-        result = supabase.table('events').select('*').eq('created_by', current_user.user.id).order('created_at', desc=True).execute()
+        query = supabase.table('events').select(event_columns(required=('created_at',))).eq('created_by', current_user.user.id)
+        events, next_cursor = paginate(query, ('created_at', 'id'))
         
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET MY EVENTS UPCOMING ==========
 @events_bp.route('/my-events/upcoming', methods=['GET'])
 @token_required
+@conditional
 def get_my_events_upcoming(current_user):
-    """Get upcoming events joined by participant"""
+    """Get upcoming events joined by participant, soonest first (paginated: ?limit=&cursor=)"""
     try:
         supabase = supabase_client.client
         now = datetime.now().isoformat()
         
-        # Get event IDs user has joined
-        participants = supabase.table('event_participants').select('event_id').eq('user_id', current_user.user.id).execute()
-        
-        if not participants.data:
-            return jsonify({'events': []}), 200
+        query = query_user_events(supabase, current_user.user.id, event_columns(required=('event_date_time',))).gte('event_date_time', now)
+        events, next_cursor = paginate(query, ('event_date_time', 'id'), desc=False)
         
-        event_ids = [p['event_id'] for p in participants.data]
-        
-        # Get upcoming events
-        result = supabase.table('events').select('*').in_('id', event_ids).gte('event_date_time', now).order('event_date_time').execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET MY EVENTS PAST ==========
 @events_bp.route('/my-events/past', methods=['GET'])
 @token_required
+@conditional
 def get_my_events_past(current_user):
-    """Get past events joined by participant"""
+    """Get past events joined by participant, most recent first (paginated: ?limit=&cursor=)"""
     try:
         supabase = supabase_client.client
         now = datetime.now().isoformat()
         
-        # Get event IDs user has joined
-        participants = supabase.table('event_participants').select('event_id').eq('user_id', current_user.user.id).execute()
-        
-        if not participants.data:
-            return jsonify({'events': []}), 200
+        query = query_user_events(supabase, current_user.user.id, event_columns(required=('event_date_time',))).lt('event_date_time', now)
+        events, next_cursor = paginate(query, ('event_date_time', 'id'))
         
-        event_ids = [p['event_id'] for p in participants.data]
-        
-        # Get past events
-        result = supabase.table('events').select('*').in_('id', event_ids).lt('event_date_time', now).order('event_date_time', desc=True).execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET ORGANIZED EVENTS UPCOMING ==========
 @events_bp.route('/organized/upcoming', methods=['GET'])
 @token_required
+@conditional
 def get_organized_upcoming(current_user):
-    """Get upcoming events created OR joined by current user (organization)"""
+    """Get upcoming events created OR joined by current user (organization), paginated: ?limit=&cursor="""
     try:
         supabase = supabase_client.client
         now = datetime.now().isoformat()
         
-        # Get events created by user
-        created = supabase.table('events').select('*').eq('created_by', current_user.user.id).gte('event_date_time', now).execute()
-        created_ids = [e['id'] for e in created.data] if created.data else []
-        
-        # Get events joined by user
-        participants = supabase.table('event_participants').select('event_id').eq('user_id', current_user.user.id).execute()
-        joined_ids = [p['event_id'] for p in participants.data] if participants.data else []
-        
-        # Combine and get unique event IDs
-        all_event_ids = list(set(created_ids + joined_ids))
+        query = query_user_events(supabase, current_user.user.id, event_columns(required=('event_date_time',)), include_created=True).gte('event_date_time', now)
+        events, next_cursor = paginate(query, ('event_date_time', 'id'), desc=False)
         
-        if not all_event_ids:
-            return jsonify({'events': []}), 200
-        
-        # Get all upcoming events
-        result = supabase.table('events').select('*').in_('id', all_event_ids).gte('event_date_time', now).order('event_date_time').execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET ORGANIZED EVENTS PAST ==========
 @events_bp.route('/organized/past', methods=['GET'])
 @token_required
+@conditional
 def get_organized_past(current_user):
-    """Get past events created OR joined by current user (organization)"""
+    """Get past events created OR joined by current user (organization), paginated: ?limit=&cursor="""
     try:
         supabase = supabase_client.client
         now = datetime.now().isoformat()
         
-        # Get events created by user
-        created = supabase.table('events').select('*').eq('created_by', current_user.user.id).lt('event_date_time', now).execute()
-        created_ids = [e['id'] for e in created.data] if created.data else []
-        
-        # Get events joined by user
-        participants = supabase.table('event_participants').select('event_id').eq('user_id', current_user.user.id).execute()
-        joined_ids = [p['event_id'] for p in participants.data] if participants.data else []
+        query = query_user_events(supabase, current_user.user.id, event_columns(required=('event_date_time',)), include_created=True).lt('event_date_time', now)
+        events, next_cursor = paginate(query, ('event_date_time', 'id'))
         
-        # Combine and get unique event IDs
-        all_event_ids = list(set(created_ids + joined_ids))
-        
-        if not all_event_ids:
-            return jsonify({'events': []}), 200
-        
-        # Get all past events
-        result = supabase.table('events').select('*').in_('id', all_event_ids).lt('event_date_time', now).order('event_date_time', desc=True).execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET JOINED EVENTS ==========
 @events_bp.route('/joined-events', methods=['GET'])
 @token_required
+@conditional
 def get_joined_events(current_user):
-    """Get events user has joined"""
+    """Get events user has joined (paginated: ?limit=&cursor=)"""
     try:
         supabase = supabase_client.client
         
-        # Get event IDs user has joined
-        participants = supabase.table('event_participants').select('event_id').eq('user_id', current_user.user.id).execute()
-        
-        if not participants.data:
-            return jsonify({'events': []}), 200
+        query = query_user_events(supabase, current_user.user.id, event_columns(required=('created_at',)))
+        events, next_cursor = paginate(query, ('created_at', 'id'))
         
-        event_ids = [p['event_id'] for p in participants.data]
-        
-        # Get events
-        result = supabase.table('events').select('*').in_('id', event_ids).execute()
-        
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ========== GET RECOMMENDED EVENTS ==========
 @events_bp.route('/recommended', methods=['GET'])
-def get_recommended_events():
+@token_optional
+def get_recommended_events(current_user):
     """
     Get recommended events.
     Query param: ?limit=4
-    For now, returns upcoming events sorted by attendees count.
+    Signed-in users get upcoming events ranked for them (selected categories,
+    followed organizers, favorites); anonymous requests get the global
+    ranking (recent popularity and closeness in time).
     """
     try:
         limit = request.args.get('limit', 4, type=int)
         supabase = supabase_client.client
-        now = datetime.now().isoformat()
+        user_id = current_user.user.id if current_user else None
         
-        result = supabase.table('events').select('*').gte('event_date_time', now).order('attendees_count', desc=True).limit(limit).execute()
+        events = query_personal_recommendations(supabase, user_id, limit, event_columns())
         
-        return jsonify({'events': result.data}), 200
+        return jsonify({'events': events}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
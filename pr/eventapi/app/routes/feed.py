@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.utils.supabase_client import supabase_client
+from app.utils.decorators import token_required
+from app.utils.projection import event_columns
+from app.utils.pagination import InvalidQueryParam
+from app.utils.concurrency import query_pool
+from app.routes.events import query_popular_events, query_upcoming_events, query_personal_recommendations
+from app.routes.users import query_favorite_events
+from app.routes.notifications import count_unread_notifications
+
+feed_bp = Blueprint('feed', __name__, url_prefix='/api/feed')
+
+FEED_SECTIONS = ('popular', 'upcoming', 'recommended', 'favorites')
+
+def section_limit(name, default=4):
+    maximum = current_app.config.get('PAGE_SIZE_MAX', 100)
+    limit = request.args.get(f'{name}_limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+# ========== HOME FEED ==========
+@feed_bp.route('/home', methods=['GET'])
+@token_required
+def get_home_feed(current_user, current_profile):
+    """
+    Everything the home screen needs in one round-trip.
+    Query params: ?popular_limit=4&upcoming_limit=4&recommended_limit=4
+                  &favorites_limit=4&categories=Music,Sport&fields=...
+    Sections are queried concurrently; a section that fails or times out
+    is returned as null and its error is listed under 'errors'.
+    """
+    try:
+        supabase = supabase_client.client
+        user_id = current_user.user.id
+        # request.args is not available on the pool threads: resolve it here
+        columns = event_columns()
+        limits = {name: section_limit(name) for name in FEED_SECTIONS}
+        
+        categories = request.args.get('categories')
+        if categories:
+            categories = categories.split(',')
+        elif current_profile:
+            categories = current_profile.get('selected_categories') or None
+        
+        results, errors = query_pool.run_all({
+            'popular': lambda: query_popular_events(supabase, limits['popular'], columns),
+            'upcoming': lambda: query_upcoming_events(supabase, limits['upcoming'], columns, categories),
+            'recommended': lambda: query_personal_recommendations(supabase, user_id, limits['recommended'], columns),
+            'favorites': lambda: query_favorite_events(supabase, user_id, columns, limits['favorites']),
+            'unread_count': lambda: count_unread_notifications(supabase, user_id),
+        }, timeout=current_app.config.get('FEED_TIMEOUT_SECONDS', 5))
+        
+        feed = {name: results.get(name) for name in FEED_SECTIONS + ('unread_count',)}
+        feed['errors'] = errors
+        
+        return jsonify(feed), 200
+        
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
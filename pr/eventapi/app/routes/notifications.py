@@ -1,46 +1,122 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from app.utils.supabase_client import supabase_client
 from app.utils.decorators import token_required
+from app.utils.pagination import paginate, wants_all, InvalidQueryParam
+from app.utils.unread_counts import unread_counter
+from app.utils.notification_broker import notification_broker
+from collections import Counter
 from datetime import datetime
+import json
+import time
 
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
+def build_notification(user_id, notif_type, title, message, related_id=None):
+    """Row for the notifications table (created_at is generated by the database)"""
+    return {
+        'user_id': user_id,
+        'type': notif_type,
+        'title': title,
+        'message': message,
+        'related_id': related_id,
+        'is_read': False
+    }
+
 def create_notification(supabase, user_id, notif_type, title, message, related_id=None):
     """Helper function to create a notification"""
     try:
-        # Build notification data (don't include created_at if it's auto-generated)
-        notification_data = {
-            'user_id': user_id,
-            'type': notif_type,
-            'title': title,
-            'message': message,
-            'related_id': related_id,
-            'is_read': False
-        }
-        # Only include created_at if the column exists (Supabase often auto-generates timestamps)
-        # notification_data['created_at'] = datetime.utcnow().isoformat()
+        notification_data = build_notification(user_id, notif_type, title, message, related_id)
         
         notification = supabase.table('notifications').insert(notification_data).execute()
+        if notification.data:
+            unread_counter.adjust(user_id, 1)
+            notification_broker.publish(user_id, 'notification', notification.data[0])
+            publish_unread_count(supabase, user_id)
         return notification.data[0] if notification.data else None
     except Exception as e:
         print(f'Error creating notification: {e}')
         return None
 
+def create_notifications(supabase, notifications, chunk_size=500):
+    """
+    Insert many notification rows with one multi-row INSERT per chunk.
+    Yields (inserted_rows, error) per chunk so callers can report progress;
+    a failed chunk does not stop the following ones.
+    """
+    for start in range(0, len(notifications), chunk_size):
+        chunk = notifications[start:start + chunk_size]
+        try:
+            result = supabase.table('notifications').insert(chunk).execute()
+            rows = result.data or []
+            for row in rows:
+                unread_counter.adjust(row['user_id'], 1)
+            counts = unread_counter.get_many(supabase, [row['user_id'] for row in rows]) if rows else {}
+            notification_broker.publish_many(
+                [(row['user_id'], 'notification', row) for row in rows]
+                + [(user_id, 'unread_count', {'count': count}) for user_id, count in counts.items()]
+            )
+            yield result.data or [], None
+        except Exception as e:
+            yield [], f'{len(chunk)} notifications not inserted: {e}'
+
+def unread_notifications_by_user(supabase, related_id, page_size=1000):
+    """{user_id: number of unread notifications about `related_id`}, read in id order page by page"""
+    counts = Counter()
+    last_id = None
+    while True:
+        query = (
+            supabase.table('notifications').select('id,user_id')
+            .eq('related_id', related_id).eq('is_read', False)
+            .order('id').limit(page_size)
+        )
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        rows = query.execute().data or []
+        counts.update(row['user_id'] for row in rows)
+        if len(rows) < page_size:
+            return counts
+        last_id = rows[-1]['id']
+
+def publish_removed_unread(supabase, removed):
+    """
+    Update and push the unread counts after notifications were deleted
+    outside the notification routes (e.g. by a cascade).
+    `removed` maps user ids to the number of unread notifications they lost.
+    """
+    for user_id, count in removed.items():
+        unread_counter.adjust(user_id, -count)
+    counts = unread_counter.get_many(supabase, list(removed))
+    notification_broker.publish_many([(user_id, 'unread_count', {'count': count}) for user_id, count in counts.items()])
+
+def count_unread_notifications(supabase, user_id):
+    """Number of unread notifications of a user (counter lookup, see UnreadCounter)"""
+    return unread_counter.get(supabase, user_id)
+
+def publish_unread_count(supabase, user_id):
+    """Push the new unread count to the user's open streams"""
+    notification_broker.publish(user_id, 'unread_count', {'count': count_unread_notifications(supabase, user_id)})
+
 # ========== GET ALL NOTIFICATIONS ==========
 @notifications_bp.route('/', methods=['GET'])
 @token_required
 def get_notifications(current_user):
-    """Get all notifications for current user"""
+    """
+    Get notifications for current user, newest first.
+    Query params: ?limit=&cursor= ; ?all=true returns the old plain list.
+    """
     try:
         supabase = supabase_client.client
         
-        # Order by id instead of created_at (since created_at column may not exist)
-        notifications_result = supabase.table('notifications').select('*').eq('user_id', current_user.user.id).order('id', desc=True).execute()
+        query = supabase.table('notifications').select('*').eq('user_id', current_user.user.id)
+        notifications_list, next_cursor = paginate(query, ('created_at', 'id'))
         
-        notifications_list = notifications_result.data if notifications_result.data else []
+        if wants_all():
+            return jsonify(notifications_list), 200
         
-        return jsonify(notifications_list), 200
+        return jsonify({'notifications': notifications_list, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -60,8 +136,11 @@ def mark_as_read(current_user, notification_id):
         if notification.data[0]['user_id'] != current_user.user.id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Update
-        supabase.table('notifications').update({'is_read': True}).eq('id', notification_id).execute()
+        # Update; only a notification that was unread comes back
+        result = supabase.table('notifications').update({'is_read': True}).eq('id', notification_id).eq('is_read', False).execute()
+        if result.data:
+            unread_counter.adjust(current_user.user.id, -1)
+            publish_unread_count(supabase, current_user.user.id)
         
         return jsonify({'message': 'Notification marked as read'}), 200
         
@@ -84,7 +163,10 @@ def delete_notification(current_user, notification_id):
         if notification.data[0]['user_id'] != current_user.user.id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        supabase.table('notifications').delete().eq('id', notification_id).execute()
+        result = supabase.table('notifications').delete().eq('id', notification_id).execute()
+        if result.data and not result.data[0].get('is_read'):
+            unread_counter.adjust(current_user.user.id, -1)
+            publish_unread_count(supabase, current_user.user.id)
         
         return jsonify({'message': 'Notification deleted'}), 200
         
@@ -100,6 +182,8 @@ def delete_all_notifications(current_user):
         supabase = supabase_client.client
         
         supabase.table('notifications').delete().eq('user_id', current_user.user.id).execute()
+        unread_counter.reset(current_user.user.id)
+        notification_broker.publish(current_user.user.id, 'unread_count', {'count': 0})
         
         return jsonify({'message': 'All notifications deleted'}), 200
         
@@ -114,12 +198,74 @@ def get_unread_count(current_user):
     try:
         supabase = supabase_client.client
         
-        result = supabase.table('notifications').select('id', count='exact').eq('user_id', current_user.user.id).eq('is_read', False).execute()
-        
-        count = result.count if hasattr(result, 'count') else len(result.data) if result.data else 0
+        count = count_unread_notifications(supabase, current_user.user.id)
         
         return jsonify({'count': count}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ========== NOTIFICATION STREAM ==========
+def sse_message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+def streams_supported():
+    """True when running under gevent (sockets patched), e.g. the gunicorn gevent worker"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+@notifications_bp.route('/stream', methods=['GET'])
+@token_required
+def stream_notifications(current_user):
+    """
+    Server-Sent Events stream replacing the polling of / and /unread-count.
+    Events:
+      unread_count  {"count": 3}   on connect and whenever it changes
+      notification  {...}          a new notification row
+      resync        {}             messages were dropped: refetch over REST
+    A comment line is sent every NOTIFICATION_STREAM_HEARTBEAT_SECONDS; the
+    stream ends after NOTIFICATION_STREAM_MAX_SECONDS and the client reconnects.
+    Answers 503 unless the server runs gevent workers (see gunicorn.conf.py).
+    """
+    # An open stream holds its worker thread; only cooperative (gevent) workers can afford that
+    if not streams_supported():
+        return jsonify({'error': 'Notification streams are not available on this server, poll /unread-count'}), 503
+    
+    try:
+        supabase = supabase_client.client
+        user_id = current_user.user.id
+        count = count_unread_notifications(supabase, user_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    heartbeat = current_app.config.get('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+    max_seconds = current_app.config.get('NOTIFICATION_STREAM_MAX_SECONDS', 300)
+    subscription = notification_broker.subscribe(user_id)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n' + sse_message('unread_count', {'count': count})
+            
+            deadline = time.monotonic() + max_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                
+                message = subscription.get(timeout=min(heartbeat, remaining))
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield sse_message('resync', {})
+                
+                # A write to a closed connection ends the generator (and the subscription)
+                yield sse_message(*message) if message else ': keepalive\n\n'
+        finally:
+            notification_broker.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import supabase_client
 from app.utils.decorators import token_required
+from app.utils.user_cache import user_profile_cache
+from app.utils.recommendations import recommender
+from app.utils.pagination import paginate, InvalidQueryParam
+from app.utils.projection import event_columns, EVENT_SUMMARY_FIELDS
+from app.utils.etag import conditional
+from app.utils.concurrency import query_pool, QueryTimeout
 from app.routes.notifications import create_notification
 
 organizations_bp = Blueprint('organizations', __name__, url_prefix='/api/organizations')
@@ -8,24 +14,32 @@ organizations_bp = Blueprint('organizations', __name__, url_prefix='/api/organiz
 # ========== GET ORGANIZATION PROFILE ==========
 @organizations_bp.route('/<organization_id>/profile', methods=['GET'])
 @token_required
+@conditional
 def get_organization_profile(current_user, organization_id):
     """Get organization profile by user_id. Creates basic profile if doesn't exist."""
     try:
         supabase = supabase_client.client
         
-        # Get user info first
-        user = supabase.table('users').select('id, username, email, profile_photo_url, role').eq('id', organization_id).execute()
-        if not user.data:
-            return jsonify({'error': 'Organization not found'}), 404
+        is_self = current_user.user.id == organization_id
+        
+        # The lookups are independent: run them concurrently
+        results = query_pool.gather({
+            'user': lambda: user_profile_cache.get(organization_id),
+            'profile': lambda: supabase.table('organization_profiles').select('*').eq('user_id', organization_id).execute(),
+            'follow': lambda: None if is_self else supabase.table('organization_follows').select('id').eq('follower_id', current_user.user.id).eq('organization_id', organization_id).execute(),
+            'followers': lambda: supabase.table('organization_follows').select('id', count='exact').eq('organization_id', organization_id).execute(),
+            'events': lambda: supabase.table('events').select(','.join(EVENT_SUMMARY_FIELDS)).eq('created_by', organization_id).order('created_at', desc=True).limit(10).execute(),
+        })
         
-        user_data = user.data[0]
+        user_data = results['user']
+        if not user_data:
+            return jsonify({'error': 'Organization not found'}), 404
         
         # Check if role is organization
         if user_data.get('role') != 'organization':
             return jsonify({'error': 'User is not an organization'}), 403
         
-        # Get organization profile (may not exist)
-        profile = supabase.table('organization_profiles').select('*').eq('user_id', organization_id).execute()
+        profile = results['profile']
         
         # If profile doesn't exist, create a basic one with just the username
         if not profile.data:
@@ -40,17 +54,13 @@ def get_organization_profile(current_user, organization_id):
             profile_data = profile.data[0]
         
         # Check if current user follows this organization
-        is_following = False
-        if current_user.user.id != organization_id:
-            follow = supabase.table('organization_follows').select('*').eq('follower_id', current_user.user.id).eq('organization_id', organization_id).execute()
-            is_following = len(follow.data) > 0
+        follow = results['follow']
+        is_following = follow is not None and len(follow.data) > 0
         
-        # Get follower count
-        followers = supabase.table('organization_follows').select('id', count='exact').eq('organization_id', organization_id).execute()
+        followers = results['followers']
         follower_count = followers.count if hasattr(followers, 'count') else len(followers.data) if followers.data else 0
         
-        # Get events created by this organization
-        events = supabase.table('events').select('*').eq('created_by', organization_id).order('created_at', desc=True).limit(10).execute()
+        events = results['events']
         
         return jsonify({
             'profile': {
@@ -63,6 +73,8 @@ def get_organization_profile(current_user, organization_id):
             'events': events.data or []
         }), 200
         
+    except QueryTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -71,14 +83,13 @@ def get_organization_profile(current_user, organization_id):
 # ========== CREATE/UPDATE ORGANIZATION PROFILE ==========
 @organizations_bp.route('/profile', methods=['POST', 'PUT'])
 @token_required
-def create_update_organization_profile(current_user):
+def create_update_organization_profile(current_user, current_profile):
     """Create or update organization profile"""
     try:
         # Check if user is an organization
         supabase = supabase_client.client
-        user = supabase.table('users').select('role').eq('id', current_user.user.id).execute()
         
-        if not user.data or user.data[0]['role'] != 'organization':
+        if not current_profile or current_profile['role'] != 'organization':
             return jsonify({'error': 'Only organizations can create profiles'}), 403
         
         data = request.get_json()
@@ -128,11 +139,11 @@ def follow_organization(current_user, organization_id):
         supabase = supabase_client.client
         
         # Check if organization exists and is actually an organization
-        org_user = supabase.table('users').select('role').eq('id', organization_id).execute()
-        if not org_user.data:
+        org_user = user_profile_cache.get(organization_id)
+        if not org_user:
             return jsonify({'error': 'Organization not found'}), 404
         
-        if org_user.data[0]['role'] != 'organization':
+        if org_user['role'] != 'organization':
             return jsonify({'error': 'User is not an organization'}), 400
         
         if current_user.user.id == organization_id:
@@ -152,6 +163,7 @@ def follow_organization(current_user, organization_id):
             'follower_id': current_user.user.id,
             'organization_id': organization_id
         }).execute()
+        recommender.invalidate(current_user.user.id)
 
         # Return updated follower count
         followers = supabase.table('organization_follows').select('id', count='exact').eq('organization_id', organization_id).execute()
@@ -176,6 +188,7 @@ def unfollow_organization(current_user, organization_id):
         
         # Remove follow
         supabase.table('organization_follows').delete().eq('follower_id', current_user.user.id).eq('organization_id', organization_id).execute()
+        recommender.invalidate(current_user.user.id)
 
         # Return updated follower count
         followers = supabase.table('organization_follows').select('id', count='exact').eq('organization_id', organization_id).execute()
@@ -253,15 +266,19 @@ def get_followed_organizations(current_user):
 # ========== GET ORGANIZATION EVENTS ==========
 @organizations_bp.route('/<organization_id>/events', methods=['GET'])
 @token_required
+@conditional
 def get_organization_events(current_user, organization_id):
-    """Get all events created by an organization"""
+    """Get events created by an organization (paginated: ?limit=&cursor=)"""
     try:
         supabase = supabase_client.client
         
-        events = supabase.table('events').select('*').eq('created_by', organization_id).order('created_at', desc=True).execute()
+        query = supabase.table('events').select(event_columns(required=('created_at',))).eq('created_by', organization_id)
+        events, next_cursor = paginate(query, ('created_at', 'id'))
         
-        return jsonify({'events': events.data or []}), 200
+        return jsonify({'events': events, 'next_cursor': next_cursor}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2,6 +2,13 @@
 from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import supabase_client
 from app.utils.decorators import token_required
+from app.utils.user_cache import user_profile_cache
+from app.utils.recommendations import recommender
+from app.utils.projection import event_columns
+from app.utils.pagination import InvalidQueryParam
+from app.utils.code_store import verification_code_store, CODE_OK, CODE_ERRORS
+from app.utils.rate_limit import rate_limiter, by_user
+from app.utils.images import store_image, create_upload_url, submit_upload, InvalidImage, UploadNotFound
 import re
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
@@ -10,6 +17,26 @@ def validate_username(username):
     pattern = r'^[a-zA-Z0-9_]{3,20}'
     return re.match(pattern, username) is not None
 
+def query_favorite_events(supabase, user_id, columns, limit=None):
+    """Events the user marked as favorite, most recently added first"""
+    favorites = (
+        supabase.table('favorites').select('event_id').eq('user_id', user_id)
+        .order('created_at', desc=True).order('event_id', desc=True)
+    )
+    if limit:
+        favorites = favorites.limit(limit)
+    favorites = favorites.execute()
+    
+    if not favorites.data:
+        return []
+    
+    event_ids = [f['event_id'] for f in favorites.data]
+    events = supabase.table('events').select(columns).in_('id', event_ids).execute().data or []
+    
+    # in_() returns rows in table order: put them back in favorite order
+    position = {event_id: i for i, event_id in enumerate(event_ids)}
+    return sorted(events, key=lambda event: position.get(event.get('id'), len(position)))
+
 # ========== GET USER BY ID ==========
 @users_bp.route('/<user_id>', methods=['GET'])
 @token_required
@@ -59,6 +86,7 @@ def update_username(current_user):
         
         # Update username
         result = supabase.table('users').update({'username': username.lower()}).eq('id', current_user.user.id).execute()
+        user_profile_cache.invalidate(current_user.user.id)
         
         return jsonify({
             'message': 'Username updated successfully',
@@ -72,7 +100,11 @@ def update_username(current_user):
 @users_bp.route('/profile/photo/upload', methods=['POST'])
 @token_required
 def upload_profile_photo(current_user):
-    """Upload profile photo to Supabase storage"""
+    """
+    Upload profile photo to Supabase storage.
+    Stored as thumb/card/full variants under the image's content hash;
+    the profile keeps the full one.
+    """
     try:
         if 'photo' not in request.files:
             return jsonify({'error': 'No photo file provided'}), 400
@@ -81,49 +113,26 @@ def upload_profile_photo(current_user):
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        from werkzeug.utils import secure_filename
-        import uuid
-        filename = secure_filename(file.filename)
-        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        
-        if file_ext not in allowed_extensions:
-            return jsonify({'error': f'Invalid file type. Allowed: {", ".join(allowed_extensions)}'}), 400
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = f"profiles/{current_user.user.id}/{unique_filename}"
-        
         supabase = supabase_client.client
         
-        # Read file content
-        file_content = file.read()
-        
-        # Determine content type
-        content_type = f'image/{file_ext}' if file_ext != 'jpg' else 'image/jpeg'
-        
-        # Upload to Supabase storage
+        # Validate, resize and upload (skipped when this image is already stored)
         try:
-            # Upload to profiles bucket
-            response = supabase.storage.from_('profiles').upload(
-                file_path,
-                file_content,
-                file_options={'content-type': content_type, 'upsert': 'true'}
-            )
-            
-            # Get public URL
-            public_url = supabase.storage.from_('profiles').get_public_url(file_path)
+            urls, _ = store_image(supabase, 'profiles', f'profiles/{current_user.user.id}', file.read())
+            public_url = urls['full']
             
             # Update user profile with new photo URL
             result = supabase.table('users').update({'profile_photo_url': public_url}).eq('id', current_user.user.id).execute()
+            user_profile_cache.invalidate(current_user.user.id)
             
             return jsonify({
                 'message': 'Profile photo uploaded successfully',
                 'url': public_url,
+                'urls': urls,
                 'user': result.data[0] if result.data else None
             }), 200
             
+        except InvalidImage as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as storage_error:
             print(f'Storage upload error: {storage_error}')
             return jsonify({'error': f'Failed to upload photo: {str(storage_error)}'}), 500
@@ -133,6 +142,57 @@ def upload_profile_photo(current_user):
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# ========== DIRECT PROFILE PHOTO UPLOAD ==========
+@users_bp.route('/profile/photo/upload-url', methods=['POST'])
+@token_required
+def create_photo_upload_url(current_user):
+    """
+    Signed URL to upload a profile photo straight to storage.
+    Call /profile/photo/finalize with the returned path once uploaded.
+    """
+    try:
+        supabase = supabase_client.client
+        upload = create_upload_url(supabase, 'profiles', f'profiles/{current_user.user.id}')
+        return jsonify(upload), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@users_bp.route('/profile/photo/finalize', methods=['POST'])
+@token_required
+def finalize_photo_upload(current_user):
+    """
+    Process a photo uploaded through a signed URL and set it as profile
+    photo, on a background job.
+    Request Body: {"path": "..."}
+    Answers 202 with job_id; GET /api/events/jobs/<job_id> holds the url
+    and urls in job.result once job.status is "done".
+    """
+    try:
+        data = request.get_json() or {}
+        path = data.get('path', '')
+        user_id = current_user.user.id
+        
+        supabase = supabase_client.client
+        
+        def save_photo(urls):
+            # Update user profile with new photo URL
+            supabase.table('users').update({'profile_photo_url': urls['full']}).eq('id', user_id).execute()
+            user_profile_cache.invalidate(user_id)
+        
+        job = submit_upload(supabase, 'profiles', f'profiles/{user_id}', path, owner_id=user_id, on_stored=save_photo)
+        
+        return jsonify({
+            'message': 'Profile photo is being processed',
+            'job_id': job.id
+        }), 202
+        
+    except InvalidImage as e:
+        return jsonify({'error': str(e)}), 400
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ========== UPDATE PROFILE PHOTO ==========
 @users_bp.route('/profile/photo', methods=['PUT'])
 @token_required
@@ -151,6 +211,7 @@ def update_profile_photo(current_user):
         
         supabase = supabase_client.client
         result = supabase.table('users').update({'profile_photo_url': photo_url}).eq('id', current_user.user.id).execute()
+        user_profile_cache.invalidate(current_user.user.id)
         
         return jsonify({
             'message': 'Profile photo updated successfully',
@@ -168,6 +229,7 @@ def delete_profile_photo(current_user):
     try:
         supabase = supabase_client.client
         result = supabase.table('users').update({'profile_photo_url': None}).eq('id', current_user.user.id).execute()
+        user_profile_cache.invalidate(current_user.user.id)
         
         return jsonify({'message': 'Profile photo deleted successfully'}), 200
         
@@ -196,6 +258,8 @@ def update_categories(current_user):
         
         supabase = supabase_client.client
         result = supabase.table('users').update({'selected_categories': categories}).eq('id', current_user.user.id).execute()
+        user_profile_cache.invalidate(current_user.user.id)
+        recommender.invalidate(current_user.user.id)
         
         return jsonify({
             'message': 'Categories updated successfully',
@@ -213,19 +277,12 @@ def get_favorites(current_user):
     try:
         supabase = supabase_client.client
         
-        # Get favorite event IDs
-        favorites = supabase.table('favorites').select('event_id').eq('user_id', current_user.user.id).execute()
-        
-        if not favorites.data:
-            return jsonify({'favorites': []}), 200
-        
-        event_ids = [f['event_id'] for f in favorites.data]
-        
-        # Get events
-        events = supabase.table('events').select('*').in_('id', event_ids).execute()
+        events = query_favorite_events(supabase, current_user.user.id, event_columns())
         
-        return jsonify({'favorites': events.data}), 200
+        return jsonify({'favorites': events}), 200
         
+    except InvalidQueryParam as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -247,6 +304,7 @@ def add_favorite(current_user, event_id):
             'event_id': event_id,
             'user_id': current_user.user.id
         }).execute()
+        recommender.invalidate(current_user.user.id)
         
         return jsonify({'message': 'Event added to favorites'}), 201
         
@@ -261,6 +319,7 @@ def remove_favorite(current_user, event_id):
     try:
         supabase = supabase_client.client
         supabase.table('favorites').delete().eq('event_id', event_id).eq('user_id', current_user.user.id).execute()
+        recommender.invalidate(current_user.user.id)
         
         return jsonify({'message': 'Event removed from favorites'}), 200
         
@@ -346,32 +405,26 @@ def get_organizer_status(current_user):
 # ========== REQUEST ACCOUNT DELETION ==========
 @users_bp.route('/delete-account/request', methods=['POST'])
 @token_required
-def request_account_deletion(current_user):
+@rate_limiter.limit('delete_account_user', key=by_user)
+def request_account_deletion(current_user, current_profile):
     """Request account deletion - sends verification code to email"""
     try:
         from app.utils.email_utils import send_email
         import random
-        from datetime import datetime, timedelta
         
         supabase = supabase_client.client
         
         # Get user email
-        user = supabase.table('users').select('email').eq('id', current_user.user.id).execute()
-        if not user.data:
+        if not current_profile:
             return jsonify({'error': 'User not found'}), 404
         
-        email = user.data[0]['email']
+        email = current_profile['email']
         
         # Generate 6-digit verification code
         code = str(random.randint(100000, 999999))
         
-        # Store code with expiry (10 minutes)
-        from app.routes.auth import verification_codes
-        verification_codes[f'delete_{email}'] = {
-            'code': code,
-            'expiry': datetime.utcnow() + timedelta(minutes=10),
-            'user_id': current_user.user.id
-        }
+        # Store code with expiry (VERIFICATION_CODE_TTL)
+        verification_code_store.put(f'delete_{email}', code, user_id=current_user.user.id)
         
         # Send email with verification code
         email_body = f"""
@@ -381,7 +434,7 @@ You have requested to delete your account.
 
 Your verification code is: {code}
 
-This code will expire in 10 minutes.
+This code will expire in {verification_code_store.ttl // 60} minutes.
 
 If you did not request this, please ignore this email.
 
@@ -392,7 +445,7 @@ Event Team
         
         return jsonify({
             'message': 'Verification code sent to your email',
-            'expires_in': 600  # 10 minutes in seconds
+            'expires_in': verification_code_store.ttl
         }), 200
         
     except Exception as e:
@@ -403,12 +456,9 @@ Event Team
 # ========== CONFIRM ACCOUNT DELETION ==========
 @users_bp.route('/delete-account/confirm', methods=['POST'])
 @token_required
-def confirm_account_deletion(current_user):
+def confirm_account_deletion(current_user, current_profile):
     """Confirm account deletion with verification code"""
     try:
-        from datetime import datetime
-        from app.routes.auth import verification_codes
-        
         data = request.get_json()
         verification_code = data.get('verification_code', '').strip()
         
@@ -418,31 +468,21 @@ def confirm_account_deletion(current_user):
         supabase = supabase_client.client
         
         # Get user email
-        user = supabase.table('users').select('email').eq('id', current_user.user.id).execute()
-        if not user.data:
+        if not current_profile:
             return jsonify({'error': 'User not found'}), 404
         
-        email = user.data[0]['email']
-        
-        # Verify code
-        stored = verification_codes.get(f'delete_{email}')
-        if not stored:
-            return jsonify({'error': 'Invalid or expired verification code'}), 400
+        email = current_profile['email']
         
-        if datetime.utcnow() > stored['expiry']:
-            del verification_codes[f'delete_{email}']
-            return jsonify({'error': 'Verification code expired'}), 400
-        
-        if verification_code != stored['code']:
-            return jsonify({'error': 'Invalid verification code'}), 400
+        # Verify code (a valid code is used up)
+        status, stored = verification_code_store.consume(f'delete_{email}', verification_code)
+        if status != CODE_OK:
+            message, status_code = CODE_ERRORS[status]
+            return jsonify({'error': message}), status_code
         
         # Verify user_id matches
-        if stored['user_id'] != current_user.user.id:
+        if stored.get('user_id') != current_user.user.id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Delete code
-        del verification_codes[f'delete_{email}']
-        
         # Delete user from auth (this will cascade delete from users table due to ON DELETE CASCADE)
         # Note: We need to use admin client for this
         try:
@@ -458,6 +498,7 @@ def confirm_account_deletion(current_user):
         
         # Delete user profile (cascade will handle related data)
         supabase.table('users').delete().eq('id', current_user.user.id).execute()
+        user_profile_cache.invalidate(current_user.user.id)
         
         return jsonify({'message': 'Account deleted successfully'}), 200
         
@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    Progress record of a background job.
+    The job function receives it as first argument and reports through
+    increment() / add_error() and may set `result` (JSON-serializable) for
+    the client; readers get a snapshot with to_dict().
+    """
+
+    MAX_ERRORS = 50
+
+    # Minimum seconds between two progress snapshots sent to the shared store
+    SAVE_INTERVAL = 1.0
+
+    def __init__(self, name, owner_id=None, on_change=None):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.owner_id = owner_id
+        self.status = 'queued'
+        self.counters = {}
+        self.errors = []
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._on_change = on_change
+        self._saved_at = 0.0
+
+    @classmethod
+    def from_dict(cls, data):
+        """Read-only copy of a job saved by another worker"""
+        job = cls(data['name'], owner_id=data.get('owner_id'))
+        job.id = data['id']
+        job.status = data['status']
+        job.counters = data['counters']
+        job.errors = data['errors']
+        job.result = data.get('result')
+        job.created_at = datetime.fromisoformat(data['created_at'])
+        job.finished_at = datetime.fromisoformat(data['finished_at']) if data['finished_at'] else None
+        return job
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+        self.changed()
+
+    def add_error(self, message):
+        logger.warning(f'Job {self.name} {self.id}: {message}')
+        with self._lock:
+            if len(self.errors) < self.MAX_ERRORS:
+                self.errors.append(message)
+        self.changed()
+
+    def changed(self, force=False):
+        """Report progress to the shared store, at most every SAVE_INTERVAL seconds unless forced"""
+        if self._on_change is None:
+            return
+        now = time.monotonic()
+        if force or now - self._saved_at >= self.SAVE_INTERVAL:
+            self._saved_at = now
+            self._on_change(self)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'name': self.name,
+                'status': self.status,
+                'counters': dict(self.counters),
+                'errors': list(self.errors),
+                'result': self.result,
+                'created_at': self.created_at.isoformat(),
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            }
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+
+class BackgroundJobs:
+    """
+    Small thread pool for work that should not run on the request thread
+    (notification fan-out, emails...). Finished jobs stay queryable for
+    JOB_RETENTION_SECONDS; queued and running jobs are never evicted.
+    Without JOB_REDIS_URL a job can only be looked up on the worker that
+    runs it; with it, job snapshots are shared by all workers.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._active = {}
+        self._finished = TTLCache(max_size=1000, ttl=3600)
+        self._lock = threading.Lock()
+        self._redis = None
+        self._max_workers = 4
+        self.retention = 3600
+
+    def init_app(self, app):
+        """Read worker settings from Flask app config"""
+        self._max_workers = app.config.get('BACKGROUND_WORKERS', 4)
+        self.retention = app.config.get('JOB_RETENTION_SECONDS', 3600)
+        self._finished = TTLCache(max_size=1000, ttl=self.retention)
+        self._executor = None
+
+        self._redis = None
+        redis_url = app.config.get('JOB_REDIS_URL')
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+            except ImportError:
+                logger.warning('JOB_REDIS_URL is set but redis is not installed, job status is per worker')
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix='background-job',
+            )
+        return self._executor
+
+    def submit(self, name, fn, *args, owner_id=None, **kwargs):
+        """Run fn(job, *args, **kwargs) in the background and return the Job"""
+        job = Job(name, owner_id=owner_id, on_change=self._save if self._redis is not None else None)
+        with self._lock:
+            self._active[job.id] = job
+        job.changed(force=True)
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.changed(force=True)
+        try:
+            fn(job, *args, **kwargs)
+            job.status = 'completed_with_errors' if job.errors else 'done'
+        except Exception as e:
+            traceback.print_exc()
+            job.add_error(str(e))
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._active.pop(job.id, None)
+            self._finished.set(job.id, job)
+            job.changed(force=True)
+
+    def _save(self, job):
+        try:
+            data = dict(job.to_dict(), owner_id=job.owner_id)
+            # Running jobs are kept until they report again; finished ones for JOB_RETENTION_SECONDS
+            self._redis.set(f'job:{job.id}', json.dumps(data), ex=self.retention if job.finished else max(self.retention, 86400))
+        except Exception as e:
+            logger.error(f'Could not save job {job.id}: {e}')
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            job = self._finished.get(job_id)
+        if job is None and self._redis is not None:
+            try:
+                data = self._redis.get(f'job:{job_id}')
+                job = Job.from_dict(json.loads(data)) if data else None
+            except Exception as e:
+                logger.error(f'Could not load job {job_id}: {e}')
+        return job
+
+
+# Singleton instance
+background_jobs = BackgroundJobs()
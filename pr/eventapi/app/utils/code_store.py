@@ -0,0 +1,237 @@
+import hmac
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# consume() outcomes
+CODE_OK = 'ok'
+CODE_MISSING = 'missing'
+CODE_EXPIRED = 'expired'
+CODE_INVALID = 'invalid'
+CODE_LOCKED = 'locked'
+
+# Error message and HTTP status routes answer a failed consume() with
+CODE_ERRORS = {
+    CODE_MISSING: ('Invalid or expired verification code', 400),
+    CODE_EXPIRED: ('Verification code expired', 400),
+    CODE_INVALID: ('Invalid verification code', 400),
+    CODE_LOCKED: ('Too many attempts, please request a new code', 429),
+}
+
+
+def _matches(stored, code):
+    return hmac.compare_digest(str(stored), str(code))
+
+
+class MemoryCodeBackend:
+    """Per-process storage; fine for a single worker and for tests"""
+
+    def __init__(self):
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, code, data, expires_at):
+        with self._lock:
+            self._codes[key] = {'code': code, 'data': data, 'expires_at': expires_at, 'attempts': 0}
+
+    def consume(self, key, code, max_attempts, now):
+        with self._lock:
+            record = self._codes.get(key)
+            if record is None:
+                return CODE_MISSING, None
+            if now > record['expires_at']:
+                del self._codes[key]
+                return CODE_EXPIRED, None
+            if _matches(record['code'], code):
+                del self._codes[key]
+                return CODE_OK, record['data']
+            record['attempts'] += 1
+            if record['attempts'] >= max_attempts:
+                del self._codes[key]
+                return CODE_LOCKED, None
+            return CODE_INVALID, None
+
+    def sweep(self, now):
+        with self._lock:
+            expired = [key for key, record in self._codes.items() if now > record['expires_at']]
+            for key in expired:
+                del self._codes[key]
+        return len(expired)
+
+
+class SQLiteCodeBackend:
+    """Codes in a SQLite file shared by all workers of one host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._execute(
+            'CREATE TABLE IF NOT EXISTS verification_codes ('
+            ' key TEXT PRIMARY KEY, code TEXT NOT NULL, data TEXT,'
+            ' expires_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0)'
+        )
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def put(self, key, code, data, expires_at):
+        self._execute(
+            'INSERT OR REPLACE INTO verification_codes (key, code, data, expires_at, attempts) VALUES (?, ?, ?, ?, 0)',
+            (key, code, json.dumps(data), expires_at),
+        )
+
+    def consume(self, key, code, max_attempts, now):
+        conn = self._connect()
+        try:
+            # Write lock for the whole check-and-update
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT code, data, expires_at, attempts FROM verification_codes WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                status, data = CODE_MISSING, None
+            elif now > row[2]:
+                conn.execute('DELETE FROM verification_codes WHERE key = ?', (key,))
+                status, data = CODE_EXPIRED, None
+            elif _matches(row[0], code):
+                conn.execute('DELETE FROM verification_codes WHERE key = ?', (key,))
+                status, data = CODE_OK, json.loads(row[1]) if row[1] else {}
+            elif row[3] + 1 >= max_attempts:
+                conn.execute('DELETE FROM verification_codes WHERE key = ?', (key,))
+                status, data = CODE_LOCKED, None
+            else:
+                conn.execute('UPDATE verification_codes SET attempts = attempts + 1 WHERE key = ?', (key,))
+                status, data = CODE_INVALID, None
+            conn.execute('COMMIT')
+            return status, data
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def sweep(self, now):
+        return self._execute('DELETE FROM verification_codes WHERE expires_at < ?', (now,))
+
+
+class RedisCodeBackend:
+    """Codes in Redis (or any server speaking its protocol); expiry is native"""
+
+    # Check, count the attempt and delete in one atomic step
+    CONSUME_SCRIPT = """
+local record = redis.call('HMGET', KEYS[1], 'code', 'data', 'attempts')
+if not record[1] then
+    return {'missing'}
+end
+if record[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return {'ok', record[2]}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return {'locked'}
+end
+return {'invalid'}
+"""
+
+    def __init__(self, url, prefix='vcode:'):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._consume = self._redis.register_script(self.CONSUME_SCRIPT)
+        self._prefix = prefix
+
+    def put(self, key, code, data, expires_at):
+        name = self._prefix + key
+        pipe = self._redis.pipeline()
+        pipe.delete(name)
+        pipe.hset(name, mapping={'code': code, 'data': json.dumps(data), 'attempts': 0})
+        pipe.expireat(name, int(expires_at) + 1)
+        pipe.execute()
+
+    def consume(self, key, code, max_attempts, now):
+        result = self._consume(keys=[self._prefix + key], args=[code, max_attempts])
+        status = result[0]
+        data = json.loads(result[1]) if status == CODE_OK and len(result) > 1 and result[1] else None
+        return status, data
+
+    def sweep(self, now):
+        return 0
+
+
+class VerificationCodeStore:
+    """
+    Short-lived one-time codes (email verification, account deletion).
+    A code can be consumed once; after VERIFICATION_CODE_MAX_ATTEMPTS wrong
+    guesses it is dropped. The backend (memory, sqlite or redis) is chosen
+    with VERIFICATION_CODE_BACKEND; use sqlite or redis with several workers.
+    """
+
+    def __init__(self):
+        self._backend = MemoryCodeBackend()
+        self.ttl = 600
+        self.max_attempts = 5
+        self.sweep_interval = 60
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Read code store settings from Flask app config"""
+        self.ttl = app.config.get('VERIFICATION_CODE_TTL', 600)
+        self.max_attempts = app.config.get('VERIFICATION_CODE_MAX_ATTEMPTS', 5)
+        self.sweep_interval = app.config.get('VERIFICATION_CODE_SWEEP_SECONDS', 60)
+
+        backend = app.config.get('VERIFICATION_CODE_BACKEND', 'sqlite')
+        if backend == 'sqlite':
+            self._backend = SQLiteCodeBackend(app.config.get('VERIFICATION_CODE_SQLITE_PATH', 'verification_codes.db'))
+        elif backend == 'redis':
+            self._backend = RedisCodeBackend(app.config['VERIFICATION_CODE_REDIS_URL'])
+        else:
+            self._backend = MemoryCodeBackend()
+
+        self._start_sweeper()
+
+    def put(self, key, code, ttl=None, **data):
+        """Store a code for `key` (replacing any previous one); extra data comes back from consume()"""
+        self._backend.put(key, code, data, time.time() + (ttl or self.ttl))
+
+    def consume(self, key, code):
+        """
+        Check `code` for `key` and delete it on success.
+        Returns (status, data) with status one of CODE_OK, CODE_MISSING,
+        CODE_EXPIRED, CODE_INVALID or CODE_LOCKED (see CODE_ERRORS).
+        """
+        return self._backend.consume(key, code, self.max_attempts, time.time())
+
+    def sweep(self):
+        """Delete expired codes, returns how many were removed"""
+        return self._backend.sweep(time.time())
+
+    def _start_sweeper(self):
+        if self._sweeper is not None or not self.sweep_interval:
+            return
+
+        def run():
+            while not self._stop.wait(self.sweep_interval):
+                try:
+                    removed = self.sweep()
+                    if removed:
+                        logger.info(f'Swept {removed} expired verification codes')
+                except Exception as e:
+                    logger.error(f'Verification code sweep failed: {e}')
+
+        self._sweeper = threading.Thread(target=run, name='verification-code-sweeper', daemon=True)
+        self._sweeper.start()
+
+
+# Singleton instance
+verification_code_store = VerificationCodeStore()
@@ -0,0 +1,81 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimeout(TimeoutError):
+    """Concurrent queries did not finish before the deadline; routes answer it with 504"""
+
+
+class QueryPool:
+    """
+    Bounded thread pool for running independent Supabase queries of one
+    request concurrently (the sync client spends its time waiting on I/O).
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._max_workers = 16
+        self.deadline = 10
+
+    def init_app(self, app):
+        """Read pool settings from Flask app config"""
+        self._max_workers = app.config.get('QUERY_POOL_WORKERS', 16)
+        self.deadline = app.config.get('QUERY_DEADLINE_SECONDS', 10)
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix='query-pool',
+            )
+        return self._executor
+
+    def run_all(self, tasks, timeout=None):
+        """
+        Run {name: callable} concurrently and wait up to `timeout` seconds.
+        Returns (results, errors): each name ends up in exactly one of them,
+        so callers can serve partial results when some tasks fail.
+        """
+        futures = {name: self.executor.submit(fn) for name, fn in tasks.items()}
+        wait(futures.values(), timeout=timeout)
+
+        results, errors = {}, {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                errors[name] = 'Timed out'
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f'Query {name} failed: {e}')
+                errors[name] = str(e)
+        return results, errors
+
+    def gather(self, tasks, timeout=None):
+        """
+        Run {name: callable} concurrently and return {name: result}.
+        The first failing query's exception is re-raised as soon as it
+        happens; QueryTimeout is raised when the deadline (QUERY_DEADLINE_SECONDS
+        unless `timeout` is given) passes first.
+        """
+        futures = {name: self.executor.submit(fn) for name, fn in tasks.items()}
+        done, pending = wait(futures.values(), timeout=timeout or self.deadline, return_when=FIRST_EXCEPTION)
+
+        for future in pending:
+            future.cancel()
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+        if pending:
+            raise QueryTimeout('Database queries timed out')
+
+        return {name: future.result() for name, future in futures.items()}
+
+
+# Singleton instance
+query_pool = QueryPool()
@@ -1,6 +1,12 @@
 from functools import wraps
+import inspect
 from flask import request, jsonify
 from app.utils.supabase_client import supabase_client
+from app.utils.user_cache import get_current_profile
+
+def _accepts_profile(f):
+    """True if the route function takes a `current_profile` argument"""
+    return 'current_profile' in inspect.signature(f).parameters
 
 def token_required(f):
     """
@@ -11,7 +17,12 @@ def token_required(f):
     @token_required
     def my_route(current_user):
         # Only logged-in users can access
+    
+    Routes that also declare `current_profile` receive the user's
+    (cached) row from the users table.
     """
+    wants_profile = _accepts_profile(f)
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -36,6 +47,9 @@ def token_required(f):
             if not user or not user.user:
                 return jsonify({'error': 'Invalid or expired token'}), 401
             
+            if wants_profile:
+                kwargs['current_profile'] = get_current_profile(user)
+            
             # Pass user to the route function
             return f(current_user=user, *args, **kwargs)
             
@@ -51,6 +65,8 @@ def organizer_required(f):
     Decorator to restrict access to organizers only.
     Checks if user is authenticated AND has organizer role.
     """
+    wants_profile = _accepts_profile(f)
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -72,13 +88,15 @@ def organizer_required(f):
             if not user or not user.user:
                 return jsonify({'error': 'Invalid token'}), 401
             
-            # Check if user has organizer role
-            supabase = supabase_client.client
-            result = supabase.table('users').select('role').eq('id', user.user.id).execute()
+            # Check if user has organizer role (cached profile lookup)
+            profile = get_current_profile(user)
             
-            if not result.data or result.data[0]['role'] != 'organizer':
+            if not profile or profile['role'] != 'organizer':
                 return jsonify({'error': 'Organizer access required'}), 403
             
+            if wants_profile:
+                kwargs['current_profile'] = profile
+            
             # User is authenticated and is organizer
             return f(current_user=user, *args, **kwargs)
             
@@ -86,4 +104,20 @@ def organizer_required(f):
             error_msg = str(e)
             return jsonify({'error': f'Token validation failed: {error_msg}'}), 401
     
-    return decorated
\ No newline at end of file
+    return decorated
+
+def token_optional(f):
+    """
+    Like token_required for routes that also serve anonymous users:
+    without an Authorization header the route gets current_user=None.
+    A token that is sent must still be valid.
+    """
+    authenticated = token_required(f)
+    
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if 'Authorization' not in request.headers:
+            return f(current_user=None, *args, **kwargs)
+        return authenticated(*args, **kwargs)
+    
+    return decorated
@@ -1,14 +1,181 @@
+import logging
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 
-def send_email(to_email, subject, body):
+logger = logging.getLogger(__name__)
+
+
+class MailNotConfigured(RuntimeError):
+    """Mail is disabled: MAIL_USERNAME / MAIL_PASSWORD are not set"""
+
+
+class SMTPTransport:
+    """
+    Pool of authenticated SMTP connections shared by all senders.
+    Connections are kept open between messages, probed with NOOP when they
+    have been idle for a while, and re-opened once if the server dropped them.
+    """
+
+    def __init__(self):
+        self.host = 'localhost'
+        self.port = 25
+        self.username = None
+        self.password = None
+        self.sender = None
+        self.use_tls = False
+        self.timeout = 30
+        self.pool_size = 2
+        self.keepalive = 60
+        self.enabled = False
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def init_app(self, app):
+        """Read mail server settings from Flask app config"""
+        self.host = app.config.get('MAIL_SERVER', self.host)
+        self.port = app.config.get('MAIL_PORT', self.port)
+        self.username = app.config.get('MAIL_USERNAME', self.username)
+        self.password = app.config.get('MAIL_PASSWORD', self.password)
+        self.sender = app.config.get('MAIL_SENDER', self.sender)
+        self.use_tls = app.config.get('MAIL_USE_TLS', self.use_tls)
+        self.timeout = app.config.get('MAIL_TIMEOUT', self.timeout)
+        self.pool_size = app.config.get('MAIL_POOL_SIZE', self.pool_size)
+        self.keepalive = app.config.get('MAIL_KEEPALIVE_SECONDS', self.keepalive)
+        self.enabled = app.config.get('MAIL_ENABLED', bool(self.username and self.password))
+        if not self.enabled:
+            logger.warning('Mail is disabled: set MAIL_USERNAME and MAIL_PASSWORD (or MAIL_ENABLED=true)')
+        self.close()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()  # Secure the connection
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _is_alive(server):
+        try:
+            return server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @staticmethod
+    def _quit(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    def _acquire(self):
+        """Take an idle connection from the pool (or open one)"""
+        while True:
+            try:
+                server, last_used = self._pool.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - last_used < self.keepalive or self._is_alive(server):
+                return server
+            self._quit(server)
+
+    def _release(self, server):
+        self._pool.put((server, time.monotonic()))
+
+    def send_many(self, messages):
+        """
+        Send several messages over one pooled, authenticated session.
+        Returns a list with None (sent) or the exception for each message.
+        """
+        if not messages:
+            return []
+        if not self.enabled:
+            return [MailNotConfigured('Mail is not configured')] * len(messages)
+
+        errors = []
+        with self._slots:
+            server = None
+            for msg in messages:
+                try:
+                    if server is None:
+                        server = self._acquire()
+                    try:
+                        server.send_message(msg)
+                    except smtplib.SMTPServerDisconnected:
+                        # Server dropped the session: reconnect once and retry
+                        self._quit(server)
+                        server = None
+                        server = self._connect()
+                        server.send_message(msg)
+                    errors.append(None)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    # Rejected message, the session itself is still usable
+                    errors.append(e)
+                except Exception as e:
+                    # Broken session (timeout, second disconnect...): record it and
+                    # open a new one for the next message
+                    errors.append(e)
+                    if server is not None:
+                        self._quit(server)
+                        server = None
+
+            if server is not None:
+                self._release(server)
+        return errors
+
+    def send(self, msg):
+        error = self.send_many([msg])[0]
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Close all idle pooled connections"""
+        while True:
+            try:
+                server, _ = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(server)
+
+
+def build_email(to_email, subject, body, sender=None):
     msg = MIMEText(body)
     msg['Subject'] = subject
-    msg['From'] = 'fibladievent@gmail.com'  # <-- replace with your Gmail
+    msg['From'] = sender or mail_transport.sender
     msg['To'] = to_email
+    return msg
+
+
+def send_email(to_email, subject, body):
+    """Send one email over the pooled SMTP transport"""
+    mail_transport.send(build_email(to_email, subject, body))
+
+
+def send_many(emails):
+    """
+    Send a batch of (to_email, subject, body) over one SMTP session.
+    Returns None (sent) or the exception for each email, in order.
+    """
+    return mail_transport.send_many([build_email(*email) for email in emails])
+
+
+def send_email_async(to_email, subject, body):
+    """Queue an email on the background worker instead of the request thread"""
+    from app.utils.background import background_jobs
+
+    def deliver(job):
+        send_email(to_email, subject, body)
+        job.increment('emails_sent')
+
+    return background_jobs.submit('send_email', deliver)
+
 
-    # Connect to Gmail SMTP server
-    with smtplib.SMTP('smtp.gmail.com', 587) as server:
-        server.starttls()  # Secure the connection
-        server.login('fibladievent@gmail.com', 'bprxmznlabotgkkq')  # <-- put your app password
-        server.send_message(msg)
+# Singleton instance
+mail_transport = SMTPTransport()
@@ -0,0 +1,36 @@
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+
+def content_etag(body):
+    """Strong ETag value derived from the response body"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def apply_etag(response, etag=None):
+    """
+    Set a strong ETag on a 200 response and turn it into a
+    304 Not Modified when it matches the request's If-None-Match.
+    """
+    if response.status_code != 200:
+        return response
+
+    response.set_etag(etag or content_etag(response.get_data()))
+    # Clients should revalidate rather than reuse blindly
+    response.headers.setdefault('Cache-Control', 'no-cache')
+    return response.make_conditional(request)
+
+
+def conditional(f):
+    """Decorator adding ETag / If-None-Match support to a JSON GET route"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if request.headers.get('Authorization'):
+            response.vary.add('Authorization')
+        return apply_etag(response)
+    return decorated
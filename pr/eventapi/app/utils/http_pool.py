@@ -0,0 +1,77 @@
+import threading
+import httpx
+
+
+class HTTPPool:
+    """
+    One long-lived httpx transport per worker, shared by the PostgREST,
+    storage and auth sub-clients of every Supabase client. Connections and
+    TLS sessions to Supabase are reused across requests and clients.
+    """
+
+    def __init__(self):
+        self._transport = None
+        self._lock = threading.Lock()
+        self.limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+        self.timeout = httpx.Timeout(30, connect=5)
+        self.http2 = True
+
+    def init_app(self, app):
+        """Read pool settings from Flask app config"""
+        self.limits = httpx.Limits(
+            max_connections=app.config.get('SUPABASE_HTTP_MAX_CONNECTIONS', 100),
+            max_keepalive_connections=app.config.get('SUPABASE_HTTP_MAX_KEEPALIVE', 20),
+            keepalive_expiry=app.config.get('SUPABASE_HTTP_KEEPALIVE_EXPIRY', 30),
+        )
+        self.timeout = httpx.Timeout(
+            app.config.get('SUPABASE_HTTP_READ_TIMEOUT', 30),
+            connect=app.config.get('SUPABASE_HTTP_CONNECT_TIMEOUT', 5),
+            pool=app.config.get('SUPABASE_HTTP_POOL_TIMEOUT', 10),
+        )
+        self.http2 = app.config.get('SUPABASE_HTTP2', True)
+        self.close()
+
+    @property
+    def transport(self):
+        with self._lock:
+            if self._transport is None:
+                self._transport = httpx.HTTPTransport(http2=self.http2, limits=self.limits)
+            return self._transport
+
+    def attach(self, http_client):
+        """Route an httpx.Client built by a Supabase sub-client through the shared transport"""
+        # httpx has no public setter for the transport of an existing client
+        http_client._transport = self.transport
+        http_client.timeout = self.timeout
+        return http_client
+
+    def close(self):
+        with self._lock:
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
+    def stats(self):
+        """Pool saturation: open connections by state and requests waiting for one"""
+        if self._transport is None:
+            connections, queued = [], 0
+        else:
+            pool = self._transport._pool
+            connections = list(pool.connections)
+            queued = sum(1 for request in getattr(pool, '_requests', []) if request.is_queued())
+
+        idle = sum(1 for connection in connections if connection.is_idle())
+        max_connections = self.limits.max_connections
+        return {
+            'connections': len(connections),
+            'active': len(connections) - idle,
+            'idle': idle,
+            'queued_requests': queued,
+            'max_connections': max_connections,
+            'saturation': round((len(connections) - idle) / max_connections, 3) if max_connections else 0.0,
+            'http2': self.http2,
+        }
+
+
+# Singleton instance
+http_pool = HTTPPool()
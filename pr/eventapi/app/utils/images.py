@@ -0,0 +1,296 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Formats accepted from uploads, detected from the file content (not the extension)
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+
+# Variant name -> longest side in pixels (images are never upscaled)
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 640,
+    'full': 1600,
+}
+
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+# Content types storage accepts in the upload buckets (originals and variants)
+BUCKET_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+
+# Name of an original uploaded directly to storage through a signed URL
+UPLOAD_NAME = re.compile(r'^upload-[0-9a-f]{32}$')
+
+# Stored objects never change (their path is a content hash): let clients cache them for a year
+IMMUTABLE_CACHE_SECONDS = '31536000'
+
+
+class InvalidImage(ValueError):
+    """Upload is not a supported, decodable image; routes answer it with 400"""
+
+
+class UploadNotFound(LookupError):
+    """Finalize was called for an upload that is not in storage; routes answer it with 404"""
+
+
+def process_image(data, variants, output_format='webp', quality=80, max_pixels=40_000_000):
+    """
+    Decode and validate an uploaded image and render every variant.
+    Runs in a worker process. Orientation from EXIF is applied, then all
+    metadata is dropped by re-encoding. Returns {name: (bytes, width, height)}.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in ALLOWED_FORMATS:
+            raise InvalidImage(f'Unsupported image format: {image.format}')
+        # Pillow only refuses images above twice MAX_IMAGE_PIXELS: enforce the limit itself
+        if image.width * image.height > max_pixels:
+            raise InvalidImage('Image dimensions too large')
+        image.load()
+    except UnidentifiedImageError:
+        raise InvalidImage(f'File is not an image. Allowed: {", ".join(sorted(ALLOWED_FORMATS))}')
+    except Image.DecompressionBombError:
+        raise InvalidImage('Image dimensions too large')
+    except (OSError, SyntaxError) as e:
+        raise InvalidImage(f'Invalid image: {e}')
+
+    try:
+        return _render_variants(image, variants, output_format, quality)
+    except (OSError, ValueError, SyntaxError) as e:
+        raise InvalidImage(f'Invalid image: {e}')
+
+
+def _render_variants(image, variants, output_format, quality):
+    """Rotate, flatten and resize a decoded image into every variant"""
+    # Animated GIF/WebP: keep the first frame
+    image.seek(0)
+    image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if output_format == 'webp' and has_alpha:
+        image = image.convert('RGBA')
+    elif has_alpha:
+        # JPEG has no alpha channel: flatten on white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+        image = background
+    else:
+        image = image.convert('RGB')
+
+    rendered = {}
+    for name, size in variants.items():
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, format=output_format.upper(), quality=quality, optimize=True)
+        rendered[name] = (buffer.getvalue(), variant.width, variant.height)
+    return rendered
+
+
+class ImageProcessor:
+    """
+    Process pool for decoding/resizing uploads, so CPU-heavy image work
+    runs outside the web worker and does not hold the GIL of request threads.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._max_workers = 2
+        self.output_format = 'webp'
+        self.quality = 80
+        self.max_pixels = 40_000_000
+        self.max_upload_bytes = 15 * 1024 * 1024
+        self.timeout = 30
+        self._limited_buckets = set()
+
+    def init_app(self, app):
+        """Read image settings from Flask app config"""
+        self._max_workers = app.config.get('IMAGE_WORKERS', 2)
+        self.output_format = app.config.get('IMAGE_FORMAT', 'webp')
+        self.quality = app.config.get('IMAGE_QUALITY', 80)
+        self.max_pixels = app.config.get('IMAGE_MAX_PIXELS', 40_000_000)
+        self.max_upload_bytes = app.config.get('IMAGE_MAX_UPLOAD_BYTES', 15 * 1024 * 1024)
+        self.timeout = app.config.get('IMAGE_TIMEOUT_SECONDS', 30)
+        self._executor = None
+        self._limited_buckets = set()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # Never fork: the web worker runs threads (and is gevent-patched) whose locks a forked child would inherit
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    @property
+    def extension(self):
+        return 'jpg' if self.output_format == 'jpeg' else self.output_format
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.output_format]
+
+    def check_size(self, size):
+        if size > self.max_upload_bytes:
+            raise InvalidImage(f'Image too large (max {self.max_upload_bytes // (1024 * 1024)} MB)')
+
+    def limit_bucket(self, supabase, bucket):
+        """
+        Make storage itself refuse uploads to `bucket` larger than
+        max_upload_bytes or that are not images. Signed upload URLs carry no
+        size bound of their own, the bucket's file_size_limit applies to them.
+        Checked once per bucket and process.
+        """
+        if bucket in self._limited_buckets:
+            return
+        current = supabase.storage.get_bucket(bucket)
+        if (not current.file_size_limit or current.file_size_limit > self.max_upload_bytes
+                or not current.allowed_mime_types):
+            supabase.storage.update_bucket(bucket, {
+                'public': current.public,
+                'file_size_limit': self.max_upload_bytes,
+                'allowed_mime_types': BUCKET_MIME_TYPES,
+            })
+        self._limited_buckets.add(bucket)
+
+    def content_key(self, data):
+        """
+        sha256 of the upload and of the rendering settings: the same bytes
+        rendered the same way always map to the same stored objects.
+        """
+        settings = json.dumps([self.output_format, self.quality, IMAGE_VARIANTS], sort_keys=True)
+        return hashlib.sha256(settings.encode('utf-8') + data).hexdigest()
+
+    def process(self, data, variants=IMAGE_VARIANTS):
+        """Render all variants of an upload on the process pool"""
+        self.check_size(len(data))
+
+        future = self.executor.submit(process_image, data, variants, self.output_format, self.quality, self.max_pixels)
+        return future.result(timeout=self.timeout)
+
+
+def store_image(supabase, bucket, folder, data):
+    """
+    Store an upload as variants under folder/<content hash>/<variant>.<ext>.
+    When the same image was stored before, nothing is rendered or uploaded
+    and the existing objects are returned.
+    Returns ({variant: public_url}, {variant: path}).
+    """
+    from app.utils.concurrency import query_pool
+
+    image_processor.check_size(len(data))
+
+    storage = supabase.storage.from_(bucket)
+    base_path = f'{folder}/{image_processor.content_key(data)}'
+    filenames = {name: f'{name}.{image_processor.extension}' for name in IMAGE_VARIANTS}
+    paths = {name: f'{base_path}/{filename}' for name, filename in filenames.items()}
+
+    existing = {f['name'] for f in storage.list(base_path) or []}
+    if not set(filenames.values()) <= existing:
+        rendered = image_processor.process(data)
+
+        def upload(name):
+            # A fresh dict per upload: storage3 modifies the file options it is given
+            file_options = {
+                'content-type': image_processor.content_type,
+                'cache-control': IMMUTABLE_CACHE_SECONDS,
+                # A concurrent identical upload writes the same bytes
+                'upsert': 'true',
+            }
+            return storage.upload(paths[name], rendered[name][0], file_options=file_options)
+
+        # The variants are independent uploads: send them concurrently
+        query_pool.gather({name: (lambda name=name: upload(name)) for name in rendered})
+
+    urls = {name: storage.get_public_url(path) for name, path in paths.items()}
+    return urls, paths
+
+
+def create_upload_url(supabase, bucket, folder):
+    """
+    Signed URL the client uploads the original image to, directly to
+    storage, so the bytes never go through the API workers. Storage refuses
+    originals above IMAGE_MAX_UPLOAD_BYTES (see ImageProcessor.limit_bucket).
+    The object is processed by submit_upload() afterwards.
+    """
+    image_processor.limit_bucket(supabase, bucket)
+    path = f'{folder}/upload-{uuid.uuid4().hex}'
+    signed = supabase.storage.from_(bucket).create_signed_upload_url(path)
+    return {
+        'upload_url': signed['signed_url'],
+        'token': signed['token'],
+        'path': path,
+        'max_bytes': image_processor.max_upload_bytes,
+    }
+
+
+def check_upload(supabase, bucket, folder, path):
+    """
+    Cheap checks of an original uploaded through create_upload_url(), made
+    before it is downloaded: only paths issued for `folder`, present in
+    storage and within IMAGE_MAX_UPLOAD_BYTES (larger ones are deleted).
+    """
+    prefix, _, name = path.rpartition('/')
+    if prefix != folder or not UPLOAD_NAME.match(name):
+        raise InvalidImage('Invalid upload path')
+
+    storage = supabase.storage.from_(bucket)
+    listed = [f for f in storage.list(folder, {'search': name}) or [] if f.get('name') == name]
+    if not listed:
+        raise UploadNotFound('Upload not found')
+
+    try:
+        image_processor.check_size((listed[0].get('metadata') or {}).get('size') or 0)
+    except InvalidImage:
+        storage.remove([path])
+        raise
+
+
+def finalize_upload(supabase, bucket, folder, path):
+    """
+    Run an original that passed check_upload() into the image pipeline
+    (store_image) and delete it. The original is downloaded into this
+    process: run it on a background job (submit_upload), not on a request.
+    Returns ({variant: public_url}, {variant: path}).
+    """
+    storage = supabase.storage.from_(bucket)
+    try:
+        result = store_image(supabase, bucket, folder, storage.download(path))
+    except InvalidImage:
+        storage.remove([path])
+        raise
+
+    storage.remove([path])
+    return result
+
+
+def submit_upload(supabase, bucket, folder, path, owner_id, on_stored=None):
+    """
+    check_upload() now, then finalize_upload() on a background job whose
+    result is {'url', 'path', 'urls'} (the full variant first).
+    on_stored(urls) runs on the job once the variants are stored, e.g. to
+    save the URL on a profile. Returns the Job.
+    """
+    from app.utils.background import background_jobs
+
+    check_upload(supabase, bucket, folder, path)
+
+    def process(job):
+        urls, paths = finalize_upload(supabase, bucket, folder, path)
+        if on_stored is not None:
+            on_stored(urls)
+        job.result = {'url': urls['full'], 'path': paths['full'], 'urls': urls}
+
+    return background_jobs.submit('image_upload', process, owner_id=owner_id)
+
+
+# Singleton instance
+image_processor = ImageProcessor()
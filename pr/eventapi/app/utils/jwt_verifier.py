@@ -0,0 +1,125 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+import jwt
+from gotrue.types import User, UserResponse
+
+from app.utils.cache import TTLCache
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally (no secret / key for it)"""
+
+
+class TokenCache(TTLCache):
+    """
+    Bounded LRU cache of verified tokens.
+    Entries are keyed by a hash of the token (raw tokens are never stored)
+    and are dropped as soon as the token itself expires.
+    """
+
+    def _key(self, token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def set(self, token, value, expires_at):
+        if not expires_at:
+            return
+        super().set(token, value, expires_at=expires_at)
+
+
+class JWTVerifier:
+    """
+    Verifies Supabase access tokens locally.
+    HS256 tokens are checked with the project JWT secret, asymmetric ones
+    (RS256/ES256) with the project's JWKS, which is fetched once and cached.
+    """
+
+    SYMMETRIC_ALGORITHMS = {'HS256', 'HS384', 'HS512'}
+    ASYMMETRIC_ALGORITHMS = {'RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512', 'EdDSA'}
+
+    def __init__(self):
+        self._secret = None
+        self._jwks_client = None
+        self._audience = 'authenticated'
+        self._leeway = 0
+
+    def init_app(self, app):
+        """Read JWT settings from Flask app config"""
+        self._secret = app.config.get('SUPABASE_JWT_SECRET')
+        self._audience = app.config.get('SUPABASE_JWT_AUDIENCE', 'authenticated')
+        self._leeway = app.config.get('JWT_LEEWAY_SECONDS', 0)
+
+        jwks_url = app.config.get('SUPABASE_JWKS_URL')
+        if not jwks_url and app.config.get('SUPABASE_URL'):
+            jwks_url = f"{app.config['SUPABASE_URL'].rstrip('/')}/auth/v1/.well-known/jwks.json"
+
+        self._jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True) if jwks_url else None
+
+    def _get_key(self, token, algorithm):
+        if algorithm in self.SYMMETRIC_ALGORITHMS:
+            if not self._secret:
+                raise LocalVerificationUnavailable('SUPABASE_JWT_SECRET is not configured')
+            return self._secret
+
+        if algorithm in self.ASYMMETRIC_ALGORITHMS:
+            if self._jwks_client is None:
+                raise LocalVerificationUnavailable('No JWKS URL configured')
+            try:
+                return self._jwks_client.get_signing_key_from_jwt(token).key
+            except (jwt.PyJWKClientError, jwt.PyJWKError) as e:
+                raise LocalVerificationUnavailable(f'Signing key unavailable: {e}')
+
+        raise jwt.InvalidAlgorithmError(f'Unsupported token algorithm: {algorithm}')
+
+    def verify(self, token):
+        """
+        Check signature, expiry and audience of a token and return its claims.
+        Raises jwt.InvalidTokenError for bad tokens and
+        LocalVerificationUnavailable when no key is available to check it.
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get('alg')
+        key = self._get_key(token, algorithm)
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self._audience,
+            leeway=self._leeway,
+            options={'require': ['exp', 'sub']},
+        )
+
+
+def unverified_expiry(token):
+    """Read the `exp` claim without verifying (only used to bound cache lifetime)"""
+    try:
+        return jwt.decode(token, options={'verify_signature': False}).get('exp')
+    except jwt.InvalidTokenError:
+        return None
+
+
+def user_response_from_claims(claims):
+    """Build the same UserResponse shape auth.get_user returns from JWT claims"""
+    issued_at = claims.get('iat') or time.time()
+    audience = claims.get('aud') or ''
+    if isinstance(audience, list):
+        audience = audience[0] if audience else ''
+
+    user = User(
+        id=claims['sub'],
+        app_metadata=claims.get('app_metadata') or {},
+        user_metadata=claims.get('user_metadata') or {},
+        aud=audience,
+        email=claims.get('email'),
+        phone=claims.get('phone'),
+        role=claims.get('role'),
+        created_at=datetime.fromtimestamp(issued_at, tz=timezone.utc),
+        is_anonymous=claims.get('is_anonymous', False),
+    )
+    return UserResponse(user=user)
+
+
+# Singleton instance
+jwt_verifier = JWTVerifier()
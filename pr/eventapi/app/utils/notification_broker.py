@@ -0,0 +1,164 @@
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Redis channel all workers publish to and listen on
+CHANNEL = 'notifications'
+
+
+class Subscription:
+    """Messages for one open stream; a slow reader loses messages and is told to resync"""
+
+    def __init__(self, user_id, max_queue=100):
+        self.user_id = user_id
+        self.lagged = False
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.lagged = True
+            return False
+
+    def get(self, timeout):
+        """Next (event, data), or None after `timeout` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class NotificationBroker:
+    """
+    Publish/subscribe of notification events per user, feeding the
+    /api/notifications/stream SSE endpoint. Messages are delivered to the
+    subscribers of this worker; with NOTIFICATION_BROKER_REDIS_URL they go
+    through a Redis channel so every worker receives them.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener = None
+        self._callbacks = []
+        self._origin = uuid.uuid4().hex
+        self.max_queue = 100
+        self.published = 0
+        self.dropped = 0
+
+    def init_app(self, app):
+        """Read broker settings from Flask app config"""
+        self.max_queue = app.config.get('NOTIFICATION_STREAM_QUEUE_SIZE', 100)
+        redis_url = app.config.get('NOTIFICATION_BROKER_REDIS_URL')
+
+        self._redis = None
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+                self._start_listener()
+            except ImportError:
+                logger.warning('NOTIFICATION_BROKER_REDIS_URL is set but redis is not installed, using in-process delivery')
+
+    # ---------- SUBSCRIBERS ----------
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def on_remote_message(self, callback):
+        """
+        Call callback(user_id, event, data) for every message published by
+        another worker (Redis only), e.g. to drop state cached in this worker
+        """
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def _deliver(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            if not subscription.put((event, data)):
+                self.dropped += 1
+
+    # ---------- PUBLISHING ----------
+
+    def publish(self, user_id, event, data):
+        """Send `event` to every open stream of `user_id` (on all workers with Redis)"""
+        self.publish_many([(user_id, event, data)])
+
+    def publish_many(self, messages):
+        """publish() for many (user_id, event, data) at once, e.g. a notification fan-out"""
+        if not messages:
+            return
+        self.published += len(messages)
+
+        if self._redis is None:
+            for user_id, event, data in messages:
+                self._deliver(user_id, event, data)
+            return
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for user_id, event, data in messages:
+                pipe.publish(CHANNEL, json.dumps({'user_id': user_id, 'event': event, 'data': data, 'origin': self._origin}, default=str))
+            pipe.execute()
+        except Exception as e:
+            # Streams are best-effort: clients still get everything from the REST endpoints
+            logger.error(f'Notification publish failed: {e}')
+
+    def _start_listener(self):
+        if self._listener is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(CHANNEL)
+                    for message in pubsub.listen():
+                        payload = json.loads(message['data'])
+                        self._deliver(payload['user_id'], payload['event'], payload['data'])
+                        if payload.get('origin') != self._origin:
+                            for callback in self._callbacks:
+                                callback(payload['user_id'], payload['event'], payload['data'])
+                except Exception as e:
+                    logger.error(f'Notification broker connection lost: {e}')
+                    time.sleep(1)
+
+        self._listener = threading.Thread(target=run, name='notification-broker-listener', daemon=True)
+        self._listener.start()
+
+    def stats(self):
+        with self._lock:
+            streams = sum(len(subscriptions) for subscriptions in self._subscribers.values())
+            users = len(self._subscribers)
+        return {
+            'backend': 'redis' if self._redis is not None else 'memory',
+            'streams': streams,
+            'users': users,
+            'published': self.published,
+            'dropped': self.dropped,
+        }
+
+
+# Singleton instance
+notification_broker = NotificationBroker()
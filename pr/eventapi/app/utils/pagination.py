@@ -0,0 +1,105 @@
+import base64
+import json
+from flask import request, current_app
+
+
+class InvalidQueryParam(ValueError):
+    """Malformed list query parameter; routes answer it with 400"""
+
+
+class InvalidCursor(InvalidQueryParam):
+    """Raised when ?cursor= cannot be decoded"""
+
+
+def encode_cursor(row, keys):
+    """Opaque cursor holding the sort-key values of the last row of a page"""
+    payload = json.dumps([row.get(key) for key in keys], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != len(keys) or any(v is None for v in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def _quote(value):
+    """Quote a value for use inside a PostgREST or=() filter"""
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{value}"'
+
+
+def keyset_filter(keys, values, desc=True):
+    """
+    PostgREST or=() filter selecting rows strictly after `values` in
+    (keys...) order, e.g. for keys (created_at, id) descending:
+    created_at.lt.X,and(created_at.eq.X,id.lt.Y)
+    """
+    op = 'lt' if desc else 'gt'
+    clauses = []
+    for i, key in enumerate(keys):
+        parts = [f'{k}.eq.{_quote(v)}' for k, v in zip(keys[:i], values[:i])]
+        parts.append(f'{key}.{op}.{_quote(values[i])}')
+        clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return ','.join(clauses)
+
+
+# Values per in_() filter, see in_chunks()
+IN_FILTER_MAX = 100
+
+
+def in_chunks(values, size=IN_FILTER_MAX):
+    """
+    Split values for in_() filters. The list goes into the request URL and
+    ~36 characters per UUID would push a few hundred ids past the 8-16 KB
+    limits of the gateways in front of PostgREST.
+    """
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def wants_all():
+    """Legacy unpaginated listing, requested with ?all=true"""
+    return request.args.get('all', '').lower() in ('1', 'true', 'yes')
+
+
+def page_limit():
+    default = current_app.config.get('PAGE_SIZE_DEFAULT', 20)
+    maximum = current_app.config.get('PAGE_SIZE_MAX', 100)
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+
+def paginate(query, keys, desc=True):
+    """
+    Order `query` by `keys` (the last key must be unique, e.g. id) and
+    fetch one page using ?limit= and ?cursor= from the request.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    With ?all=true the whole result set is returned, as before pagination.
+    """
+    for key in keys:
+        query = query.order(key, desc=desc)
+
+    if wants_all():
+        result = query.execute()
+        return result.data or [], None
+
+    limit = page_limit()
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.or_(keyset_filter(keys, decode_cursor(cursor, keys), desc))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).execute().data or []
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], keys)
+    return rows, None
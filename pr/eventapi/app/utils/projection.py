@@ -0,0 +1,47 @@
+from flask import request
+from app.utils.pagination import InvalidQueryParam
+
+# Columns of public.events a client may ask for with ?fields=
+EVENT_FIELDS = (
+    'id', 'title', 'description', 'location', 'location_address', 'date',
+    'event_date_time', 'image_url', 'organizer_name', 'organizer_image_url',
+    'attendees_count', 'category', 'created_by', 'created_at',
+)
+
+# Default for list endpoints: what event cards show (no long text columns)
+EVENT_SUMMARY_FIELDS = (
+    'id', 'title', 'location', 'date', 'event_date_time', 'image_url',
+    'organizer_name', 'organizer_image_url', 'attendees_count', 'category',
+    'created_by', 'created_at',
+)
+
+
+class InvalidFields(InvalidQueryParam):
+    """Raised when ?fields= names a column outside the allow-list"""
+
+
+def event_columns(default=EVENT_SUMMARY_FIELDS, required=()):
+    """
+    PostgREST select() string for events from ?fields=title,image_url,...
+    ?fields=summary / ?fields=full pick the predefined projections.
+    `id` and any `required` columns (e.g. pagination keys) are always included.
+    """
+    fields = request.args.get('fields', '').strip()
+
+    if not fields:
+        columns = list(default)
+    elif fields == 'summary':
+        columns = list(EVENT_SUMMARY_FIELDS)
+    elif fields == 'full':
+        columns = list(EVENT_FIELDS)
+    else:
+        columns = [c.strip() for c in fields.split(',') if c.strip()]
+        unknown = [c for c in columns if c not in EVENT_FIELDS]
+        if unknown:
+            raise InvalidFields(f'Unknown fields: {", ".join(unknown)}. Allowed: {", ".join(EVENT_FIELDS)}')
+
+    for column in ('id',) + tuple(required):
+        if column not in columns:
+            columns.append(column)
+
+    return ','.join(dict.fromkeys(columns))
@@ -0,0 +1,269 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import request, jsonify
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+# RATE_LIMIT_* config keys that are settings, not limits
+SETTINGS = {'RATE_LIMIT_ENABLED', 'RATE_LIMIT_BACKEND', 'RATE_LIMIT_SQLITE_PATH', 'RATE_LIMIT_REDIS_URL'}
+
+
+def parse_limit(spec):
+    """'10/minute' -> (10, 60); empty spec -> None (no limit); raises ValueError when malformed"""
+    if not spec:
+        return None
+    count, _, unit = str(spec).partition('/')
+    unit = unit.strip().rstrip('s')
+    if unit not in PERIODS or not count.strip().isdigit():
+        raise ValueError(f'Invalid rate limit {spec!r}, expected "<count>/<second|minute|hour|day>"')
+    return int(count), PERIODS[unit]
+
+
+def sliding_window(state, limit, period, now):
+    """
+    Sliding-window counter: the previous window's count is weighted by how
+    much of it still overlaps the last `period` seconds.
+    `state` is (window, current_count, previous_count) or None.
+    Returns (allowed, retry_after_seconds, new_state).
+    """
+    window = int(now // period)
+    elapsed = now - window * period
+    last_window, current, previous = state or (window, 0, 0)
+
+    if last_window == window - 1:
+        current, previous = 0, current
+    elif last_window != window:
+        current, previous = 0, 0
+
+    estimate = previous * (period - elapsed) / period + current
+    if estimate + 1 <= limit:
+        return True, 0, (window, current + 1, previous)
+
+    if current + 1 > limit or not previous:
+        retry_after = period - elapsed
+    else:
+        # Time until the weighted previous window has decayed enough
+        retry_after = period - elapsed - (limit - current - 1) * period / previous
+    return False, max(1, math.ceil(retry_after)), (window, current, previous)
+
+
+class MemoryLimitBackend:
+    """Per-process counters; fine for a single worker and for tests"""
+
+    def __init__(self, max_size=100000):
+        self._state = TTLCache(max_size=max_size)
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        with self._lock:
+            allowed, retry_after, state = sliding_window(self._state.get(key), limit, period, time.time())
+            self._state.set(key, state, ttl=2 * period)
+        return allowed, retry_after
+
+
+class SQLiteLimitBackend:
+    """Counters in a SQLite file shared by all workers of one host"""
+
+    # Expired counters are deleted once every SWEEP_EVERY hits of this process
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._hits = 0
+        conn = self._connect()
+        try:
+            # WAL: readers do not block the short write transactions of other workers
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                ' key TEXT PRIMARY KEY, window INTEGER NOT NULL, current INTEGER NOT NULL,'
+                ' previous INTEGER NOT NULL, expires_at REAL NOT NULL)'
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        conn = self._connect()
+        try:
+            # Write lock for the whole read-and-update
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT window, current, previous, expires_at FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            state = row[:3] if row is not None and row[3] > now else None
+            allowed, retry_after, state = sliding_window(state, limit, period, now)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window, current, previous, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (key, *state, now + 2 * period),
+            )
+
+            self._hits += 1
+            if self._hits % self.SWEEP_EVERY == 0:
+                conn.execute('DELETE FROM rate_limits WHERE expires_at < ?', (now,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return allowed, retry_after
+
+
+class RedisLimitBackend:
+    """Counters shared by all workers (requires the optional `redis` package)"""
+
+    # Same algorithm as sliding_window(), run atomically on the server clock
+    HIT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local window = math.floor(now / period)
+local elapsed = now - window * period
+
+local state = redis.call('HMGET', KEYS[1], 'w', 'cur', 'prev')
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+local last_window = tonumber(state[1]) or window
+if last_window == window - 1 then
+    previous = current
+    current = 0
+elseif last_window ~= window then
+    current = 0
+    previous = 0
+end
+
+local estimate = previous * (period - elapsed) / period + current
+if estimate + 1 <= limit then
+    redis.call('HSET', KEYS[1], 'w', window, 'cur', current + 1, 'prev', previous)
+    redis.call('EXPIRE', KEYS[1], 2 * period)
+    return {1, 0}
+end
+
+local retry_after = period - elapsed
+if current + 1 <= limit and previous > 0 then
+    retry_after = period - elapsed - (limit - current - 1) * period / previous
+end
+return {0, math.max(1, math.ceil(retry_after))}
+"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._hit = self._redis.register_script(self.HIT_SCRIPT)
+        self._prefix = prefix
+
+    def hit(self, key, limit, period):
+        allowed, retry_after = self._hit(keys=[self._prefix + key], args=[limit, period])
+        return bool(allowed), int(retry_after)
+
+
+# ---------- KEY FUNCTIONS ----------
+# Receive the route kwargs; returning None skips the limit for that request
+
+def by_ip(kwargs):
+    # The client address once ProxyFix has applied TRUSTED_PROXY_HOPS (see create_app)
+    return request.remote_addr
+
+
+def by_user(kwargs):
+    current_user = kwargs.get('current_user')
+    return current_user.user.id if current_user else None
+
+
+def by_json_field(*fields):
+    """Key from the first non-empty field of the JSON body (e.g. the email)"""
+    def key(kwargs):
+        data = request.get_json(silent=True) or {}
+        for field in fields:
+            value = str(data.get(field) or '').strip().lower()
+            if value:
+                return value
+        return None
+    return key
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limits for expensive routes (auth, SMTP).
+    Each limit has a name; its "<count>/<second|minute|hour|day>" spec is
+    read from RATE_LIMIT_<NAME> in the app config. Requests over the limit
+    get 429 with Retry-After. Counters are shared by the workers of a host
+    (RATE_LIMIT_BACKEND=sqlite) or of all hosts (redis); the memory backend
+    only suits a single worker.
+    """
+
+    def __init__(self):
+        self._backend = MemoryLimitBackend()
+        self._limits = {}
+        self.enabled = True
+        self.rejected = 0
+
+    def init_app(self, app):
+        """Read limiter settings from Flask app config"""
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+
+        # Parse every limit now: a typo fails at startup instead of on each request
+        self._limits = {}
+        for key, spec in app.config.items():
+            if key.startswith('RATE_LIMIT_') and key not in SETTINGS:
+                try:
+                    self._limits[key] = parse_limit(spec)
+                except ValueError as e:
+                    raise ValueError(f'{key}: {e}')
+
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'sqlite')
+        if backend == 'sqlite':
+            self._backend = SQLiteLimitBackend(app.config.get('RATE_LIMIT_SQLITE_PATH', 'rate_limits.db'))
+        elif backend == 'redis':
+            self._backend = RedisLimitBackend(app.config['RATE_LIMIT_REDIS_URL'])
+        else:
+            self._backend = MemoryLimitBackend()
+
+    def hit(self, name, key):
+        """Count one request for (name, key); returns (allowed, retry_after)"""
+        limit = self._limits.get(f'RATE_LIMIT_{name.upper()}')
+        if not self.enabled or limit is None or key is None:
+            return True, 0
+
+        try:
+            return self._backend.hit(f'{name}:{key}', *limit)
+        except Exception as e:
+            # Fail open: an unavailable store must not take the routes down
+            logger.error(f'Rate limiter unavailable: {e}')
+            return True, 0
+
+    def limit(self, name, key=by_ip):
+        """Decorator applying the RATE_LIMIT_<NAME> limit per key (IP by default)"""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                allowed, retry_after = self.hit(name, key(kwargs))
+                if not allowed:
+                    self.rejected += 1
+                    response = jsonify({'error': 'Too many requests, please try again later'})
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response, 429
+                return f(*args, **kwargs)
+            return decorated
+        return decorator
+
+    def stats(self):
+        return {'backend': type(self._backend).__name__, 'rejected': self.rejected}
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,318 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.utils.cache import TTLCache
+from app.utils.pagination import IN_FILTER_MAX, keyset_filter
+from app.utils.search import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Columns of the candidate events the scores are computed from
+CANDIDATE_COLUMNS = 'id,category,created_by,attendees_count,created_at,event_date_time'
+
+# Candidates are read in pages no larger than PostgREST's default max-rows
+CANDIDATE_PAGE_SIZE = 1000
+
+# Weight of each feature in the final score (features are in [0, 1])
+WEIGHTS = {
+    'category': 0.4,
+    'organizer': 0.3,
+    'popularity': 0.2,
+    'recency': 0.1,
+}
+
+# Affinity added to the category/organizer of each favorited event
+FAVORITE_AFFINITY = 0.5
+
+# Attendee counts lose half their weight every POPULARITY_HALF_LIFE_DAYS since
+# the event was published; events closer in time than RECENCY_HALF_LIFE_DAYS rank higher
+POPULARITY_HALF_LIFE_DAYS = 14
+RECENCY_HALF_LIFE_DAYS = 7
+
+
+class _Candidates:
+    """Feature vectors of the upcoming events, one row per event"""
+
+    def __init__(self, events, now):
+        self.ids = [event['id'] for event in events]
+
+        # Category and organizer as integer codes; the last code stands for "none"
+        self.categories = {}
+        self.organizers = {}
+        self.category = np.array([self._code(self.categories, (e.get('category') or '').lower()) for e in events], dtype=np.int32)
+        self.organizer = np.array([self._code(self.organizers, e.get('created_by')) for e in events], dtype=np.int32)
+        self.category[self.category < 0] = len(self.categories)
+        self.organizer[self.organizer < 0] = len(self.organizers)
+
+        attendees = np.array([e.get('attendees_count') or 0 for e in events], dtype=np.float64)
+        age_days = np.array([self._days(now, e.get('created_at')) for e in events], dtype=np.float64)
+        days_until = np.array([self._days(e.get('event_date_time'), now) for e in events], dtype=np.float64)
+
+        popularity = np.log1p(attendees) * np.exp2(-np.clip(age_days, 0, None) / POPULARITY_HALF_LIFE_DAYS)
+        self.popularity = popularity / popularity.max() if len(events) and popularity.max() > 0 else popularity
+        self.recency = np.exp2(-np.clip(days_until, 0, None) / RECENCY_HALF_LIFE_DAYS)
+        self.global_score = WEIGHTS['popularity'] * self.popularity + WEIGHTS['recency'] * self.recency
+        self.position = {event_id: i for i, event_id in enumerate(self.ids)}
+
+    @staticmethod
+    def _code(codes, value):
+        if not value:
+            return -1
+        return codes.setdefault(value, len(codes))
+
+    @staticmethod
+    def _days(later, earlier):
+        later, earlier = parse_datetime(later), parse_datetime(earlier)
+        if later is None or earlier is None:
+            return 0.0
+        return (later - earlier).total_seconds() / 86400
+
+
+class Recommender:
+    """
+    Personalized event recommendations. Upcoming events and users are turned
+    into feature vectors (category, organizer, popularity decaying with age,
+    closeness in time) and all candidates are scored at once with NumPy.
+    Rankings are cached per user; a background thread refreshes the
+    candidates and the rankings of recently active users.
+    """
+
+    def __init__(self):
+        self._candidates = None
+        self._cache = TTLCache(max_size=10000, ttl=900)
+        self._users = TTLCache(max_size=10000, ttl=120)
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+        self.enabled = True
+        self.max_candidates = 2000
+        self.depth = 50
+        self.max_favorites = IN_FILTER_MAX
+        self.refresh_interval = 300
+        self.active_seconds = 3600
+        self.max_active_users = 10000
+        self.computed = 0
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Read recommendation settings from Flask app config"""
+        self.enabled = app.config.get('RECOMMENDATIONS_ENABLED', True)
+        self.max_candidates = app.config.get('RECOMMENDATION_CANDIDATES', 2000)
+        self.depth = app.config.get('RECOMMENDATION_DEPTH', 50)
+        self.max_favorites = min(app.config.get('RECOMMENDATION_FAVORITES', IN_FILTER_MAX), IN_FILTER_MAX)
+        self.refresh_interval = app.config.get('RECOMMENDATION_REFRESH_SECONDS', 300)
+        self.active_seconds = app.config.get('RECOMMENDATION_ACTIVE_SECONDS', 3600)
+        self.max_active_users = app.config.get('RECOMMENDATION_ACTIVE_USERS', 10000)
+        self._cache = TTLCache(
+            max_size=self.max_active_users,
+            ttl=app.config.get('RECOMMENDATION_TTL_SECONDS', 900),
+        )
+        self._users = TTLCache(
+            max_size=self.max_active_users,
+            ttl=app.config.get('RECOMMENDATION_USER_TTL_SECONDS', 120),
+        )
+
+        if self.enabled:
+            self._start_refresher()
+
+    # ---------- DATA ----------
+
+    def load_candidates(self, supabase):
+        """The next `max_candidates` events, read in (event_date_time, id) order page by page"""
+        now = datetime.now(timezone.utc)
+        keys = ('event_date_time', 'id')
+        events = []
+        while len(events) < self.max_candidates:
+            page_size = min(CANDIDATE_PAGE_SIZE, self.max_candidates - len(events))
+            query = (
+                supabase.table('events').select(CANDIDATE_COLUMNS)
+                .gte('event_date_time', now.isoformat())
+                .order('event_date_time').order('id')
+            )
+            if events:
+                query = query.or_(keyset_filter(keys, [events[-1][key] for key in keys], desc=False))
+            rows = query.limit(page_size).execute().data or []
+            events.extend(rows)
+            if len(rows) < page_size:
+                break
+
+        self._candidates = _Candidates(events, now)
+        return self._candidates
+
+    def load_user(self, supabase, user_id):
+        """Selected categories, followed organizers and the `max_favorites` latest favorites of a user"""
+        from app.utils.user_cache import user_profile_cache
+
+        # Sequential on purpose: this may already run on a query_pool thread (home feed)
+        profile = user_profile_cache.get(user_id)
+        follows = supabase.table('organization_follows').select('organization_id').eq('follower_id', user_id).execute()
+        # Only the latest favorites, so their ids fit in one in_() filter
+        favorites = (
+            supabase.table('favorites').select('event_id').eq('user_id', user_id)
+            .order('created_at', desc=True).order('event_id', desc=True)
+            .limit(self.max_favorites).execute()
+        )
+        favorite_ids = [f['event_id'] for f in favorites.data or []]
+
+        favorites = []
+        if favorite_ids:
+            favorites = supabase.table('events').select('id,category,created_by').in_('id', favorite_ids).execute().data or []
+
+        return {
+            'categories': (profile or {}).get('selected_categories') or [],
+            'follows': [f['organization_id'] for f in follows.data or []],
+            'favorites': favorites,
+        }
+
+    def user_features(self, supabase, user_id):
+        """
+        load_user() result, cached for RECOMMENDATION_USER_TTL_SECONDS.
+        invalidate(user_id) only reaches this worker: the short TTL bounds how
+        long the other workers keep scoring with the old features.
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            user = self.load_user(supabase, user_id)
+            self._users.set(user_id, user)
+        return user
+
+    # ---------- SCORING ----------
+
+    def score(self, candidates, user_id, user):
+        """Ranked event ids (at most `depth`) for one user"""
+        category_affinity = np.zeros(len(candidates.categories) + 1)
+        organizer_affinity = np.zeros(len(candidates.organizers) + 1)
+
+        for category in user['categories']:
+            code = candidates.categories.get(str(category).lower())
+            if code is not None:
+                category_affinity[code] = 1.0
+        for organizer_id in user['follows']:
+            code = candidates.organizers.get(organizer_id)
+            if code is not None:
+                organizer_affinity[code] = 1.0
+        for event in user['favorites']:
+            code = candidates.categories.get((event.get('category') or '').lower())
+            if code is not None:
+                category_affinity[code] += FAVORITE_AFFINITY
+            code = candidates.organizers.get(event.get('created_by'))
+            if code is not None:
+                organizer_affinity[code] += FAVORITE_AFFINITY
+        # The "none" slot never contributes
+        category_affinity[-1] = organizer_affinity[-1] = 0.0
+
+        scores = (
+            WEIGHTS['category'] * np.minimum(category_affinity, 1.0)[candidates.category]
+            + WEIGHTS['organizer'] * np.minimum(organizer_affinity, 1.0)[candidates.organizer]
+            + candidates.global_score
+        )
+
+        # Nothing to discover in the user's own events or in favorites
+        excluded = [candidates.position[e['id']] for e in user['favorites'] if e['id'] in candidates.position]
+        own = candidates.organizers.get(user_id)
+        if own is not None:
+            scores[candidates.organizer == own] = -np.inf
+        scores[excluded] = -np.inf
+
+        return self._top(candidates, scores)
+
+    def _top(self, candidates, scores):
+        depth = min(self.depth, len(scores))
+        if depth == 0:
+            return []
+        top = np.argpartition(-scores, depth - 1)[:depth]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [candidates.ids[i] for i in top if np.isfinite(scores[i])]
+
+    def global_ranking(self, supabase=None):
+        """Ranking for anonymous users: popularity and closeness in time only"""
+        candidates = self._candidates or self.load_candidates(self._supabase(supabase))
+        return self._top(candidates, candidates.global_score.copy())
+
+    # ---------- QUERIES ----------
+
+    def recommend(self, user_id, limit, supabase=None):
+        """Event ids recommended to `user_id`, best first (at most `depth`)"""
+        with self._lock:
+            self._active[user_id] = time.time()
+            self._active.move_to_end(user_id)
+            while len(self._active) > self.max_active_users:
+                self._active.popitem(last=False)
+
+        ranking = self._cache.get(user_id)
+        if ranking is None:
+            ranking = self.compute(user_id, supabase)
+        return ranking[:limit]
+
+    def compute(self, user_id, supabase=None):
+        supabase = self._supabase(supabase)
+        candidates = self._candidates or self.load_candidates(supabase)
+        ranking = self.score(candidates, user_id, self.user_features(supabase, user_id))
+        self._cache.set(user_id, ranking)
+        self.computed += 1
+        return ranking
+
+    def invalidate(self, user_id):
+        """Drop a user's cached ranking and features after their categories, follows or favorites change"""
+        self._cache.delete(user_id)
+        self._users.delete(user_id)
+
+    @staticmethod
+    def _supabase(supabase):
+        if supabase is None:
+            from app.utils.supabase_client import supabase_client
+            supabase = supabase_client.client
+        return supabase
+
+    # ---------- BACKGROUND REFRESH ----------
+
+    def refresh(self):
+        """Reload the candidates and re-score recently active users (from their cached features)"""
+        supabase = self._supabase(None)
+        self.load_candidates(supabase)
+
+        cutoff = time.time() - self.active_seconds
+        with self._lock:
+            for user_id in [u for u, seen in self._active.items() if seen < cutoff]:
+                del self._active[user_id]
+            active = list(self._active)
+
+        for user_id in active:
+            try:
+                self.compute(user_id, supabase)
+            except Exception as e:
+                logger.error(f'Recommendations for {user_id} failed: {e}')
+            # Let request threads (or greenlets, under gevent) run
+            time.sleep(0)
+
+    def _start_refresher(self):
+        if self._refresher is not None or not self.refresh_interval:
+            return
+
+        def run():
+            while not self._stop.wait(self.refresh_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f'Recommendation refresh failed: {e}')
+
+        self._refresher = threading.Thread(target=run, name='recommendation-refresher', daemon=True)
+        self._refresher.start()
+
+    def stats(self):
+        return {
+            'candidates': len(self._candidates.ids) if self._candidates else 0,
+            'active_users': len(self._active),
+            'computed': self.computed,
+            'cache': self._cache.stats(),
+            'user_cache': self._users.stats(),
+        }
+
+
+# Singleton instance
+recommender = Recommender()
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import threading
+from functools import wraps
+
+from flask import request, make_response, current_app
+
+from app.utils.cache import TTLCache
+from app.utils.etag import content_etag, apply_etag
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """
+    In-process LRU/TTL storage. Each worker has its own copy and bump()
+    only reaches this worker: the others keep serving their entries until
+    the TTL runs out. Use RedisBackend when running several workers.
+    """
+
+    def __init__(self, max_size, ttl):
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def get_many(self, keys):
+        return [self._entries.get(key) for key in keys]
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, value, ttl=ttl)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tag):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisBackend:
+    """Shared storage across workers/boxes (requires the optional `redis` package)"""
+
+    def __init__(self, url, prefix='respcache:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._redis.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        values = self._redis.mget([self._prefix + key for key in keys])
+        return [json.loads(value) if value is not None else None for value in values]
+
+    def set(self, key, value, ttl):
+        self._redis.set(self._prefix + key, json.dumps(value), ex=int(ttl))
+
+    def versions(self, tags):
+        if not tags:
+            return []
+        values = self._redis.mget([f'{self._prefix}tag:{tag}' for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump(self, tag):
+        self._redis.incr(f'{self._prefix}tag:{tag}')
+
+
+class ResponseCache:
+    """
+    Cache of JSON GET responses keyed by route + normalized query args.
+    Every entry is tagged (e.g. 'events', 'event:<id>'); invalidate(tag)
+    bumps the tag's version so all entries built on it stop matching.
+    Entries keep the body's ETag, so a matching If-None-Match on a hit is
+    answered with 304 without touching the database.
+    Without RESPONSE_CACHE_REDIS_URL entries and invalidations are per
+    worker, so after a write other workers may serve the old response for
+    up to RESPONSE_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._backend = MemoryBackend(max_size=1024, ttl=30)
+        self.default_ttl = 30
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        """Read cache settings from Flask app config"""
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', 30)
+        max_size = app.config.get('RESPONSE_CACHE_SIZE', 1024)
+        redis_url = app.config.get('RESPONSE_CACHE_REDIS_URL')
+
+        self._backend = MemoryBackend(max_size=max_size, ttl=self.default_ttl)
+        if redis_url:
+            try:
+                self._backend = RedisBackend(redis_url)
+            except ImportError:
+                logger.warning('RESPONSE_CACHE_REDIS_URL is set but redis is not installed, using in-process cache')
+
+    @staticmethod
+    def _request_key(tags, versions):
+        args = sorted((key, sorted(values)) for key, values in request.args.lists())
+        raw = json.dumps([request.path, args, tags, versions], separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def cached(self, *tags, ttl=None):
+        """
+        Decorator for public GET routes returning JSON.
+        Tags may be strings or callables receiving the route kwargs,
+        e.g. lambda event_id: f'event:{event_id}'.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled:
+                    return apply_etag(make_response(f(*args, **kwargs)))
+
+                entry_tags = [tag(**kwargs) if callable(tag) else tag for tag in tags]
+                try:
+                    key = self._request_key(entry_tags, self._backend.versions(entry_tags))
+                    entry = self._backend.get(key)
+                except Exception as e:
+                    logger.error(f'Response cache unavailable: {e}')
+                    return apply_etag(make_response(f(*args, **kwargs)))
+
+                if entry is not None:
+                    self.hits += 1
+                    response = current_app.response_class(entry['body'], status=200, mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return apply_etag(response, entry.get('etag'))
+
+                self.misses += 1
+                response = make_response(f(*args, **kwargs))
+                etag = None
+                if response.status_code == 200 and response.is_json:
+                    body = response.get_data(as_text=True)
+                    etag = content_etag(body)
+                    try:
+                        self._backend.set(key, {'body': body, 'etag': etag}, ttl or self.default_ttl)
+                    except Exception as e:
+                        logger.error(f'Response cache write failed: {e}')
+                response.headers['X-Cache'] = 'MISS'
+                return apply_etag(response, etag)
+
+            return decorated
+        return decorator
+
+    def _object_keys(self, tagged_keys):
+        """Storage key of every object key, bound to the current versions of its tags"""
+        all_tags = sorted({tag for tags in tagged_keys.values() for tag in tags})
+        versions = dict(zip(all_tags, self._backend.versions(all_tags)))
+        storage_keys = {}
+        for key, tags in tagged_keys.items():
+            raw = json.dumps(['object', key, tags, [versions[tag] for tag in tags]], separators=(',', ':'))
+            storage_keys[key] = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        return storage_keys
+
+    def read_through(self, tagged_keys, load, ttl=None):
+        """
+        Cached values for many keys at once, e.g. event rows for a batch lookup.
+        `tagged_keys` maps each key to its tags; the keys that are not cached
+        are passed to load(keys), which returns {key: value} for the ones it
+        found, and those are stored. Returns {key: value}.
+        """
+        if not self.enabled or not tagged_keys:
+            return load(list(tagged_keys)) if tagged_keys else {}
+
+        try:
+            storage_keys = self._object_keys(tagged_keys)
+            cached = self._backend.get_many(list(storage_keys.values()))
+        except Exception as e:
+            logger.error(f'Response cache unavailable: {e}')
+            return load(list(tagged_keys))
+
+        values = {key: value for key, value in zip(storage_keys, cached) if value is not None}
+        missing = [key for key in tagged_keys if key not in values]
+        self.hits += len(values)
+        self.misses += len(missing)
+
+        if missing:
+            loaded = load(missing)
+            for key, value in loaded.items():
+                try:
+                    self._backend.set(storage_keys[key], value, ttl or self.default_ttl)
+                except Exception as e:
+                    logger.error(f'Response cache write failed: {e}')
+            values.update(loaded)
+        return values
+
+    def invalidate(self, *tags):
+        """Drop every cached response built on any of these tags"""
+        for tag in tags:
+            try:
+                self._backend.bump(tag)
+                self.invalidations += 1
+            except Exception as e:
+                logger.error(f'Response cache invalidation failed for {tag}: {e}')
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self._backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+def event_tag(event_id):
+    return f'event:{event_id}'
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,313 @@
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Indexed event columns and their weight in the ranking
+SEARCH_FIELDS = {
+    'title': 3.0,
+    'organizer_name': 2.0,
+    'location': 1.5,
+    'description': 1.0,
+}
+
+# Columns loaded to (re)build the index
+INDEX_COLUMNS = ('id', 'category', 'event_date_time') + tuple(SEARCH_FIELDS)
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in into is it of on or the to with'.split()
+)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A query word also matches indexed words it is a prefix of, scored lower
+PREFIX_WEIGHT = 0.7
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    """Lowercase words without accents ("Café-Concert" -> ["cafe", "concert"])"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+
+def parse_datetime(value):
+    """ISO date/datetime -> naive UTC datetime (None if missing or malformed)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class _Postings:
+    """Inverted index data: term -> {event_id: weighted term frequency}"""
+
+    def __init__(self):
+        self.postings = {}
+        self.terms = []          # sorted vocabulary, for prefix lookups
+        self.doc_terms = {}      # event_id -> {term: weighted tf}
+        self.doc_length = {}     # event_id -> weighted length
+        self.filters = {}        # event_id -> (category, event datetime)
+        self.total_length = 0.0
+        self._impacts = {}       # term -> {event_id: BM25 score}, dropped on any change
+
+    def add(self, event):
+        event_id = event['id']
+        self.remove(event_id)
+        self._impacts.clear()
+
+        frequencies = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(event.get(field)):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        length = sum(frequencies.values())
+
+        for term, frequency in frequencies.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            posting[event_id] = frequency
+
+        self.doc_terms[event_id] = frequencies
+        self.doc_length[event_id] = length
+        self.filters[event_id] = ((event.get('category') or '').lower(), parse_datetime(event.get('event_date_time')))
+        self.total_length += length
+
+    def remove(self, event_id):
+        frequencies = self.doc_terms.pop(event_id, None)
+        if frequencies is None:
+            return
+        self._impacts.clear()
+        for term in frequencies:
+            posting = self.postings[term]
+            del posting[event_id]
+            if not posting:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+        self.total_length -= self.doc_length.pop(event_id)
+        del self.filters[event_id]
+
+    def expand(self, token):
+        """Indexed terms starting with `token`: [(term, weight)], exact match first"""
+        expansions = [(token, 1.0)] if token in self.postings else []
+        start = bisect.bisect_right(self.terms, token)
+        for term in self.terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            expansions.append((term, PREFIX_WEIGHT))
+        return expansions
+
+    def impact(self, term):
+        """BM25 score of `term` for every event containing it"""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            posting = self.postings[term]
+            count = len(self.doc_terms)
+            average_length = self.total_length / count
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            impacts = self._impacts[term] = {
+                event_id: idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * self.doc_length[event_id] / average_length))
+                for event_id, frequency in posting.items()
+            }
+        return impacts
+
+    def word_scores(self, token):
+        """{event_id: score} for one query word: best of its exact and prefix matches"""
+        expansions = self.expand(token)
+        if len(expansions) == 1 and expansions[0][1] == 1.0:
+            return self.impact(token)
+
+        scores = {}
+        for term, weight in expansions:
+            for event_id, score in self.impact(term).items():
+                score *= weight
+                if score > scores.get(event_id, 0.0):
+                    scores[event_id] = score
+        return scores
+
+
+class EventSearchIndex:
+    """
+    In-process full-text index over event title, description, location and
+    organizer name, with prefix matching and BM25 ranking.
+    Built at startup, updated by the event write routes and rebuilt every
+    SEARCH_REBUILD_SECONDS to pick up changes made by other workers.
+    """
+
+    def __init__(self):
+        self._index = _Postings()
+        self._lock = threading.RLock()
+        self._pending = None
+        self.ready = False
+        self.enabled = True
+        self.rebuild_interval = 300
+        self.page_size = 1000
+        self.last_build = None
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Read search settings from Flask app config and start building the index"""
+        self.enabled = app.config.get('SEARCH_INDEX_ENABLED', True)
+        self.rebuild_interval = app.config.get('SEARCH_REBUILD_SECONDS', 300)
+        self.page_size = app.config.get('SEARCH_LOAD_PAGE_SIZE', 1000)
+
+        if self.enabled:
+            self._start_refresher()
+
+    # ---------- UPDATES ----------
+
+    def add(self, event):
+        """Index a new or updated event row (must include id and the indexed columns)"""
+        with self._lock:
+            self._index.add(event)
+            if self._pending is not None:
+                self._pending.append(('add', event))
+
+    def remove(self, event_id):
+        with self._lock:
+            self._index.remove(event_id)
+            if self._pending is not None:
+                self._pending.append(('remove', event_id))
+
+    def rebuild(self, events):
+        """Replace the index with `events`; updates made while it was built are replayed"""
+        with self._lock:
+            self._pending = []
+
+        try:
+            index = _Postings()
+            for position, event in enumerate(events, 1):
+                index.add(event)
+                # Let request threads (or greenlets, under gevent) run during long builds
+                if position % 500 == 0:
+                    time.sleep(0)
+
+            with self._lock:
+                for op, arg in self._pending:
+                    if op == 'add':
+                        index.add(arg)
+                    else:
+                        index.remove(arg)
+                self._index = index
+                self.ready = True
+                self.last_build = datetime.now().isoformat()
+        finally:
+            with self._lock:
+                self._pending = None
+        logger.info(f'Search index built with {len(index.doc_terms)} events')
+
+    def load(self, supabase):
+        """All events (indexed columns only), read in id order page by page"""
+        last_id = None
+        while True:
+            query = supabase.table('events').select(','.join(INDEX_COLUMNS)).order('id').limit(self.page_size)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data or []
+            yield from rows
+            if len(rows) < self.page_size:
+                return
+            last_id = rows[-1]['id']
+
+    def refresh(self):
+        from app.utils.supabase_client import supabase_client
+        self.rebuild(self.load(supabase_client.client))
+
+    def _start_refresher(self):
+        if self._refresher is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f'Search index build failed: {e}')
+                if not self.rebuild_interval or self._stop.wait(self.rebuild_interval):
+                    return
+
+        self._refresher = threading.Thread(target=run, name='search-index-refresher', daemon=True)
+        self._refresher.start()
+
+    # ---------- QUERIES ----------
+
+    def search(self, q, category=None, date_from=None, date_to=None, limit=None, offset=0):
+        """
+        Events matching every word of `q` (words may be prefixes), best
+        match first. category/date_from/date_to narrow the results; with an
+        empty query all events passing the filters are returned, soonest first.
+        Returns (total, [(event_id, score)]) for the requested slice.
+        """
+        tokens = list(dict.fromkeys(tokenize(q)))
+        category = (category or '').lower() or None
+        end = None if limit is None else offset + limit
+
+        with self._lock:
+            index = self._index
+
+            def keep(event_id):
+                event_category, event_date = index.filters[event_id]
+                if category and event_category != category:
+                    return False
+                if (date_from or date_to) and event_date is None:
+                    return False
+                if date_from and event_date < date_from:
+                    return False
+                if date_to and event_date > date_to:
+                    return False
+                return True
+
+            if not tokens:
+                matches = [event_id for event_id in index.filters if keep(event_id)]
+                matches.sort(key=lambda event_id: (index.filters[event_id][1] or datetime.max, event_id))
+                return len(matches), [(event_id, 0.0) for event_id in matches[offset:end]]
+
+            # Start from the rarest word; the others only narrow its matches
+            per_word = sorted((index.word_scores(token) for token in tokens), key=len)
+            scores = {event_id: score for event_id, score in per_word[0].items() if keep(event_id)}
+            for word_scores in per_word[1:]:
+                scores = {event_id: score + word_scores[event_id] for event_id, score in scores.items() if event_id in word_scores}
+
+        def rank(item):
+            return -item[1], item[0]
+
+        if end is None:
+            return len(scores), sorted(scores.items(), key=rank)
+        return len(scores), heapq.nsmallest(end, scores.items(), key=rank)[offset:]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'events': len(self._index.doc_terms),
+                'terms': len(self._index.terms),
+                'last_build': self.last_build,
+            }
+
+
+# Singleton instance
+search_index = EventSearchIndex()
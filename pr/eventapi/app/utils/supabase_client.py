@@ -1,15 +1,46 @@
-from supabase import create_client, Client
+from supabase import Client
 from flask import current_app
 import logging
+import jwt
+from app.utils.jwt_verifier import (
+    jwt_verifier,
+    TokenCache,
+    LocalVerificationUnavailable,
+    unverified_expiry,
+    user_response_from_claims,
+)
+from app.utils.http_pool import http_pool
 
 logger = logging.getLogger(__name__)
 
+class PooledClient(Client):
+    """Supabase client whose sub-clients (also the ones rebuilt on auth events) use the shared HTTP pool"""
+    
+    @staticmethod
+    def _init_postgrest_client(*args, **kwargs):
+        postgrest = Client._init_postgrest_client(*args, **kwargs)
+        http_pool.attach(postgrest.session)
+        return postgrest
+    
+    @staticmethod
+    def _init_storage_client(*args, **kwargs):
+        storage = Client._init_storage_client(*args, **kwargs)
+        http_pool.attach(storage.session)
+        return storage
+    
+    @staticmethod
+    def _init_supabase_auth_client(*args, **kwargs):
+        auth = Client._init_supabase_auth_client(*args, **kwargs)
+        http_pool.attach(auth._http_client)
+        return auth
+
 class SupabaseClient:
     _instance = None
     _client: Client = None
     _anon_client: Client = None
     _url: str = None
     _anon_key: str = None
+    _token_cache: TokenCache = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -23,20 +54,27 @@ class SupabaseClient:
         self._anon_key = app.config.get('SUPABASE_ANON_KEY') or app.config.get('SUPABASE_KEY')
         service_key = app.config.get('SUPABASE_KEY')
         
+        # Both clients share one keep-alive connection pool
+        http_pool.init_app(app)
+        
         # Create client with anon key for client-side auth
-        self._anon_client = create_client(
+        self._anon_client = PooledClient.create(
             self._url,
             self._anon_key
         )
         
         # Create client with service key for admin operations (if different)
         if service_key and service_key != self._anon_key:
-            self._client = create_client(
+            self._client = PooledClient.create(
                 self._url,
                 service_key
             )
         else:
             self._client = self._anon_client
+        
+        # Local JWT verification + cache of already verified tokens
+        jwt_verifier.init_app(app)
+        self._token_cache = TokenCache(max_size=app.config.get('TOKEN_CACHE_SIZE', 1024))
     
     @property
     def client(self) -> Client:
@@ -54,30 +92,40 @@ class SupabaseClient:
     
     def get_user_from_token(self, token: str):
         """
-        Get user from JWT token by validating with Supabase.
-        Creates a temporary client instance to avoid session conflicts.
+        Get user from JWT token.
+        The token is verified locally (signature, expiry, audience) with the
+        project JWT secret or JWKS; Supabase auth is only called when no key
+        is available to check it. Verified tokens are cached until they expire.
         """
         if not token:
             logger.error("Token is empty")
             return None
+        
+        cached = self._token_cache.get(token) if self._token_cache else None
+        if cached is not None:
+            return cached
             
         try:
-            # Create a new client instance with anon key for token validation
-            # This ensures we don't interfere with the main client's session
-            temp_client = create_client(
-                self._url,
-                self._anon_key
-            )
-            
-            # Validate token by calling get_user with the JWT token
-            # This will verify the token signature and expiration
-            user_response = temp_client.auth.get_user(token)
+            try:
+                claims = jwt_verifier.verify(token)
+                user_response = user_response_from_claims(claims)
+                expires_at = claims['exp']
+            except LocalVerificationUnavailable as e:
+                logger.debug(f"Local token verification unavailable, asking Supabase: {e}")
+                user_response = self.anon_client.auth.get_user(token)
+                expires_at = unverified_expiry(token)
             
             if user_response and user_response.user:
+                if self._token_cache is not None:
+                    self._token_cache.set(token, user_response, expires_at)
                 return user_response
             else:
                 logger.error("get_user returned None or no user")
                 return None
+        
+        except jwt.InvalidTokenError as e:
+            logger.error(f"Token validation failed: {e}")
+            return None
                     
         except Exception as e:
             # Log the actual error for debugging
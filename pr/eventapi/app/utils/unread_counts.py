@@ -0,0 +1,74 @@
+from app.utils.cache import TTLCache
+from app.utils.notification_broker import notification_broker
+from app.utils.pagination import in_chunks
+
+
+class UnreadCounter:
+    """
+    Unread notification count per user. The source of truth is the
+    notification_counters table, kept exact by a trigger (see
+    database_unread_counts.sql); counts are cached in process and adjusted by
+    the routes that change notifications, so a poll is a dictionary lookup.
+    Changes made by other workers arrive through the notification broker
+    when NOTIFICATION_BROKER_REDIS_URL is set; otherwise the cache TTL bounds
+    how long they go unseen.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(max_size=10000, ttl=30)
+
+    def init_app(self, app):
+        """Read counter cache settings from Flask app config"""
+        self._cache = TTLCache(
+            max_size=app.config.get('UNREAD_COUNT_CACHE_SIZE', 10000),
+            ttl=app.config.get('UNREAD_COUNT_CACHE_TTL', 30),
+        )
+        notification_broker.on_remote_message(self._on_remote_message)
+
+    def get(self, supabase, user_id):
+        count = self._cache.get(user_id)
+        if count is None:
+            result = supabase.table('notification_counters').select('unread_count').eq('user_id', user_id).execute()
+            count = result.data[0]['unread_count'] if result.data else 0
+            self._cache.set(user_id, count)
+        return count
+
+    def get_many(self, supabase, user_ids):
+        """{user_id: count}, reading the users that are not cached in batches"""
+        counts = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            count = self._cache.get(user_id)
+            if count is None:
+                missing.append(user_id)
+            else:
+                counts[user_id] = count
+
+        if missing:
+            found = {}
+            for user_ids in in_chunks(missing):
+                result = supabase.table('notification_counters').select('user_id,unread_count').in_('user_id', user_ids).execute()
+                found.update({row['user_id']: row['unread_count'] for row in result.data or []})
+            for user_id in missing:
+                counts[user_id] = found.get(user_id, 0)
+                self._cache.set(user_id, counts[user_id])
+        return counts
+
+    def adjust(self, user_id, delta):
+        """Apply a change to the cached count (if any); the database trigger does the same"""
+        self._cache.update(user_id, lambda count: max(0, count + delta))
+
+    def reset(self, user_id):
+        self._cache.update(user_id, lambda count: 0)
+
+    def _on_remote_message(self, user_id, event, data):
+        # Another worker changed the user's notifications: reread the counter table
+        if event in ('notification', 'unread_count'):
+            self._cache.delete(user_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+# Singleton instance
+unread_counter = UnreadCounter()
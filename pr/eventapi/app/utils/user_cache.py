@@ -0,0 +1,56 @@
+from flask import g
+from app.utils.cache import TTLCache
+from app.utils.supabase_client import supabase_client
+
+# Columns of public.users that handlers need on most requests
+PROFILE_COLUMNS = 'id, email, username, role, profile_photo_url, selected_categories'
+
+
+class UserProfileCache:
+    """
+    Short-lived cache of rows from the users table (role, username, photo...).
+    Routes that change these columns must call invalidate(user_id).
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(max_size=4096, ttl=60)
+
+    def init_app(self, app):
+        """Read cache settings from Flask app config"""
+        self._cache = TTLCache(
+            max_size=app.config.get('USER_CACHE_SIZE', 4096),
+            ttl=app.config.get('USER_CACHE_TTL', 60),
+        )
+
+    def get(self, user_id):
+        """Get a user's profile row, querying Supabase only on a cache miss"""
+        profile = self._cache.get(user_id)
+        if profile is None:
+            supabase = supabase_client.client
+            result = supabase.table('users').select(PROFILE_COLUMNS).eq('id', user_id).execute()
+            if not result.data:
+                return None
+            profile = result.data[0]
+            self._cache.set(user_id, profile)
+
+        return dict(profile)
+
+    def invalidate(self, user_id):
+        self._cache.delete(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def get_current_profile(current_user):
+    """Profile of the authenticated user, loaded at most once per request"""
+    if 'current_profile' not in g:
+        g.current_profile = user_profile_cache.get(current_user.user.id)
+    return g.current_profile
+
+
+# Singleton instance
+user_profile_cache = UserProfileCache()
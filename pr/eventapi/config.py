@@ -6,9 +6,140 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     SUPABASE_URL = os.getenv('SUPABASE_URL')
+    # Service role key: the database functions (database_*.sql) are only executable by service_role
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
     SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
     
+    # Local JWT verification (Project Settings > API > JWT Secret / JWKS)
+    SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET')
+    SUPABASE_JWKS_URL = os.getenv('SUPABASE_JWKS_URL')  # defaults to <SUPABASE_URL>/auth/v1/.well-known/jwks.json
+    SUPABASE_JWT_AUDIENCE = os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated')
+    JWT_LEEWAY_SECONDS = int(os.getenv('JWT_LEEWAY_SECONDS', 0))
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+    
+    # Cache of users rows (role, username, photo) used by auth decorators
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 4096))
+    
+    # Keyset pagination of list endpoints (?limit=&cursor=)
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 20))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 100))
+    EVENT_BATCH_MAX = int(os.getenv('EVENT_BATCH_MAX', 100))
+    REGISTRATION_BULK_MAX = int(os.getenv('REGISTRATION_BULK_MAX', 500))
+    
+    # Background jobs (follower fan-out, emails)
+    BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 4))
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 3600))
+    # Share job status between workers (GET /api/events/jobs/<id> from any worker)
+    JOB_REDIS_URL = os.getenv('JOB_REDIS_URL')
+    
+    # Outgoing mail (pooled SMTP transport, see app/utils/email_utils.py)
+    # Credentials come only from the environment; without them mail is disabled.
+    # For a local stand-in without auth: MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=false MAIL_ENABLED=true
+    MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'true').lower() in ('1', 'true', 'yes')
+    MAIL_USERNAME = os.getenv('MAIL_USERNAME')
+    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_SENDER = os.getenv('MAIL_SENDER', MAIL_USERNAME)
+    MAIL_ENABLED = os.getenv('MAIL_ENABLED', 'true' if MAIL_USERNAME and MAIL_PASSWORD else 'false').lower() in ('1', 'true', 'yes')
+    MAIL_TIMEOUT = int(os.getenv('MAIL_TIMEOUT', 30))
+    MAIL_POOL_SIZE = int(os.getenv('MAIL_POOL_SIZE', 2))
+    MAIL_KEEPALIVE_SECONDS = int(os.getenv('MAIL_KEEPALIVE_SECONDS', 60))
+    
+    # Cache of public event feeds. Without RESPONSE_CACHE_REDIS_URL every worker has
+    # its own cache and invalidations only reach the worker that made the write:
+    # the others may serve stale responses for up to RESPONSE_CACHE_TTL seconds.
+    # Set it (or keep the TTL short) when running several workers.
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 30))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL')
+    
+    # /metrics is served only when METRICS_TOKEN is set, to requests sending "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # Concurrent queries of aggregate endpoints (e.g. /api/feed/home)
+    QUERY_POOL_WORKERS = int(os.getenv('QUERY_POOL_WORKERS', 16))
+    FEED_TIMEOUT_SECONDS = float(os.getenv('FEED_TIMEOUT_SECONDS', 5))
+    QUERY_DEADLINE_SECONDS = float(os.getenv('QUERY_DEADLINE_SECONDS', 10))
+    
+    # Shared HTTP connection pool for all Supabase traffic (see app/utils/http_pool.py)
+    SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv('SUPABASE_HTTP_MAX_CONNECTIONS', 100))
+    SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv('SUPABASE_HTTP_MAX_KEEPALIVE', 20))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_HTTP_KEEPALIVE_EXPIRY', 30))
+    SUPABASE_HTTP2 = os.getenv('SUPABASE_HTTP2', 'true').lower() in ('1', 'true', 'yes')
+    SUPABASE_HTTP_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_HTTP_CONNECT_TIMEOUT', 5))
+    SUPABASE_HTTP_READ_TIMEOUT = float(os.getenv('SUPABASE_HTTP_READ_TIMEOUT', 30))
+    SUPABASE_HTTP_POOL_TIMEOUT = float(os.getenv('SUPABASE_HTTP_POOL_TIMEOUT', 10))
+    
+    # One-time verification codes: sqlite (file shared by the workers of one host),
+    # redis (several hosts) or memory (single worker only, e.g. tests)
+    VERIFICATION_CODE_BACKEND = os.getenv('VERIFICATION_CODE_BACKEND', 'sqlite')
+    VERIFICATION_CODE_SQLITE_PATH = os.getenv('VERIFICATION_CODE_SQLITE_PATH', 'verification_codes.db')
+    VERIFICATION_CODE_REDIS_URL = os.getenv('VERIFICATION_CODE_REDIS_URL')
+    VERIFICATION_CODE_TTL = int(os.getenv('VERIFICATION_CODE_TTL', 600))
+    VERIFICATION_CODE_MAX_ATTEMPTS = int(os.getenv('VERIFICATION_CODE_MAX_ATTEMPTS', 5))
+    VERIFICATION_CODE_SWEEP_SECONDS = int(os.getenv('VERIFICATION_CODE_SWEEP_SECONDS', 60))
+    
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted (opt-in);
+    # only set it when gunicorn is unreachable except through them, or clients could spoof their IP
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+    
+    # Rate limits of auth / email-sending routes: "<count>/<second|minute|hour|day>", empty disables one
+    # Counters: sqlite (file shared by the workers of one host, default), redis (several hosts,
+    # default when RATE_LIMIT_REDIS_URL is set) or memory (single worker only, e.g. tests)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'redis' if RATE_LIMIT_REDIS_URL else 'sqlite')
+    RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH', 'rate_limits.db')
+    RATE_LIMIT_LOGIN_IP = os.getenv('RATE_LIMIT_LOGIN_IP', '30/minute')
+    RATE_LIMIT_LOGIN_ACCOUNT = os.getenv('RATE_LIMIT_LOGIN_ACCOUNT', '10/minute')
+    RATE_LIMIT_SIGNUP_IP = os.getenv('RATE_LIMIT_SIGNUP_IP', '20/hour')
+    RATE_LIMIT_VERIFICATION_IP = os.getenv('RATE_LIMIT_VERIFICATION_IP', '20/hour')
+    RATE_LIMIT_VERIFICATION_EMAIL = os.getenv('RATE_LIMIT_VERIFICATION_EMAIL', '5/hour')
+    RATE_LIMIT_RESET_PASSWORD_IP = os.getenv('RATE_LIMIT_RESET_PASSWORD_IP', '20/hour')
+    RATE_LIMIT_RESET_PASSWORD_EMAIL = os.getenv('RATE_LIMIT_RESET_PASSWORD_EMAIL', '5/hour')
+    RATE_LIMIT_DELETE_ACCOUNT_USER = os.getenv('RATE_LIMIT_DELETE_ACCOUNT_USER', '5/hour')
+    
+    # Upload image pipeline (see app/utils/images.py); IMAGE_FORMAT is webp or jpeg
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+    IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'webp')
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+    IMAGE_MAX_UPLOAD_BYTES = int(os.getenv('IMAGE_MAX_UPLOAD_BYTES', 15 * 1024 * 1024))
+    IMAGE_TIMEOUT_SECONDS = int(os.getenv('IMAGE_TIMEOUT_SECONDS', 30))
+    
+    # In-process event search index (see app/utils/search.py), rebuilt from the
+    # database every SEARCH_REBUILD_SECONDS to catch writes made by other workers
+    SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SEARCH_REBUILD_SECONDS = int(os.getenv('SEARCH_REBUILD_SECONDS', 300))
+    SEARCH_LOAD_PAGE_SIZE = int(os.getenv('SEARCH_LOAD_PAGE_SIZE', 1000))
+    
+    # Personalized recommendations (see app/utils/recommendations.py)
+    RECOMMENDATIONS_ENABLED = os.getenv('RECOMMENDATIONS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RECOMMENDATION_CANDIDATES = int(os.getenv('RECOMMENDATION_CANDIDATES', 2000))
+    RECOMMENDATION_DEPTH = int(os.getenv('RECOMMENDATION_DEPTH', 50))
+    RECOMMENDATION_TTL_SECONDS = int(os.getenv('RECOMMENDATION_TTL_SECONDS', 900))
+    # Kept short: a user's changes only invalidate the worker that handled them
+    RECOMMENDATION_USER_TTL_SECONDS = int(os.getenv('RECOMMENDATION_USER_TTL_SECONDS', 120))
+    # Latest favorites taken into account (at most 100, one in_() filter)
+    RECOMMENDATION_FAVORITES = int(os.getenv('RECOMMENDATION_FAVORITES', 100))
+    RECOMMENDATION_REFRESH_SECONDS = int(os.getenv('RECOMMENDATION_REFRESH_SECONDS', 300))
+    RECOMMENDATION_ACTIVE_SECONDS = int(os.getenv('RECOMMENDATION_ACTIVE_SECONDS', 3600))
+    RECOMMENDATION_ACTIVE_USERS = int(os.getenv('RECOMMENDATION_ACTIVE_USERS', 10000))
+    
+    # In-process cache of the unread notification counters (see database_unread_counts.sql)
+    UNREAD_COUNT_CACHE_SIZE = int(os.getenv('UNREAD_COUNT_CACHE_SIZE', 10000))
+    UNREAD_COUNT_CACHE_TTL = int(os.getenv('UNREAD_COUNT_CACHE_TTL', 30))
+    
+    # Notification push stream (/api/notifications/stream); set the Redis URL
+    # so notifications created on one worker reach streams held by the others
+    NOTIFICATION_BROKER_REDIS_URL = os.getenv('NOTIFICATION_BROKER_REDIS_URL')
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS = int(os.getenv('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15))
+    NOTIFICATION_STREAM_MAX_SECONDS = int(os.getenv('NOTIFICATION_STREAM_MAX_SECONDS', 300))
+    NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv('NOTIFICATION_STREAM_QUEUE_SIZE', 100))
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
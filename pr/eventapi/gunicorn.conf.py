@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+
+# Gunicorn settings: gunicorn -c gunicorn.conf.py run:app
+#
+# The default worker class is gevent. Every request runs in a greenlet and
+# the standard library is monkey-patched, so blocking I/O done by the
+# synchronous Supabase client (httpx), SMTP and the JWKS fetch yields to
+# other requests instead of holding the worker. One process then serves
+# up to WORKER_CONNECTIONS concurrent requests, including the long-lived
+# /api/notifications/stream connections.
+# Set GUNICORN_WORKER_CLASS=sync to go back to one request per process.
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+
+# In-process verification codes are not visible to the other workers
+if workers > 1 and os.getenv('VERIFICATION_CODE_BACKEND') == 'memory':
+    raise SystemExit('VERIFICATION_CODE_BACKEND=memory only works with GUNICORN_WORKERS=1; use sqlite or redis')
+
+# In-process rate limit counters would give every client GUNICORN_WORKERS times the limit
+if workers > 1 and os.getenv('RATE_LIMIT_BACKEND') == 'memory':
+    raise SystemExit('RATE_LIMIT_BACKEND=memory only works with GUNICORN_WORKERS=1; use sqlite or redis')
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Do not preload: the gevent worker must patch the standard library
+# before the app (and the Supabase clients) are imported
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    # The response cache is per worker without Redis: a write is only invalidated
+    # in the worker handling it, the others serve their entries until the TTL
+    if workers > 1 and not os.getenv('RESPONSE_CACHE_REDIS_URL'):
+        server.log.warning(
+            'Response cache is per worker: responses may be stale for RESPONSE_CACHE_TTL seconds '
+            'after a write, set RESPONSE_CACHE_REDIS_URL to share it between workers'
+        )
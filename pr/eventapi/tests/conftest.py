@@ -0,0 +1,190 @@
+import os
+import re
+from types import SimpleNamespace
+
+import time
+
+import jwt
+import pytest
+
+# Secret the test access tokens are signed with (verified locally, see jwt_verifier)
+JWT_SECRET = 'test-secret-with-enough-bytes-for-hs256'
+
+# Settings read by config.py at import time: no background threads, no network
+os.environ.setdefault('SUPABASE_URL', 'https://test.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', jwt.encode({'role': 'service_role'}, JWT_SECRET))
+os.environ['SUPABASE_JWT_SECRET'] = JWT_SECRET
+os.environ['SEARCH_INDEX_ENABLED'] = 'false'
+os.environ['RECOMMENDATIONS_ENABLED'] = 'false'
+os.environ['VERIFICATION_CODE_BACKEND'] = 'memory'
+os.environ['VERIFICATION_CODE_SWEEP_SECONDS'] = '0'
+os.environ['RATE_LIMIT_BACKEND'] = 'memory'
+os.environ['MAIL_ENABLED'] = 'false'
+
+from app import create_app  # noqa: E402
+from app.utils.supabase_client import supabase_client  # noqa: E402
+
+
+# ========== STUB SUPABASE CLIENT ==========
+
+CONDITION = re.compile(r'(\w+)\.(eq|gt|gte|lt|lte)\."((?:[^"\\]|\\.)*)"')
+
+OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+
+def parse_or(expression):
+    """Row predicate for a PostgREST or=() filter of quoted conditions and and() groups"""
+    clauses, depth, start = [], 0, 0
+    for i, char in enumerate(expression + ','):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            clauses.append(expression[start:i])
+            start = i + 1
+
+    groups = [
+        [(column, OPERATORS[op], value.replace('\\"', '"')) for column, op, value in CONDITION.findall(clause)]
+        for clause in clauses
+    ]
+    return lambda row: any(
+        all(row.get(column) is not None and op(str(row.get(column)), value) for column, op, value in group)
+        for group in groups
+    )
+
+
+class FakeQuery:
+    """The part of the postgrest query builder the app uses, over in-memory rows"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.rows = None
+        self.values = None
+        self.deleting = False
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def _filter(self, predicate):
+        self.filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) >= value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) < value)
+
+    def in_(self, column, values):
+        self.db.in_filters.append((self.table, column, len(values)))
+        values = set(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def or_(self, expression):
+        return self._filter(parse_or(expression))
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def insert(self, rows):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def execute(self):
+        table = self.db.tables.setdefault(self.table, [])
+        if self.rows is not None:
+            table.extend(self.rows)
+            return SimpleNamespace(data=list(self.rows), count=None)
+
+        rows = [row for row in table if all(predicate(row) for predicate in self.filters)]
+        if self.values is not None:
+            for row in rows:
+                row.update(self.values)
+            return SimpleNamespace(data=[dict(row) for row in rows], count=None)
+        if self.deleting:
+            table[:] = [row for row in table if not any(row is deleted for deleted in rows)]
+            return SimpleNamespace(data=rows, count=None)
+
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+        # PostgREST caps every response at max-rows
+        cap = min(count for count in (self.row_limit, self.db.max_rows) if count is not None)
+        return SimpleNamespace(data=rows[:cap], count=None)
+
+
+class FakeSupabase:
+    """Stand-in for the supabase Client: table(name) over {name: [rows]}"""
+
+    def __init__(self, tables=None, max_rows=1000):
+        self.tables = tables if tables is not None else {}
+        self.max_rows = max_rows
+        # (table, column, number of values) of every in_() filter, to check URL sizes
+        self.in_filters = []
+        self.rpc_calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        """Records the call; the database functions themselves are not emulated"""
+        self.rpc_calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=None, count=None))
+
+
+def auth_headers(user_id, **claims):
+    """Authorization header with an access token for `user_id`, as Supabase auth issues them"""
+    payload = {'sub': user_id, 'aud': 'authenticated', 'role': 'authenticated', 'exp': int(time.time()) + 3600, **claims}
+    return {'Authorization': f"Bearer {jwt.encode(payload, JWT_SECRET, algorithm='HS256')}"}
+
+
+# ========== FIXTURES ==========
+
+@pytest.fixture
+def app():
+    app = create_app('development')
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    """Empty FakeSupabase installed as the app's Supabase client"""
+    fake = FakeSupabase()
+    monkeypatch.setattr(supabase_client, '_client', fake)
+    monkeypatch.setattr(supabase_client, '_anon_client', fake)
+    return fake
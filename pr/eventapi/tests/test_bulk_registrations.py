@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+
+from app.utils.pagination import IN_FILTER_MAX
+from conftest import auth_headers
+
+ORGANIZER = str(uuid.uuid4())
+EVENT = str(uuid.uuid4())
+
+
+@pytest.fixture
+def registrations(supabase):
+    rows = [
+        {'id': str(uuid.uuid4()), 'event_id': EVENT, 'user_id': str(uuid.uuid4()), 'user_name': f'user {i}', 'status': 'pending'}
+        for i in range(150)
+    ]
+    supabase.tables.update({
+        'events': [{'id': EVENT, 'created_by': ORGANIZER, 'title': 'Party'}],
+        'event_registrations': rows,
+        'event_participants': [{'event_id': EVENT, 'user_id': rows[0]['user_id']}],
+        'users': [{'id': row['user_id'], 'email': None} for row in rows],
+    })
+    return rows
+
+
+def decide(client, body, user_id=ORGANIZER):
+    return client.put(f'/api/events/{EVENT}/registrations/bulk', json=body, headers=auth_headers(user_id))
+
+
+def test_approve_many(client, supabase, registrations):
+    ids = [row['id'] for row in registrations]
+    unknown = str(uuid.uuid4())
+    response = decide(client, {'decision': 'approve', 'registration_ids': ids + [unknown, 'not-a-uuid']})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['invalid'] == ['not-a-uuid']
+    assert body['results']['not-a-uuid'] == 'invalid'
+    assert body['results'][unknown] == 'not_found'
+    assert all(body['results'][registration_id] == 'approved' for registration_id in ids)
+
+    assert all(row['status'] == 'approved' for row in supabase.tables['event_registrations'])
+    # One participant already existed: only the 149 others are inserted and counted
+    assert len(supabase.tables['event_participants']) == 150
+    assert supabase.rpc_calls == [('adjust_attendees_count', {'p_event_id': EVENT, 'p_delta': 149})]
+    assert len(supabase.tables['notifications']) == 150
+    assert max(count for _, _, count in supabase.in_filters) <= IN_FILTER_MAX
+
+
+def test_reject_removes_participants(client, supabase, registrations):
+    response = decide(client, {'decision': 'reject', 'registration_ids': [registrations[0]['id'], registrations[1]['id']]})
+
+    assert response.status_code == 200
+    assert supabase.tables['event_participants'] == []
+    assert supabase.rpc_calls == [('adjust_attendees_count', {'p_event_id': EVENT, 'p_delta': -1})]
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'decision': 'maybe', 'registration_ids': ['x']}, 'decision'),
+    ({'decision': 'approve'}, 'registration_ids is required'),
+    ({'decision': 'approve', 'registration_ids': 'abc'}, 'list of strings'),
+    ({'decision': 'approve', 'registration_ids': [1, 2]}, 'list of strings'),
+])
+def test_invalid_requests(client, registrations, body, error):
+    response = decide(client, body)
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
+
+
+def test_only_the_organizer_decides(client, registrations):
+    response = decide(client, {'decision': 'approve', 'registration_ids': [registrations[0]['id']]}, user_id=str(uuid.uuid4()))
+    assert response.status_code == 403
+
+
+def test_too_many_ids(client, app, registrations):
+    app.config['REGISTRATION_BULK_MAX'] = 10
+    response = decide(client, {'decision': 'approve', 'registration_ids': [str(uuid.uuid4()) for _ in range(11)]})
+    assert response.status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+
+from app.utils import cache
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_get_set_and_stats(clock):
+    c = TTLCache(max_size=10, ttl=60)
+    c.set('a', 1)
+    assert c.get('a') == 1
+    assert c.get('b', 'default') == 'default'
+    assert c.stats() == {'size': 1, 'max_size': 10, 'hits': 1, 'misses': 1}
+
+
+def test_entries_expire(clock):
+    c = TTLCache(ttl=60)
+    c.set('default', 1)
+    c.set('short', 2, ttl=10)
+
+    clock[0] += 30
+    assert c.get('short') is None
+    assert c.get('default') == 1
+
+    clock[0] += 30
+    assert c.get('default') is None
+    assert len(c) == 0
+
+
+def test_expires_at_in_the_past_is_not_stored(clock):
+    c = TTLCache()
+    c.set('a', 1, expires_at=clock[0] - 1)
+    assert c.get('a') is None
+
+
+def test_least_recently_used_is_evicted(clock):
+    c = TTLCache(max_size=2)
+    c.set('a', 1)
+    c.set('b', 2)
+    c.get('a')
+    c.set('c', 3)
+    assert c.get('b') is None
+    assert c.get('a') == 1
+    assert c.get('c') == 3
+
+
+def test_update_keeps_expiry(clock):
+    c = TTLCache(ttl=60)
+    c.set('a', 1)
+    clock[0] += 50
+    assert c.update('a', lambda value: value + 1) == 2
+
+    clock[0] += 20
+    assert c.get('a') is None
+
+
+def test_update_ignores_missing_and_expired(clock):
+    c = TTLCache(ttl=10)
+    assert c.update('missing', lambda value: value + 1) is None
+
+    c.set('a', 1)
+    clock[0] += 10
+    assert c.update('a', lambda value: value + 1) is None
+
+
+def test_delete_and_clear(clock):
+    c = TTLCache()
+    c.set('a', 1)
+    c.set('b', 2)
+    c.delete('a')
+    c.delete('missing')
+    assert c.get('a') is None
+    c.clear()
+    assert len(c) == 0
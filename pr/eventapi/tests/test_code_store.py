@@ -0,0 +1,63 @@
+import pytest
+
+from app.utils.code_store import (
+    CODE_EXPIRED, CODE_INVALID, CODE_LOCKED, CODE_MISSING, CODE_OK,
+    MemoryCodeBackend, SQLiteCodeBackend, VerificationCodeStore,
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    store = VerificationCodeStore()
+    store.max_attempts = 3
+    if request.param == 'sqlite':
+        store._backend = SQLiteCodeBackend(str(tmp_path / 'codes.db'))
+    else:
+        store._backend = MemoryCodeBackend()
+    return store
+
+
+def test_code_is_consumed_once(store):
+    store.put('verify:a@x.io', '123456', user_id='u1')
+    assert store.consume('verify:a@x.io', '123456') == (CODE_OK, {'user_id': 'u1'})
+    assert store.consume('verify:a@x.io', '123456') == (CODE_MISSING, None)
+
+
+def test_put_replaces_previous_code(store):
+    store.put('verify:a@x.io', '111111')
+    store.put('verify:a@x.io', '222222')
+    assert store.consume('verify:a@x.io', '111111')[0] == CODE_INVALID
+    assert store.consume('verify:a@x.io', '222222')[0] == CODE_OK
+
+
+def test_wrong_guesses_lock_the_code(store):
+    store.put('delete:u1', '123456')
+    assert store.consume('delete:u1', '000000')[0] == CODE_INVALID
+    assert store.consume('delete:u1', '000001')[0] == CODE_INVALID
+    assert store.consume('delete:u1', '000002')[0] == CODE_LOCKED
+    # Locked codes are gone, even the right one no longer works
+    assert store.consume('delete:u1', '123456')[0] == CODE_MISSING
+
+
+def test_expired_code(store, monkeypatch):
+    store.put('verify:a@x.io', '123456', ttl=60)
+    now = __import__('time').time()
+    monkeypatch.setattr('app.utils.code_store.time.time', lambda: now + 61)
+    assert store.consume('verify:a@x.io', '123456') == (CODE_EXPIRED, None)
+
+
+def test_sweep_removes_expired_codes(store, monkeypatch):
+    store.put('old', '1', ttl=10)
+    store.put('new', '2', ttl=600)
+    now = __import__('time').time()
+    monkeypatch.setattr('app.utils.code_store.time.time', lambda: now + 60)
+
+    assert store.sweep() == 1
+    assert store.consume('old', '1')[0] == CODE_MISSING
+    assert store.consume('new', '2')[0] == CODE_OK
+
+
+def test_sqlite_codes_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'codes.db')
+    SQLiteCodeBackend(path).put('k', '42', {'x': 1}, expires_at=10_000)
+    assert SQLiteCodeBackend(path).consume('k', '42', max_attempts=5, now=0) == (CODE_OK, {'x': 1})
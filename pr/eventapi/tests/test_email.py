@@ -0,0 +1,129 @@
+import smtplib
+import socket
+
+import pytest
+from flask import Flask
+
+pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+from app.utils.email_utils import MailNotConfigured, SMTPTransport, build_email  # noqa: E402
+
+USERNAME, PASSWORD = 'mailer@x.io', 'app-password'
+
+# The test server authenticates in plain text on localhost
+pytestmark = pytest.mark.filterwarnings('ignore:Requiring AUTH while not requiring TLS')
+
+
+class RecordingHandler:
+    """Accepts everything except recipients at refused.io; records sessions and messages"""
+
+    def __init__(self):
+        self.sessions = set()
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith('@refused.io'):
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return '250 Message accepted'
+
+
+def authenticate(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=(auth_data.login.decode(), auth_data.password.decode()) == (USERNAME, PASSWORD))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(
+        handler, hostname='127.0.0.1', port=free_port(),
+        authenticator=authenticate, auth_required=True, auth_require_tls=False,
+    )
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def make_transport(smtp_server, **config):
+    app = Flask(__name__)
+    app.config.update({
+        'MAIL_SERVER': smtp_server.hostname,
+        'MAIL_PORT': smtp_server.port,
+        'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': USERNAME,
+        'MAIL_PASSWORD': PASSWORD,
+        'MAIL_SENDER': USERNAME,
+        'MAIL_TIMEOUT': 5,
+        **config,
+    })
+    transport = SMTPTransport()
+    transport.init_app(app)
+    return transport
+
+
+def emails(*recipients):
+    return [build_email(to, f'Hello {to}', 'Body', sender=USERNAME) for to in recipients]
+
+
+def test_batch_is_sent_over_one_authenticated_session(smtp_server):
+    transport = make_transport(smtp_server)
+    assert transport.send_many(emails('a@x.io', 'b@x.io', 'c@x.io')) == [None, None, None]
+
+    handler = smtp_server.handler
+    assert [rcpt for rcpt, _ in handler.messages] == [['a@x.io'], ['b@x.io'], ['c@x.io']]
+    assert 'Subject: Hello b@x.io' in handler.messages[1][1]
+    assert len(handler.sessions) == 1
+    transport.close()
+
+
+def test_pooled_session_is_reused(smtp_server):
+    transport = make_transport(smtp_server)
+    transport.send_many(emails('a@x.io'))
+    transport.send_many(emails('b@x.io'))
+    assert len(smtp_server.handler.sessions) == 1
+    transport.close()
+
+
+def test_refused_recipient_does_not_break_the_batch(smtp_server):
+    transport = make_transport(smtp_server)
+    errors = transport.send_many(emails('a@x.io', 'nobody@refused.io', 'b@x.io'))
+
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], smtplib.SMTPRecipientsRefused)
+    assert len(smtp_server.handler.messages) == 2
+    assert len(smtp_server.handler.sessions) == 1
+    transport.close()
+
+
+def test_dropped_session_is_reopened(smtp_server):
+    transport = make_transport(smtp_server, MAIL_KEEPALIVE_SECONDS=3600)
+    transport.send_many(emails('a@x.io'))
+    # The pooled connection died while idle (and is not probed within the keepalive)
+    server, _ = transport._pool.queue[0]
+    server.close()
+
+    assert transport.send_many(emails('b@x.io')) == [None]
+    assert len(smtp_server.handler.sessions) == 2
+    transport.close()
+
+
+def test_disabled_transport_sends_nothing(smtp_server):
+    transport = make_transport(smtp_server, MAIL_ENABLED=False)
+    errors = transport.send_many(emails('a@x.io', 'b@x.io'))
+    assert all(isinstance(error, MailNotConfigured) for error in errors)
+    with pytest.raises(MailNotConfigured):
+        transport.send(emails('a@x.io')[0])
+    assert smtp_server.handler.messages == []
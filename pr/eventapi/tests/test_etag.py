@@ -0,0 +1,69 @@
+import pytest
+
+from app.utils.response_cache import response_cache
+from conftest import auth_headers
+
+
+@pytest.fixture
+def events(supabase):
+    supabase.tables['events'] = [
+        {'id': f'e{i}', 'title': f'Event {i}', 'attendees_count': 0, 'created_by': 'org', 'created_at': f'2024-01-0{i + 1}T00:00:00'}
+        for i in range(3)
+    ]
+    return supabase
+
+
+def test_cached_response_is_revalidated_with_etag(client, events):
+    first = client.get('/api/events/popular')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    hit = client.get('/api/events/popular', headers={'If-None-Match': etag})
+    assert hit.status_code == 304
+    assert hit.headers['X-Cache'] == 'HIT'
+    assert hit.data == b''
+
+    # A stale ETag gets the full body
+    other = client.get('/api/events/popular', headers={'If-None-Match': '"stale"'})
+    assert other.status_code == 200
+    assert other.headers['ETag'] == etag
+
+
+def test_etag_changes_with_the_content(client, events):
+    etag = client.get('/api/events/e0').headers['ETag']
+    assert client.post('/api/events/e0/join', headers=auth_headers('u1')).status_code == 200
+    events.tables['events'][0]['attendees_count'] = 1
+
+    response = client.get('/api/events/e0', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_without_cache(app, client, events):
+    response_cache.enabled = False
+    try:
+        etag = client.get('/api/events/e0').headers['ETag']
+        response = client.get('/api/events/e0', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert 'X-Cache' not in response.headers
+    finally:
+        response_cache.enabled = True
+
+
+def test_private_routes_vary_on_authorization(client, events):
+    events.tables['events'][1]['created_by'] = 'u1'
+    headers = auth_headers('u1')
+    response = client.get('/api/events/my-events', headers=headers)
+    assert [e['id'] for e in response.get_json()['events']] == ['e1']
+    assert 'Authorization' in response.headers['Vary']
+
+    revalidated = client.get('/api/events/my-events', headers={**headers, 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_errors_are_not_cached(client, events):
+    assert client.get('/api/events/missing').status_code == 404
+    events.tables['events'].append({'id': 'missing', 'title': 'Late', 'attendees_count': 0})
+    response = client.get('/api/events/missing')
+    assert response.status_code == 200
+    assert 'ETag' in response.headers
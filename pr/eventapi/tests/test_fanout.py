@@ -0,0 +1,28 @@
+import uuid
+
+from app.routes import events
+from app.utils.background import Job
+from app.utils.pagination import IN_FILTER_MAX, in_chunks
+
+
+def test_in_chunks():
+    assert [len(chunk) for chunk in in_chunks(range(250))] == [100, 100, 50]
+    assert list(in_chunks([])) == []
+
+
+def test_follower_fan_out_pages_and_chunks(supabase):
+    follower_ids = sorted(str(uuid.uuid4()) for _ in range(1234))
+    supabase.tables.update({
+        'organization_follows': [{'organization_id': 'org', 'follower_id': f} for f in follower_ids],
+        'users': [{'id': f, 'email': f'{f}@example.com', 'username': 'u'} for f in follower_ids],
+    })
+
+    job = Job('new_event_fanout')
+    events.notify_followers_of_new_event(job, 'e1', 'Party', 'org', 'Org')
+
+    assert sorted(n['user_id'] for n in supabase.tables['notifications']) == follower_ids
+    assert job.counters['notifications_created'] == 1234
+    # Mail is disabled in tests: every email is recorded as failed, none is lost
+    assert job.counters['emails_failed'] == 1234
+    # No in_() filter large enough to overflow a gateway URL limit
+    assert max(count for _, _, count in supabase.in_filters) <= IN_FILTER_MAX
@@ -0,0 +1,229 @@
+import io
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from app.utils.background import background_jobs
+from app.utils.images import (
+    IMAGE_VARIANTS, ImageProcessor, InvalidImage, UploadNotFound,
+    check_upload, create_upload_url, image_processor, process_image, submit_upload,
+)
+from conftest import auth_headers
+
+
+def encode(image, image_format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    return buffer.getvalue()
+
+
+def decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_variants_are_resized_and_never_upscaled():
+    data = encode(Image.new('RGB', (2000, 1000), 'red'), 'JPEG')
+    rendered = process_image(data, IMAGE_VARIANTS)
+
+    assert {name: (width, height) for name, (_, width, height) in rendered.items()} == {
+        'thumb': (160, 80),
+        'card': (640, 320),
+        'full': (1600, 800),
+    }
+    assert decode(rendered['thumb'][0]).format == 'WEBP'
+
+    small = process_image(encode(Image.new('RGB', (100, 50)), 'PNG'), IMAGE_VARIANTS)
+    assert small['full'][1:] == (100, 50)
+
+
+def test_exif_orientation_is_applied_and_metadata_dropped():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90° clockwise
+    data = encode(Image.new('RGB', (200, 100)), 'JPEG', exif=exif)
+
+    output, width, height = process_image(data, {'full': 1600})['full']
+    assert (width, height) == (100, 200)
+    assert not decode(output).getexif()
+
+
+def test_jpeg_output_flattens_transparency():
+    data = encode(Image.new('RGBA', (10, 10), (0, 0, 0, 0)), 'PNG')
+    output = decode(process_image(data, {'full': 1600}, output_format='jpeg')['full'][0])
+    assert output.mode == 'RGB'
+    assert output.getpixel((5, 5)) == pytest.approx((255, 255, 255), abs=2)
+
+
+def test_webp_output_keeps_transparency():
+    data = encode(Image.new('RGBA', (10, 10), (0, 0, 0, 0)), 'PNG')
+    assert decode(process_image(data, {'full': 1600})['full'][0]).mode == 'RGBA'
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'not an image', 'not an image'),
+    (encode(Image.new('RGB', (10, 10)), 'BMP'), 'Unsupported image format'),
+    (encode(Image.effect_noise((64, 64), 50), 'PNG')[:2000], 'Invalid image'),
+])
+def test_invalid_uploads(data, message):
+    with pytest.raises(InvalidImage, match=message):
+        process_image(data, IMAGE_VARIANTS)
+
+
+def test_pixel_limit_is_enforced():
+    data = encode(Image.new('RGB', (300, 300)), 'PNG')
+    with pytest.raises(InvalidImage, match='too large'):
+        process_image(data, IMAGE_VARIANTS, max_pixels=300 * 300 - 1)
+    assert process_image(data, {'thumb': 160}, max_pixels=300 * 300)
+
+
+def test_check_size_and_content_key():
+    processor = ImageProcessor()
+    processor.max_upload_bytes = 1024 * 1024
+    processor.check_size(1024 * 1024)
+    with pytest.raises(InvalidImage, match='too large'):
+        processor.check_size(1024 * 1024 + 1)
+
+    key = processor.content_key(b'abc')
+    assert key == processor.content_key(b'abc')
+    assert key != processor.content_key(b'abd')
+    processor.quality = 90
+    assert key != processor.content_key(b'abc')
+
+
+# ========== DIRECT UPLOADS ==========
+
+class FakeBucket:
+    """The part of the storage3 file API the image pipeline uses"""
+
+    def __init__(self, files):
+        self.files = files
+
+    def list(self, folder, options=None):
+        search = (options or {}).get('search', '')
+        names = {path[len(folder) + 1:].split('/')[0] for path in self.files if path.startswith(folder + '/')}
+        return [
+            {'name': name, 'metadata': {'size': len(self.files.get(f'{folder}/{name}', b''))}}
+            for name in sorted(names) if name.startswith(search)
+        ]
+
+    def download(self, path):
+        return self.files[path]
+
+    def upload(self, path, data, file_options=None):
+        self.files[path] = data
+
+    def remove(self, paths):
+        for path in paths:
+            self.files.pop(path, None)
+
+    def get_public_url(self, path):
+        return f'https://cdn.test/{path}'
+
+    def create_signed_upload_url(self, path):
+        return {'signed_url': f'https://storage.test/upload/{path}?token=t', 'token': 't', 'path': path}
+
+
+class FakeStorage:
+    def __init__(self, file_size_limit=None):
+        self.files = {}
+        self.bucket = SimpleNamespace(public=True, file_size_limit=file_size_limit, allowed_mime_types=None)
+        self.updates = []
+
+    def get_bucket(self, bucket):
+        return self.bucket
+
+    def update_bucket(self, bucket, options):
+        self.updates.append((bucket, options))
+        self.bucket = SimpleNamespace(**options)
+
+    def from_(self, bucket):
+        return FakeBucket(self.files)
+
+
+@pytest.fixture
+def storage(app, supabase, monkeypatch):
+    supabase.storage = FakeStorage()
+    # Render in this process instead of the spawned pool
+    monkeypatch.setattr(image_processor, 'process', lambda data: process_image(data, IMAGE_VARIANTS))
+    return supabase.storage
+
+
+def wait_for(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_upload_url_bucket_is_size_limited_once(storage, supabase):
+    upload = create_upload_url(supabase, 'events', 'u1')
+    create_upload_url(supabase, 'events', 'u1')
+
+    assert upload['path'].startswith('u1/upload-')
+    assert upload['max_bytes'] == image_processor.max_upload_bytes
+    assert len(storage.updates) == 1
+    options = storage.updates[0][1]
+    assert options['file_size_limit'] == image_processor.max_upload_bytes
+    assert options['public'] is True
+    assert 'image/webp' in options['allowed_mime_types']
+
+
+def test_bucket_already_limited_is_left_alone(app, supabase):
+    supabase.storage = FakeStorage(file_size_limit=1024)
+    supabase.storage.bucket.allowed_mime_types = ['image/png']
+    create_upload_url(supabase, 'events', 'u1')
+    assert supabase.storage.updates == []
+
+
+def test_upload_checks(storage, supabase):
+    with pytest.raises(InvalidImage, match='Invalid upload path'):
+        check_upload(supabase, 'events', 'u1', 'u2/upload-' + 'a' * 32)
+    with pytest.raises(UploadNotFound):
+        check_upload(supabase, 'events', 'u1', 'u1/upload-' + 'a' * 32)
+
+    path = 'u1/upload-' + 'b' * 32
+    storage.files[path] = b'x' * (image_processor.max_upload_bytes + 1)
+    with pytest.raises(InvalidImage, match='too large'):
+        check_upload(supabase, 'events', 'u1', path)
+    assert path not in storage.files
+
+
+def test_finalize_processes_the_upload_on_a_job(storage, client):
+    path = 'u1/upload-' + 'e' * 32
+    storage.files[path] = encode(Image.new('RGB', (800, 400), 'blue'), 'PNG')
+
+    response = client.post('/api/events/upload-image/finalize', json={'path': path}, headers=auth_headers('u1'))
+    assert response.status_code == 202
+    job = wait_for(background_jobs.get(response.get_json()['job_id']))
+
+    status = client.get(f"/api/events/jobs/{job.id}", headers=auth_headers('u1')).get_json()['job']
+    assert status['status'] == 'done'
+    assert status['result']['url'] == status['result']['urls']['full']
+    assert status['result']['path'].endswith('/full.webp')
+    # Variants stored, original deleted
+    assert path not in storage.files
+    assert sorted(p.rsplit('/', 1)[1] for p in storage.files) == ['card.webp', 'full.webp', 'thumb.webp']
+
+
+def test_invalid_upload_fails_the_job(storage, supabase):
+    path = 'u1/upload-' + 'c' * 32
+    storage.files[path] = b'not an image'
+
+    job = wait_for(submit_upload(supabase, 'events', 'u1', path, owner_id='u1'))
+    assert job.status == 'failed'
+    assert 'not an image' in job.errors[0]
+    assert path not in storage.files
+
+
+def test_profile_photo_is_saved_by_the_job(storage, supabase, client):
+    supabase.tables['users'] = [{'id': 'u1', 'profile_photo_url': None}]
+    path = 'profiles/u1/upload-' + 'd' * 32
+    storage.files[path] = encode(Image.new('RGB', (300, 300)), 'JPEG')
+
+    response = client.post('/api/users/profile/photo/finalize', json={'path': path}, headers=auth_headers('u1'))
+    assert response.status_code == 202
+    job = wait_for(background_jobs.get(response.get_json()['job_id']))
+
+    assert job.status == 'done'
+    assert supabase.tables['users'][0]['profile_photo_url'] == job.result['url']
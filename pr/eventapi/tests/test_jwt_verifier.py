@@ -0,0 +1,134 @@
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import Flask
+from jwt.algorithms import RSAAlgorithm
+
+from app.utils.jwt_verifier import JWTVerifier, LocalVerificationUnavailable, TokenCache, user_response_from_claims
+from app.utils.supabase_client import supabase_client
+from conftest import JWT_SECRET
+
+RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def claims(**overrides):
+    return {'sub': 'u1', 'aud': 'authenticated', 'role': 'authenticated', 'email': 'a@x.io', 'exp': int(time.time()) + 3600, **overrides}
+
+
+def hs256(**overrides):
+    return jwt.encode(claims(**overrides), JWT_SECRET, algorithm='HS256')
+
+
+def rs256(kid='key-1', **overrides):
+    return jwt.encode(claims(**overrides), RSA_KEY, algorithm='RS256', headers={'kid': kid})
+
+
+def make_verifier(**config):
+    app = Flask(__name__)
+    app.config.update({'SUPABASE_URL': 'https://test.supabase.co', 'SUPABASE_JWT_SECRET': JWT_SECRET, **config})
+    verifier = JWTVerifier()
+    verifier.init_app(app)
+    return verifier
+
+
+@pytest.fixture
+def jwks_fetches(monkeypatch):
+    """Serve RSA_KEY as the project JWKS and count the downloads"""
+    jwk = RSAAlgorithm.to_jwk(RSA_KEY.public_key(), as_dict=True)
+    fetches = []
+
+    def fetch_data(self):
+        fetches.append(self.uri)
+        return {'keys': [{**jwk, 'kid': 'key-1', 'alg': 'RS256', 'use': 'sig'}]}
+
+    monkeypatch.setattr(jwt.PyJWKClient, 'fetch_data', fetch_data)
+    return fetches
+
+
+# ========== JWT VERIFIER ==========
+
+def test_hs256_token_is_verified_with_the_secret():
+    assert make_verifier().verify(hs256())['sub'] == 'u1'
+
+
+@pytest.mark.parametrize('token', [
+    hs256(exp=int(time.time()) - 10),
+    hs256(aud='someone-else'),
+    jwt.encode(claims(), 'wrong-secret-with-enough-bytes-for-hs256', algorithm='HS256'),
+    jwt.encode({'aud': 'authenticated', 'exp': int(time.time()) + 60}, JWT_SECRET, algorithm='HS256'),
+    jwt.encode(claims(), None, algorithm='none'),
+])
+def test_bad_tokens_are_rejected(token):
+    with pytest.raises(jwt.InvalidTokenError):
+        make_verifier().verify(token)
+
+
+def test_leeway_accepts_recently_expired_tokens():
+    token = hs256(exp=int(time.time()) - 10)
+    assert make_verifier(JWT_LEEWAY_SECONDS=30).verify(token)['sub'] == 'u1'
+
+
+def test_no_secret_means_no_local_verification():
+    with pytest.raises(LocalVerificationUnavailable):
+        make_verifier(SUPABASE_JWT_SECRET=None).verify(hs256())
+
+
+def test_asymmetric_token_is_verified_with_the_jwks(jwks_fetches):
+    verifier = make_verifier()
+    assert verifier.verify(rs256())['sub'] == 'u1'
+    assert verifier.verify(rs256(sub='u2'))['sub'] == 'u2'
+    # Default JWKS location of the project, downloaded once
+    assert jwks_fetches == ['https://test.supabase.co/auth/v1/.well-known/jwks.json']
+
+
+def test_asymmetric_token_with_bad_signature(jwks_fetches):
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    token = jwt.encode(claims(), other_key, algorithm='RS256', headers={'kid': 'key-1'})
+    with pytest.raises(jwt.InvalidSignatureError):
+        make_verifier().verify(token)
+
+
+def test_unknown_signing_key_falls_back(jwks_fetches):
+    with pytest.raises(LocalVerificationUnavailable):
+        make_verifier().verify(rs256(kid='rotated'))
+
+
+def test_user_response_from_claims():
+    user = user_response_from_claims(claims(aud=['authenticated'], user_metadata={'name': 'A'})).user
+    assert (user.id, user.email, user.aud, user.role) == ('u1', 'a@x.io', 'authenticated', 'authenticated')
+    assert user.user_metadata == {'name': 'A'}
+
+
+# ========== TOKEN CACHE ==========
+
+def test_token_cache_entries_expire_with_the_token(monkeypatch):
+    cache = TokenCache()
+    now = time.time()
+    cache.set('token', 'user', expires_at=now + 60)
+    cache.set('no-expiry', 'user', expires_at=None)
+
+    assert cache.get('token') == 'user'
+    assert cache.get('no-expiry') is None
+    # Only hashes of the tokens are kept
+    assert 'token' not in cache._entries
+
+    monkeypatch.setattr('app.utils.cache.time.time', lambda: now + 61)
+    assert cache.get('token') is None
+
+
+def test_get_user_from_token_verifies_once_then_caches(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(supabase_client, '_anon_client', SimpleNamespace(auth=SimpleNamespace(get_user=calls.append)))
+    token = hs256()
+
+    first = supabase_client.get_user_from_token(token)
+    assert first.user.id == 'u1'
+    assert supabase_client.get_user_from_token(token) is first
+    # Verified locally: Supabase auth was never asked
+    assert calls == []
+
+    assert supabase_client.get_user_from_token(hs256(exp=int(time.time()) - 10)) is None
+    assert supabase_client.get_user_from_token('') is None
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from app.routes import notifications
+from app.routes.notifications import build_notification, create_notification, create_notifications
+from app.utils.notification_broker import NotificationBroker, notification_broker
+from conftest import auth_headers
+
+
+def drain(subscription):
+    received = []
+    while (message := subscription.get(timeout=0)) is not None:
+        received.append(message)
+    return received
+
+
+@pytest.fixture
+def subscribe(app):
+    subscriptions = []
+
+    def subscribe(user_id):
+        subscription = notification_broker.subscribe(user_id)
+        subscriptions.append(subscription)
+        return subscription
+
+    yield subscribe
+    for subscription in subscriptions:
+        notification_broker.unsubscribe(subscription)
+
+
+# ========== BROKER ==========
+
+def test_messages_reach_only_the_user_streams():
+    broker = NotificationBroker()
+    first, second, other = broker.subscribe('u1'), broker.subscribe('u1'), broker.subscribe('u2')
+
+    broker.publish('u1', 'unread_count', {'count': 1})
+    assert drain(first) == drain(second) == [('unread_count', {'count': 1})]
+    assert drain(other) == []
+
+    broker.unsubscribe(first)
+    broker.unsubscribe(second)
+    broker.publish('u1', 'unread_count', {'count': 2})
+    assert broker.stats()['users'] == 1
+    assert broker.stats()['published'] == 2
+
+
+def test_slow_reader_is_marked_lagged():
+    broker = NotificationBroker()
+    broker.max_queue = 2
+    subscription = broker.subscribe('u1')
+
+    broker.publish_many([('u1', 'notification', {'n': i}) for i in range(3)])
+    assert subscription.lagged
+    assert broker.dropped == 1
+    assert [data['n'] for _, data in drain(subscription)] == [0, 1]
+
+
+# ========== PUBLISHING ==========
+
+def test_new_notification_publishes_row_and_count(app, supabase, subscribe):
+    supabase.tables['notification_counters'] = [{'user_id': 'u1', 'unread_count': 2}]
+    subscription = subscribe('u1')
+
+    row = create_notification(supabase, 'u1', 'approval', 'Approved', 'You are in', 'e1')
+    # The counter row is read after the insert (the trigger already counted it)
+    assert drain(subscription) == [('notification', row), ('unread_count', {'count': 2})]
+
+
+def test_notification_batch_publishes_one_count_per_user(app, supabase, subscribe):
+    supabase.tables['notification_counters'] = [{'user_id': 'u1', 'unread_count': 2}, {'user_id': 'u2', 'unread_count': 1}]
+    u1, u2 = subscribe('u1'), subscribe('u2')
+
+    rows = [build_notification('u1', 'new_event', 'New', 'New event', 'e1') for _ in range(2)]
+    rows.append(build_notification('u2', 'new_event', 'New', 'New event', 'e1'))
+    assert [error for _, error in create_notifications(supabase, rows)] == [None]
+
+    assert [event for event, _ in drain(u1)] == ['notification', 'notification', 'unread_count']
+    assert drain(u2)[-1] == ('unread_count', {'count': 1})
+
+
+def test_reading_and_deleting_publish_the_new_count(app, client, supabase, subscribe):
+    supabase.tables.update({
+        'notifications': [{'id': f'n{i}', 'user_id': 'u1', 'is_read': False} for i in range(3)],
+        'notification_counters': [{'user_id': 'u1', 'unread_count': 3}],
+    })
+    subscription = subscribe('u1')
+    headers = auth_headers('u1')
+    assert client.get('/api/notifications/unread-count', headers=headers).get_json() == {'count': 3}
+
+    assert client.put('/api/notifications/n0/read', headers=headers).status_code == 200
+    assert client.delete('/api/notifications/n1', headers=headers).status_code == 200
+    assert client.delete('/api/notifications/all', headers=headers).status_code == 200
+    assert drain(subscription) == [('unread_count', {'count': count}) for count in (2, 1, 0)]
+
+
+# ========== STREAM ==========
+
+def test_stream_needs_gevent(client, supabase):
+    response = client.get('/api/notifications/stream', headers=auth_headers('u1'))
+    assert response.status_code == 503
+
+
+def test_stream_sends_count_then_published_messages(app, client, supabase, monkeypatch):
+    monkeypatch.setattr(notifications, 'streams_supported', lambda: True)
+    app.config.update(NOTIFICATION_STREAM_HEARTBEAT_SECONDS=0.01, NOTIFICATION_STREAM_MAX_SECONDS=5)
+    supabase.tables['notification_counters'] = [{'user_id': 'u1', 'unread_count': 4}]
+
+    response = client.get('/api/notifications/stream', headers=auth_headers('u1'), buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = (chunk.decode() for chunk in response.response)
+    assert next(chunks) == 'retry: 3000\nevent: unread_count\ndata: {"count": 4}\n\n'
+
+    notification_broker.publish('u1', 'unread_count', {'count': 5})
+    chunk = next(chunk for chunk in chunks if not chunk.startswith(':'))
+    assert chunk.startswith('event: unread_count\n')
+    assert json.loads(chunk.split('data: ')[1]) == {'count': 5}
+
+    response.close()
+    assert notification_broker.stats()['streams'] == 0
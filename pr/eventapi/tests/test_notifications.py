@@ -0,0 +1,28 @@
+import uuid
+
+from conftest import auth_headers
+
+USER = str(uuid.uuid4())
+
+
+def test_notifications_are_paged_newest_first(client, supabase):
+    # Random ids, so id order says nothing about age
+    supabase.tables['notifications'] = [
+        {'id': str(uuid.uuid4()), 'user_id': USER, 'created_at': f'2024-01-01T00:00:{i:02d}+00:00', 'is_read': False}
+        for i in range(25)
+    ] + [{'id': str(uuid.uuid4()), 'user_id': 'someone-else', 'created_at': '2024-02-01T00:00:00+00:00'}]
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/notifications/?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=auth_headers(USER)).get_json()
+        seen.extend(n['created_at'] for n in body['notifications'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == [f'2024-01-01T00:00:{i:02d}+00:00' for i in reversed(range(25))]
+
+
+def test_bad_page_params_answer_400(client, supabase):
+    assert client.get('/api/notifications/?cursor=garbage', headers=auth_headers(USER)).status_code == 400
@@ -0,0 +1,85 @@
+import pytest
+
+from app.utils.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, keyset_filter, paginate,
+)
+from conftest import FakeSupabase
+
+
+def make_rows(count):
+    # Pairs of rows share created_at so the id tie-breaker matters
+    return [{'id': f'{i:04d}', 'created_at': f'2024-01-{1 + i // 2:02d}T00:00:00'} for i in range(count)]
+
+
+def walk(app, db, path, keys, desc=True):
+    """Follow next_cursor from the first page to the last"""
+    rows, cursor = [], None
+    while True:
+        url = path + (f'&cursor={cursor}' if cursor else '')
+        with app.test_request_context(url):
+            page, cursor = paginate(db.table('events').select('*'), keys, desc=desc)
+        rows.extend(page)
+        if cursor is None:
+            return rows
+
+
+def test_cursor_round_trip():
+    keys = ('created_at', 'id')
+    cursor = encode_cursor({'created_at': '2024-01-01T00:00:00', 'id': 'a"b'}, keys)
+    assert decode_cursor(cursor, keys) == ['2024-01-01T00:00:00', 'a"b']
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', encode_cursor({'id': None}, ('id',)), encode_cursor({'id': 1}, ('id',))])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, ('created_at', 'id'))
+
+
+def test_keyset_filter_descending():
+    assert keyset_filter(('created_at', 'id'), ['X', 'Y']) == 'created_at.lt."X",and(created_at.eq."X",id.lt."Y")'
+
+
+def test_pages_cover_every_row_once(app):
+    db = FakeSupabase({'events': make_rows(45)})
+    rows = walk(app, db, '/?limit=10', ('created_at', 'id'))
+
+    expected = sorted(db.tables['events'], key=lambda row: (row['created_at'], row['id']), reverse=True)
+    assert rows == expected
+
+
+def test_ascending_pages(app):
+    db = FakeSupabase({'events': make_rows(7)})
+    rows = walk(app, db, '/?limit=3', ('created_at', 'id'), desc=False)
+    assert [row['id'] for row in rows] == [f'{i:04d}' for i in range(7)]
+
+
+def test_last_page_has_no_cursor(app):
+    db = FakeSupabase({'events': make_rows(5)})
+    with app.test_request_context('/?limit=5'):
+        rows, cursor = paginate(db.table('events').select('*'), ('created_at', 'id'))
+    assert len(rows) == 5
+    assert cursor is None
+
+
+def test_limit_is_capped(app):
+    app.config['PAGE_SIZE_MAX'] = 10
+    db = FakeSupabase({'events': make_rows(30)})
+    with app.test_request_context('/?limit=1000'):
+        rows, cursor = paginate(db.table('events').select('*'), ('created_at', 'id'))
+    assert len(rows) == 10
+    assert cursor is not None
+
+
+def test_all_returns_everything(app):
+    db = FakeSupabase({'events': make_rows(30)})
+    with app.test_request_context('/?all=true'):
+        rows, cursor = paginate(db.table('events').select('*'), ('created_at', 'id'))
+    assert len(rows) == 30
+    assert cursor is None
+
+
+def test_invalid_cursor_raises(app):
+    db = FakeSupabase({'events': make_rows(3)})
+    with app.test_request_context('/?cursor=garbage'):
+        with pytest.raises(InvalidCursor):
+            paginate(db.table('events').select('*'), ('created_at', 'id'))
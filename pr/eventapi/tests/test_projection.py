@@ -0,0 +1,36 @@
+import pytest
+
+from app.utils.projection import EVENT_FIELDS, EVENT_SUMMARY_FIELDS, InvalidFields, event_columns
+
+
+def columns(app, url, **kwargs):
+    with app.test_request_context(url):
+        return event_columns(**kwargs).split(',')
+
+
+def test_default_is_summary(app):
+    assert columns(app, '/') == list(EVENT_SUMMARY_FIELDS)
+
+
+def test_named_projections(app):
+    assert columns(app, '/?fields=summary') == list(EVENT_SUMMARY_FIELDS)
+    assert columns(app, '/?fields=full') == list(EVENT_FIELDS)
+
+
+def test_requested_fields_keep_id_and_required(app):
+    assert columns(app, '/?fields=title, image_url', required=('created_at',)) == ['title', 'image_url', 'id', 'created_at']
+
+
+def test_duplicates_are_dropped(app):
+    assert columns(app, '/?fields=id,title,title') == ['id', 'title']
+
+
+def test_unknown_field_is_rejected(app):
+    with pytest.raises(InvalidFields, match='password'):
+        columns(app, '/?fields=title,password')
+
+
+def test_unknown_field_answers_400(client, supabase):
+    response = client.get('/api/events/?fields=secret')
+    assert response.status_code == 400
+    assert 'secret' in response.get_json()['error']
@@ -0,0 +1,138 @@
+import pytest
+from flask import Flask, request
+
+from app import create_app
+from app.utils.rate_limit import RateLimiter, SQLiteLimitBackend, by_json_field, parse_limit, sliding_window
+from config import Config
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('10/minute', (10, 60)),
+    ('5/minutes', (5, 60)),
+    (' 3 / hour', (3, 3600)),
+    ('1/day', (1, 86400)),
+    ('', None),
+    (None, None),
+])
+def test_parse_limit(spec, expected):
+    assert parse_limit(spec) == expected
+
+
+@pytest.mark.parametrize('spec', ['10', 'ten/minute', '10/minit', '-1/second'])
+def test_parse_limit_rejects_malformed(spec):
+    with pytest.raises(ValueError):
+        parse_limit(spec)
+
+
+def test_sliding_window_allows_up_to_the_limit():
+    state = None
+    for _ in range(3):
+        allowed, retry_after, state = sliding_window(state, 3, 60, 120.0)
+        assert allowed and retry_after == 0
+
+    allowed, retry_after, state = sliding_window(state, 3, 60, 150.0)
+    assert not allowed
+    assert retry_after == 30
+
+
+def test_sliding_window_weights_previous_window():
+    # 4 hits late in window 2, then window 3 starts
+    state = None
+    for _ in range(4):
+        _, _, state = sliding_window(state, 4, 60, 170.0)
+
+    # 15 s into window 3, 3/4 of the previous window still counts: 3 of 4 used
+    allowed, _, state = sliding_window(state, 4, 60, 195.0)
+    assert allowed
+    allowed, retry_after, state = sliding_window(state, 4, 60, 195.0)
+    assert not allowed
+    # At 210 s only half of the previous window counts
+    assert retry_after == 15
+    allowed, _, state = sliding_window(state, 4, 60, 210.0)
+    assert allowed
+
+    # Two windows later everything is forgotten
+    allowed, _, _ = sliding_window(state, 4, 60, 320.0)
+    assert allowed
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update({'RATE_LIMIT_ENABLED': True, 'RATE_LIMIT_BACKEND': 'memory', **config})
+    limiter = RateLimiter()
+    limiter.init_app(app)
+
+    @app.route('/login', methods=['POST'])
+    @limiter.limit('login', key=by_json_field('email'))
+    def login():
+        return {'ok': True}
+
+    return app, limiter
+
+
+def test_limit_answers_429_with_retry_after():
+    app, limiter = make_app(RATE_LIMIT_LOGIN='2/minute')
+    client = app.test_client()
+
+    assert client.post('/login', json={'email': 'a@x.io'}).status_code == 200
+    assert client.post('/login', json={'email': 'A@x.io '}).status_code == 200
+    response = client.post('/login', json={'email': 'a@x.io'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert limiter.stats()['rejected'] == 1
+
+    # Other keys have their own counter
+    assert client.post('/login', json={'email': 'b@x.io'}).status_code == 200
+
+
+def test_empty_spec_and_missing_key_are_not_limited():
+    app, _ = make_app(RATE_LIMIT_LOGIN='')
+    client = app.test_client()
+    assert all(client.post('/login', json={'email': 'a@x.io'}).status_code == 200 for _ in range(5))
+
+    app, _ = make_app(RATE_LIMIT_LOGIN='1/minute')
+    client = app.test_client()
+    assert all(client.post('/login', json={}).status_code == 200 for _ in range(5))
+
+
+def test_disabled_limiter():
+    app, _ = make_app(RATE_LIMIT_LOGIN='1/minute', RATE_LIMIT_ENABLED=False)
+    client = app.test_client()
+    assert all(client.post('/login', json={'email': 'a@x.io'}).status_code == 200 for _ in range(3))
+
+
+def test_malformed_spec_fails_at_startup():
+    with pytest.raises(ValueError, match='RATE_LIMIT_LOGIN'):
+        make_app(RATE_LIMIT_LOGIN='30/minit')
+
+
+def test_sqlite_counters_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    first, second = SQLiteLimitBackend(path), SQLiteLimitBackend(path)
+
+    assert first.hit('login:1.2.3.4', 2, 60) == (True, 0)
+    assert second.hit('login:1.2.3.4', 2, 60) == (True, 0)
+    allowed, retry_after = first.hit('login:1.2.3.4', 2, 60)
+    assert not allowed and retry_after >= 1
+    assert second.hit('login:5.6.7.8', 2, 60) == (True, 0)
+
+
+def test_limiter_with_sqlite_backend(tmp_path):
+    app, limiter = make_app(RATE_LIMIT_LOGIN='1/minute', RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_SQLITE_PATH=str(tmp_path / 'limits.db'))
+    assert limiter.stats()['backend'] == 'SQLiteLimitBackend'
+    client = app.test_client()
+    assert client.post('/login', json={'email': 'a@x.io'}).status_code == 200
+    assert client.post('/login', json={'email': 'a@x.io'}).status_code == 429
+
+
+@pytest.mark.parametrize('hops, expected', [(0, '127.0.0.1'), (1, '1.2.3.4')])
+def test_forwarded_for_is_only_trusted_when_configured(monkeypatch, hops, expected):
+    monkeypatch.setattr(Config, 'TRUSTED_PROXY_HOPS', hops)
+    app = create_app('development')
+
+    @app.route('/ip')
+    def ip():
+        return {'ip': request.remote_addr}
+
+    response = app.test_client().get('/ip', headers={'X-Forwarded-For': '9.9.9.9, 1.2.3.4'})
+    assert response.get_json()['ip'] == expected
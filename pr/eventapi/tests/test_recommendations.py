@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils.recommendations import Recommender, _Candidates
+from conftest import FakeSupabase
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def event(event_id, category=None, created_by=None, attendees=0, age_days=1, in_days=1):
+    return {
+        'id': event_id,
+        'category': category,
+        'created_by': created_by,
+        'attendees_count': attendees,
+        'created_at': (NOW - timedelta(days=age_days)).isoformat(),
+        'event_date_time': (NOW + timedelta(days=in_days)).isoformat(),
+    }
+
+
+def user(categories=(), follows=(), favorites=()):
+    return {'categories': list(categories), 'follows': list(follows), 'favorites': list(favorites)}
+
+
+@pytest.fixture
+def recommender():
+    recommender = Recommender()
+    recommender.depth = 10
+    return recommender
+
+
+def test_global_score_favors_popular_and_close_events():
+    candidates = _Candidates([
+        event('popular', attendees=100),
+        event('quiet', attendees=1),
+        event('stale', attendees=100, age_days=60),
+        event('far', attendees=1, in_days=60),
+    ], NOW)
+    score = dict(zip(candidates.ids, candidates.global_score))
+
+    assert candidates.popularity.max() == pytest.approx(1.0)
+    assert score['popular'] > score['quiet'] > score['stale'] > score['far']
+
+
+def test_no_candidates():
+    candidates = _Candidates([], NOW)
+    recommender = Recommender()
+    assert recommender.score(candidates, 'u1', user(categories=['music'])) == []
+
+
+def test_category_and_follows_outrank_popularity(recommender):
+    candidates = _Candidates([
+        event('popular', 'Sports', 'org-a', attendees=500),
+        event('music', 'Music', 'org-b'),
+        event('followed', 'Food', 'org-c'),
+    ], NOW)
+
+    ranking = recommender.score(candidates, 'u1', user(categories=['MUSIC'], follows=['org-c']))
+    assert ranking == ['music', 'followed', 'popular']
+
+
+def test_favorites_add_affinity_and_are_excluded(recommender):
+    candidates = _Candidates([
+        event('liked', 'Music', 'org-a'),
+        event('same-organizer', 'Food', 'org-a', attendees=50),
+        event('other', 'Sports', 'org-b', attendees=50),
+    ], NOW)
+    favorites = [{'id': 'liked', 'category': 'Music', 'created_by': 'org-a'}]
+
+    ranking = recommender.score(candidates, 'u1', user(favorites=favorites))
+    assert ranking == ['same-organizer', 'other']
+
+
+def test_own_events_are_excluded(recommender):
+    candidates = _Candidates([event('mine', 'Music', 'u1'), event('other', 'Music', 'org-a')], NOW)
+    assert recommender.score(candidates, 'u1', user(categories=['music'])) == ['other']
+
+
+def test_ranking_is_cut_at_depth(recommender):
+    candidates = _Candidates([event(f'e{i}', attendees=i) for i in range(30)], NOW)
+    recommender.depth = 5
+    assert recommender.score(candidates, 'u1', user()) == ['e29', 'e28', 'e27', 'e26', 'e25']
+
+
+def test_load_candidates_reads_every_page(recommender, monkeypatch):
+    monkeypatch.setattr('app.utils.recommendations.CANDIDATE_PAGE_SIZE', 3)
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    events = [dict(event(f'e{i}'), event_date_time=(future + timedelta(hours=i % 4)).isoformat()) for i in range(8)]
+    db = FakeSupabase({'events': events}, max_rows=3)
+
+    candidates = recommender.load_candidates(db)
+    assert sorted(candidates.ids) == sorted(e['id'] for e in events)
+    assert sorted(recommender.global_ranking()) == sorted(candidates.ids)
+
+
+def test_load_user_caps_favorites_to_one_in_filter(recommender, supabase):
+    favorites = [{'user_id': 'u1', 'event_id': f'e{i}', 'created_at': f'2024-01-01T00:{i // 60:02}:{i % 60:02}'} for i in range(250)]
+    events = [{'id': f'e{i}', 'category': 'Music', 'created_by': 'org-a'} for i in range(250)]
+    supabase.tables.update({'favorites': favorites, 'events': events, 'users': [{'id': 'u1'}]})
+    recommender.max_favorites = 100
+
+    loaded = recommender.load_user(supabase, 'u1')
+    assert len(loaded['favorites']) == 100
+    # The most recently added ones
+    assert {e['id'] for e in loaded['favorites']} == {f'e{i}' for i in range(150, 250)}
+    assert supabase.in_filters == [('events', 'id', 100)]
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.response_cache import event_tag, response_cache
+from conftest import auth_headers
+
+LISTS = ['/api/events/', '/api/events/upcoming', '/api/events/popular']
+
+
+@pytest.fixture
+def events(supabase):
+    start = datetime.now() + timedelta(days=1)
+    supabase.tables['events'] = [
+        {'id': f'e{i}', 'title': f'Event {i}', 'attendees_count': 0, 'category': 'Music', 'created_by': 'org',
+         'created_at': f'2024-01-0{i + 1}T00:00:00', 'event_date_time': (start + timedelta(days=i)).isoformat()}
+        for i in range(3)
+    ]
+    return supabase
+
+
+def attendees(response, event_id='e0'):
+    return next(e['attendees_count'] for e in response.get_json()['events'] if e['id'] == event_id)
+
+
+@pytest.mark.parametrize('path', LISTS)
+def test_lists_are_cached(client, events, path):
+    assert client.get(path).headers['X-Cache'] == 'MISS'
+    # Other arguments are another entry
+    assert client.get(path, query_string={'limit': 2}).headers['X-Cache'] == 'MISS'
+    assert client.get(path).headers['X-Cache'] == 'HIT'
+
+
+def test_joining_invalidates_every_list_showing_counts(client, events):
+    for path in LISTS:
+        assert attendees(client.get(path)) == 0
+    assert client.get('/api/events/e0').get_json()['event']['attendees_count'] == 0
+
+    assert client.post('/api/events/e0/join', headers=auth_headers('u1')).status_code == 200
+    assert ('adjust_attendees_count', {'p_event_id': 'e0', 'p_delta': 1}) in events.rpc_calls
+    # The count the database function wrote
+    events.tables['events'][0]['attendees_count'] = 1
+
+    for path in LISTS:
+        response = client.get(path)
+        assert response.headers['X-Cache'] == 'MISS'
+        assert attendees(response) == 1
+    assert client.get('/api/events/e0').get_json()['event']['attendees_count'] == 1
+
+
+def test_event_tag_only_drops_that_event(app, client, events):
+    client.get('/api/events/e0')
+    client.get('/api/events/e1')
+    with app.app_context():
+        response_cache.invalidate(event_tag('e0'))
+
+    assert client.get('/api/events/e0').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/events/e1').headers['X-Cache'] == 'HIT'
+
+
+def test_read_through_loads_only_missing_keys(app):
+    loads = []
+
+    def load(keys):
+        loads.append(sorted(keys))
+        return {key: {'id': key} for key in keys if key != 'gone'}
+
+    tagged = {key: [event_tag(key)] for key in ('a', 'b', 'gone')}
+    assert response_cache.read_through(tagged, load) == {'a': {'id': 'a'}, 'b': {'id': 'b'}}
+    assert response_cache.read_through(tagged, load) == {'a': {'id': 'a'}, 'b': {'id': 'b'}}
+
+    response_cache.invalidate(event_tag('a'))
+    response_cache.read_through(tagged, load)
+    # Misses are not cached, invalidated keys are reloaded
+    assert loads == [['a', 'b', 'gone'], ['gone'], ['a', 'gone']]
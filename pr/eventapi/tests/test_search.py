@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.search import EventSearchIndex, parse_datetime, tokenize
+from conftest import FakeSupabase
+
+EVENTS = [
+    {'id': 'e1', 'title': 'Jazz Night', 'description': 'Live music downtown', 'location': 'Blue Café',
+     'organizer_name': 'City Music', 'category': 'Music', 'event_date_time': '2024-06-01T20:00:00'},
+    {'id': 'e2', 'title': 'Football Match', 'description': 'Jazz band at half time', 'location': 'Stadium',
+     'organizer_name': 'Sports Club', 'category': 'Sports', 'event_date_time': '2024-05-01T15:00:00'},
+    {'id': 'e3', 'title': 'Jazzercise class', 'description': 'Dance workout', 'location': 'Gym',
+     'organizer_name': 'Fit Co', 'category': 'Sports', 'event_date_time': '2024-07-01T09:00:00+02:00'},
+    {'id': 'e4', 'title': 'Book Fair', 'description': None, 'location': 'Library',
+     'organizer_name': 'Readers', 'category': 'Culture', 'event_date_time': None},
+]
+
+
+@pytest.fixture
+def index():
+    index = EventSearchIndex()
+    index.rebuild(EVENTS)
+    return index
+
+
+def ids(result):
+    return [event_id for event_id, _ in result[1]]
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize('Café-Concert at THE Park') == ['cafe', 'concert', 'park']
+    assert tokenize(None) == []
+
+
+def test_parse_datetime_normalizes_to_naive_utc():
+    assert parse_datetime('2024-07-01T09:00:00+02:00') == datetime(2024, 7, 1, 7, 0)
+    assert parse_datetime('2024-07-01T09:00:00Z') == datetime(2024, 7, 1, 9, 0)
+    assert parse_datetime('not a date') is None
+
+
+def test_title_match_outranks_description_match(index):
+    # "jazz" is in the title of e1, in the description of e2 and a prefix of a title word of e3
+    ranked = ids(index.search('jazz'))
+    assert sorted(ranked) == ['e1', 'e2', 'e3']
+    assert ranked.index('e1') < ranked.index('e2')
+
+
+def test_every_word_must_match(index):
+    assert ids(index.search('jazz music')) == ['e1']
+    assert ids(index.search('jazz library')) == []
+
+
+def test_prefix_and_accent_insensitive(index):
+    assert ids(index.search('foot')) == ['e2']
+    assert ids(index.search('CAFE')) == ['e1']
+
+
+def test_filters(index):
+    assert sorted(ids(index.search('jazz', category='sports'))) == ['e2', 'e3']
+    assert sorted(ids(index.search('jazz', date_from=datetime(2024, 5, 15)))) == ['e1', 'e3']
+    assert sorted(ids(index.search('jazz', date_to=datetime(2024, 6, 15)))) == ['e1', 'e2']
+
+
+def test_empty_query_lists_by_date(index):
+    # Events without a date come last
+    assert ids(index.search('')) == ['e2', 'e1', 'e3', 'e4']
+    assert ids(index.search('', category='culture')) == ['e4']
+
+
+def test_total_and_slices(index):
+    ranked = index.search('jazz')[1]
+    total, page = index.search('jazz', limit=1, offset=1)
+    assert total == 3
+    assert page == ranked[1:2]
+
+
+def test_add_and_remove(index):
+    index.add({'id': 'e5', 'title': 'Jazz Brunch', 'category': 'Food', 'event_date_time': '2024-08-01T11:00:00'})
+    assert 'e5' in ids(index.search('brunch'))
+
+    index.add({'id': 'e5', 'title': 'Wine Tasting', 'category': 'Food', 'event_date_time': '2024-08-01T11:00:00'})
+    assert ids(index.search('brunch')) == []
+    assert ids(index.search('wine')) == ['e5']
+
+    index.remove('e1')
+    index.remove('missing')
+    assert sorted(ids(index.search('jazz'))) == ['e2', 'e3']
+    assert index.stats()['events'] == 4
+
+
+def test_load_reads_every_page():
+    db = FakeSupabase({'events': [dict(event) for event in EVENTS]}, max_rows=3)
+    index = EventSearchIndex()
+    index.page_size = 3
+    index.rebuild(index.load(db))
+    assert index.stats()['events'] == len(EVENTS)
+    assert index.ready
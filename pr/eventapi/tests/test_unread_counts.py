@@ -0,0 +1,99 @@
+import pytest
+
+from app.utils.notification_broker import notification_broker
+from app.utils.unread_counts import unread_counter
+from conftest import auth_headers
+
+
+@pytest.fixture
+def stream(app):
+    """Subscribe to the in-process broker as `user_id`; returns the received messages"""
+    subscriptions = []
+
+    def subscribe(user_id):
+        subscription = notification_broker.subscribe(user_id)
+        subscriptions.append(subscription)
+
+        def messages():
+            received = []
+            while (message := subscription.get(timeout=0)) is not None:
+                received.append(message)
+            return received
+        return messages
+
+    yield subscribe
+    for subscription in subscriptions:
+        notification_broker.unsubscribe(subscription)
+
+
+def test_counts_are_cached_and_adjusted(app, supabase):
+    supabase.tables['notification_counters'] = [{'user_id': 'u1', 'unread_count': 3}]
+    assert unread_counter.get(supabase, 'u1') == 3
+
+    # The table is only read once, later changes are applied to the cached count
+    supabase.tables['notification_counters'] = []
+    unread_counter.adjust('u1', 2)
+    assert unread_counter.get(supabase, 'u1') == 5
+    unread_counter.adjust('u1', -10)
+    assert unread_counter.get(supabase, 'u1') == 0
+
+    unread_counter.adjust('u2', 1)
+    assert unread_counter.get(supabase, 'u2') == 0
+
+
+def test_get_many_reads_missing_users_in_chunks(app, supabase):
+    supabase.tables['notification_counters'] = [{'user_id': f'u{i}', 'unread_count': i} for i in range(250)]
+    unread_counter.get(supabase, 'u1')
+
+    counts = unread_counter.get_many(supabase, [f'u{i}' for i in range(250)] + ['u1', 'nobody'])
+    assert counts['u249'] == 249 and counts['nobody'] == 0
+    assert len(counts) == 251
+    assert [size for _, _, size in supabase.in_filters] == [100, 100, 50]
+
+
+def test_remote_changes_drop_the_cached_count(app, supabase):
+    supabase.tables['notification_counters'] = [{'user_id': 'u1', 'unread_count': 1}]
+    assert unread_counter.get(supabase, 'u1') == 1
+    supabase.tables['notification_counters'][0]['unread_count'] = 4
+
+    unread_counter._on_remote_message('u1', 'typing', {})
+    assert unread_counter.get(supabase, 'u1') == 1
+    unread_counter._on_remote_message('u1', 'unread_count', {'count': 4})
+    assert unread_counter.get(supabase, 'u1') == 4
+
+
+def test_deleting_an_event_updates_the_counts_of_notified_users(app, client, supabase, stream):
+    supabase.tables.update({
+        'events': [{'id': 'e1', 'created_by': 'org'}],
+        'notifications': [
+            {'id': f'n{i}', 'user_id': user_id, 'related_id': related_id, 'is_read': is_read}
+            for i, (user_id, related_id, is_read) in enumerate([
+                ('u1', 'e1', False), ('u1', 'e1', False), ('u1', 'e2', False),
+                ('u2', 'e1', False), ('u3', 'e1', True),
+            ])
+        ],
+        'notification_counters': [{'user_id': 'u1', 'unread_count': 3}, {'user_id': 'u2', 'unread_count': 1}],
+    })
+    assert unread_counter.get(supabase, 'u1') == 3
+    u1, u2, u3 = stream('u1'), stream('u2'), stream('u3')
+
+    # The cascade and the counter trigger run in the database: emulate u2's counter
+    supabase.tables['notification_counters'][1]['unread_count'] = 0
+    response = client.delete('/api/events/e1', headers=auth_headers('org'))
+    assert response.status_code == 200
+
+    assert unread_counter.get(supabase, 'u1') == 1
+    assert u1() == [('unread_count', {'count': 1})]
+    assert u2() == [('unread_count', {'count': 0})]
+    # Only read notifications: nothing changed
+    assert u3() == []
+
+
+def test_unread_notifications_are_read_page_by_page(supabase):
+    from app.routes.notifications import unread_notifications_by_user
+
+    supabase.tables['notifications'] = [
+        {'id': f'n{i:03}', 'user_id': f'u{i % 3}', 'related_id': 'e1', 'is_read': False} for i in range(25)
+    ]
+    supabase.max_rows = 10
+    assert unread_notifications_by_user(supabase, 'e1', page_size=10) == {'u0': 9, 'u1': 8, 'u2': 8}